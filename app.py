@@ -1,16 +1,18 @@
 # apps/app.py
 import sys
 import os
-from modules.recommend_page import recommend_page
-from modules.home_page import home_page
-from modules.chatbot_ui import chatbot_ui
-from modules.model_page import model_page
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))  # Add parent dir to path
 
 import streamlit as st
 from streamlit_option_menu import option_menu
-from modules.dataset_upload import upload_dataset
-from modules.eda_page import eda_page
+
+from modules.dataset_store import enable_copy_on_write
+
+# Copy-on-write for the whole process, before any frame exists (see modules/dataset_store.py)
+enable_copy_on_write()
+# Page modules are imported inside their branch below: only the page being shown pays
+# for its dependencies (TensorFlow, NLTK, mlxtend, seaborn), and Python caches each
+# module after the first visit, so later reruns cost nothing extra.
 # -----------------------
 # APP CONFIGURATION
 # -----------------------
@@ -41,12 +43,14 @@ with st.sidebar:
 # HOME PAGE
 # -----------------------
 if selected == "Home":
+    from modules.home_page import home_page
     home_page()
 
 # -----------------------
 # DATASET PAGE
 # -----------------------
 if selected == "Dataset":
+    from modules.dataset_upload import upload_dataset
     upload_dataset()  # <- call the function
 
 # -----------------------
@@ -54,6 +58,7 @@ if selected == "Dataset":
 # -----------------------
 
 elif selected == "Model":
+    from modules.model_page import model_page
     model_page()  # call the new Model page module
     
 # ----------------------
@@ -61,10 +66,14 @@ elif selected == "Model":
 # ---------------------
    
 elif selected == "EDA":
+    from modules.eda_page import eda_page
     eda_page()
 
 # -----------------------
 # RECOMMENDATION PAGE
 # -----------------------
 elif selected == "Recommendation":
+    from modules.recommend_page import recommend_page
+    from modules.recommend_utils import warm_lstm_cache
+    warm_lstm_cache()  # loads the LSTM once per process/version; later reruns only stat the files
     recommend_page()
\ No newline at end of file
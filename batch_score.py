@@ -0,0 +1,34 @@
+# batch_score.py
+# Offline batch scoring (nightly recommendations / sentiment) without Streamlit.
+#   python batch_score.py baskets.csv recs.jsonl --mode basket --input-col items --id-col customer_id
+#   python batch_score.py reviews.jsonl sentiment.jsonl --mode sentiment --input-col text --workers 8
+import argparse
+
+from modules.batch_scoring import MODES, run_batch
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream a CSV/JSONL file through a trained model in a process pool.")
+    parser.add_argument("input", help="Input CSV or JSONL file.")
+    parser.add_argument("output", help="Output JSONL file (a .ckpt.json checkpoint is kept next to it).")
+    parser.add_argument("--mode", choices=MODES, required=True,
+                        help="basket = association rules, next = sequential next-item, sentiment = LSTM.")
+    parser.add_argument("--input-col", required=True,
+                        help="Column holding the basket/session items (comma separated or list) or review text.")
+    parser.add_argument("--id-col", default=None, help="Column copied to each output row (e.g. customer_id).")
+    parser.add_argument("--algorithm", choices=["Apriori", "FP-Growth"], default="Apriori",
+                        help="Rule model used in basket mode.")
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument("--max-pending", type=int, default=None,
+                        help="Chunks in flight at once (default: 2 × workers); bounds memory.")
+    parser.add_argument("--models-dir", default="models")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore an existing checkpoint and start over.")
+    args = parser.parse_args()
+
+    run_batch(
+        args.input, args.output, args.mode, args.input_col,
+        id_col=args.id_col, algorithm=args.algorithm, top_n=args.top_n,
+        chunk_size=args.chunk_size, workers=args.workers, max_pending=args.max_pending,
+        resume=not args.no_resume, models_dir=args.models_dir,
+    )
@@ -0,0 +1,86 @@
+# benchmarks/bench_lstm_fast.py
+# Epoch time of the sentiment model under each CPU training configuration.
+#   python benchmarks/bench_lstm_fast.py --rows 20000 --epochs 2
+#   python benchmarks/bench_lstm_fast.py --intra 8 --inter 2
+# The first epoch includes graph tracing, so the reported time is the mean of the rest.
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+CONFIGS = [
+    # name,                 fast,  cell,   batch_size
+    ("baseline (rdrop, 32)", False, "LSTM", 32),
+    ("fast LSTM, 32", True, "LSTM", 32),
+    ("fast LSTM, 256", True, "LSTM", 256),
+    ("fast GRU, 256", True, "GRU", 256),
+]
+
+
+def synthetic_sequences(rows, vocab_size=5000, max_length=100, seed=0):
+    """Padded id sequences whose label depends on a few 'sentiment' ids."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    lengths = np.clip(rng.lognormal(2.5, 0.8, rows).astype(int), 1, max_length)
+    X = np.zeros((rows, max_length), dtype=np.int32)
+    y = rng.integers(0, 2, rows)
+    for i, n in enumerate(lengths):
+        ids = rng.integers(10, vocab_size, n)
+        cues = rng.random(n) < 0.3
+        ids[cues] = np.where(y[i] == 1, 2 + rng.integers(0, 4, cues.sum()), 6 + rng.integers(0, 4, cues.sum()))
+        X[i, :n] = ids
+    return X, y
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CPU epoch-time benchmark for the LSTM training modes.")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--epochs", type=int, default=2)
+    parser.add_argument("--intra", type=int, default=0, help="intra_op_parallelism_threads (0 = TF default)")
+    parser.add_argument("--inter", type=int, default=0, help="inter_op_parallelism_threads (0 = TF default)")
+    args = parser.parse_args()
+
+    from modules.train_lstm_sentiment import build_lstm_model, configure_cpu_threads, scaled_learning_rate
+    configure_cpu_threads(args.intra, args.inter)
+
+    from tensorflow.keras.callbacks import Callback
+
+    class EpochTimer(Callback):
+        def on_train_begin(self, logs=None):
+            self.times = []
+
+        def on_epoch_begin(self, epoch, logs=None):
+            self._started = time.perf_counter()
+
+        def on_epoch_end(self, epoch, logs=None):
+            self.times.append(time.perf_counter() - self._started)
+
+    X, y = synthetic_sequences(args.rows)
+    train_rows = int(len(X) * 0.8)
+    print(f"🧪 {args.rows:,} rows, {args.epochs} epochs, threads intra={args.intra or 'default'} "
+          f"inter={args.inter or 'default'}")
+
+    results = []
+    for name, fast, cell, batch_size in CONFIGS:
+        model = build_lstm_model(5000, fast=fast, cell=cell, learning_rate=scaled_learning_rate(batch_size))
+        timer = EpochTimer()
+        history = model.fit(X, y, validation_split=0.2, epochs=args.epochs, batch_size=batch_size,
+                            callbacks=[timer], verbose=0)
+        steady = timer.times[1:] or timer.times
+        epoch_s = sum(steady) / len(steady)
+        results.append({
+            "config": name,
+            "lr": round(scaled_learning_rate(batch_size), 5),
+            "epoch s": round(epoch_s, 2),
+            "samples/s": round(train_rows / epoch_s, 1),
+            "val_accuracy": round(float(history.history["val_accuracy"][-1]), 4),
+        })
+        print(json.dumps(results[-1]))
+
+    base = results[0]["epoch s"]
+    for res in results[1:]:
+        print(f"⚡ {res['config']}: {base / res['epoch s']:.2f}x faster per epoch than baseline")
@@ -0,0 +1,115 @@
+# benchmarks/bench_lstm_pipeline.py
+# Compare the in-memory fixed-padding LSTM trainer with the bucketed tf.data pipeline.
+#   python benchmarks/bench_lstm_pipeline.py --rows 50000 --epochs 1
+#   python benchmarks/bench_lstm_pipeline.py --csv reviews.csv --text-col Review_Text --label-col Sentiment
+# Each path runs in its own process so peak RSS reflects only that path.
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import multiprocessing
+from queue import Empty
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+POSITIVE = "great excellent love amazing perfect happy recommend works fast quality".split()
+NEUTRAL = "product item battery sound screen price delivery box design size color the it was".split()
+NEGATIVE = "bad broken terrible awful slow poor refund disappointed cheap waste".split()
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / 1024 if sys.platform != "darwin" else rss / 1024 ** 2
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024 ** 2
+
+
+def write_synthetic_reviews(path, rows, seed=0):
+    """Reviews with a long-tailed length distribution (most short, a few near max_length)."""
+    import pandas as pd
+
+    rng = random.Random(seed)
+    texts, labels = [], []
+    for _ in range(rows):
+        positive = rng.random() < 0.5
+        length = max(1, min(150, int(rng.lognormvariate(2.5, 0.8))))
+        words = [rng.choice(POSITIVE if positive else NEGATIVE) if rng.random() < 0.3 else rng.choice(NEUTRAL)
+                 for _ in range(length)]
+        texts.append(" ".join(words))
+        labels.append("positive" if positive else "negative")
+    pd.DataFrame({"text": texts, "label": labels}).to_csv(path, index=False)
+
+
+def _bench(path_name, csv_path, text_col, label_col, epochs, batch_size, queue):
+    import pandas as pd
+
+    save_dir = tempfile.mkdtemp(prefix=f"bench_{path_name}_")
+    started = time.perf_counter()
+    if path_name == "fixed":
+        from modules.train_lstm_sentiment import train_lstm_sentiment
+        df = pd.read_csv(csv_path)
+        rows = len(df)
+        train_lstm_sentiment(df, text_col, label_col, epochs=epochs, save_dir=save_dir)
+    else:
+        from modules.train_lstm_sentiment import train_lstm_sentiment_bucketed
+        rows = sum(1 for _ in open(csv_path, encoding="utf-8")) - 1
+        train_lstm_sentiment_bucketed(csv_path, text_col, label_col, epochs=epochs,
+                                      batch_size=batch_size, save_dir=save_dir)
+    elapsed = time.perf_counter() - started
+
+    queue.put({
+        "path": path_name,
+        "rows": rows,
+        "epochs": epochs,
+        "wall s": round(elapsed, 2),
+        "samples/s": round(rows * epochs / elapsed, 1),
+        "peak RSS MB": round(_peak_rss_mb(), 1),
+    })
+
+
+def run_isolated(path_name, *args):
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_bench, args=(path_name, *args, queue))
+    proc.start()
+    while True:
+        try:
+            result = queue.get(timeout=1.0)
+            break
+        except Empty:
+            if not proc.is_alive():
+                raise RuntimeError(f"❌ {path_name} benchmark process exited with code {proc.exitcode}")
+    proc.join()
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fixed-padding vs bucketed tf.data LSTM training benchmark.")
+    parser.add_argument("--csv", default=None, help="CSV to train on (default: synthetic reviews).")
+    parser.add_argument("--text-col", default="text")
+    parser.add_argument("--label-col", default="label")
+    parser.add_argument("--rows", type=int, default=50_000, help="Synthetic rows when --csv is not given.")
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    csv_path = args.csv
+    if csv_path is None:
+        csv_path = os.path.join(tempfile.mkdtemp(prefix="bench_reviews_"), "reviews.csv")
+        write_synthetic_reviews(csv_path, args.rows)
+        print(f"📝 Wrote {args.rows:,} synthetic reviews to {csv_path}")
+
+    results = [
+        run_isolated(name, csv_path, args.text_col, args.label_col, args.epochs, args.batch_size)
+        for name in ("fixed", "bucketed")
+    ]
+    for res in results:
+        print(json.dumps(res))
+    print(f"⚡ Bucketed speed-up: {results[1]['samples/s'] / results[0]['samples/s']:.2f}x | "
+          f"peak RSS {results[1]['peak RSS MB'] - results[0]['peak RSS MB']:+.1f} MB")
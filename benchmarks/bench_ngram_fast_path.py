@@ -0,0 +1,69 @@
+# benchmarks/bench_ngram_fast_path.py
+# Accuracy / throughput of the n-gram fast path + LSTM fallback for each confidence threshold.
+#   python benchmarks/bench_ngram_fast_path.py                      # evaluates on the stored replay sample
+#   python benchmarks/bench_ngram_fast_path.py --csv reviews.csv --text-col Review_Text --label-col Sentiment
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-threshold report for the hashed n-gram sentiment fast path.")
+    parser.add_argument("--models-dir", default="models")
+    parser.add_argument("--csv", default=None, help="Labelled CSV (default: the replay sample saved with the model).")
+    parser.add_argument("--text-col", default="text")
+    parser.add_argument("--label-col", default="label")
+    parser.add_argument("--n", type=int, default=5000)
+    parser.add_argument("--thresholds", default=None, help="Comma separated, e.g. 0,0.5,0.8,0.9")
+    args = parser.parse_args()
+
+    import pandas as pd
+    from modules.ngram_fast_path import REPORT_THRESHOLDS, threshold_report
+    from modules.recommend_utils import predict_sentiment_batch
+    from modules.train_lstm_sentiment import load_lstm_artifacts
+
+    model, tokenizer, encoder, replay, ngram, version = load_lstm_artifacts(args.models_dir)
+    if ngram is None:
+        sys.exit("❌ No n-gram fast-path model saved with this version; retrain the LSTM first.")
+
+    if args.csv:
+        df = pd.read_csv(args.csv, usecols=[args.text_col, args.label_col]).dropna().head(args.n)
+        texts, labels = df[args.text_col].astype(str).tolist(), df[args.label_col]
+    elif replay is not None:
+        df = replay.head(args.n)
+        texts, labels = df["text"].astype(str).tolist(), df["label"]
+    else:
+        sys.exit("❌ No evaluation data: pass --csv or retrain so a replay sample is stored.")
+
+    known = {str(c) for c in encoder.classes_}
+    mask = [str(v) in known for v in labels]
+    texts = [t for t, keep in zip(texts, mask) if keep]
+    y_true = encoder.transform([v for v, keep in zip(labels, mask) if keep])
+
+    encoder_path = os.path.join(args.models_dir, "lstm_encoder.pkl")
+
+    def lstm(batch):
+        return list(predict_sentiment_batch(batch, model, tokenizer, encoder_path=encoder_path))
+
+    # Single-text latency of each path (steady state)
+    lstm(texts[:8]), ngram.lstm_like_scores(texts[:8])
+    single = {"ngram": [], "lstm": []}
+    for text in texts[:200]:
+        t = time.perf_counter()
+        ngram.lstm_like_scores([text])
+        single["ngram"].append((time.perf_counter() - t) * 1000)
+        t = time.perf_counter()
+        lstm([text])
+        single["lstm"].append((time.perf_counter() - t) * 1000)
+
+    print(f"🧠 Model version {version} | {len(texts):,} labelled texts")
+    print(f"⏱️ Single text p50: n-gram {statistics.median(single['ngram']):.3f} ms, "
+          f"LSTM {statistics.median(single['lstm']):.3f} ms")
+
+    thresholds = [float(t) for t in args.thresholds.split(",")] if args.thresholds else REPORT_THRESHOLDS
+    report = pd.DataFrame(threshold_report(texts, y_true, ngram, lstm, encoder, thresholds))
+    print(report.to_string(index=False))
@@ -0,0 +1,71 @@
+# benchmarks/bench_startup.py
+# Cold-start cost of the Streamlit app: import time and RSS of the app shell and each page,
+# and which heavy dependencies (TensorFlow, NLTK, mlxtend, seaborn) each one pulls in.
+#   python benchmarks/bench_startup.py
+#   python benchmarks/bench_startup.py --repeat 5 --json startup.json
+# Every measurement runs in a fresh interpreter, so nothing is already in sys.modules.
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+HEAVY = ["tensorflow", "nltk", "mlxtend", "seaborn", "sklearn", "matplotlib"]
+
+# name -> modules imported on a cold run of that page (the shell is what app.py imports up front)
+TARGETS = {
+    "app shell + Home": ["streamlit", "streamlit_option_menu", "modules.home_page"],
+    "Dataset page": ["modules.dataset_upload"],
+    "EDA page": ["modules.eda_page"],
+    "Model page": ["modules.model_page"],
+    "Recommendation page": ["modules.recommend_page"],
+}
+
+_PROBE = """
+import sys, time, json, resource
+started = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - started
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{
+    "import s": elapsed,
+    "peak RSS MB": rss / 1024 if sys.platform != "darwin" else rss / 1024 ** 2,
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def measure(modules):
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""),
+               TF_CPP_MIN_LOG_LEVEL="3")
+    out = subprocess.run([sys.executable, "-c", _PROBE.format(modules=modules, heavy=HEAVY)],
+                         cwd=ROOT, env=env, capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(f"❌ importing {modules} failed:\n{out.stderr[-2000:]}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import time / RSS of the Streamlit app shell and pages.")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per target (median reported).")
+    parser.add_argument("--json", default=None, help="Also write the results to this file.")
+    args = parser.parse_args()
+
+    results = []
+    for name, modules in TARGETS.items():
+        runs = [measure(modules) for _ in range(args.repeat)]
+        results.append({
+            "target": name,
+            "import s": round(statistics.median(r["import s"] for r in runs), 3),
+            "peak RSS MB": round(statistics.median(r["peak RSS MB"] for r in runs), 1),
+            "heavy deps": ", ".join(runs[0]["heavy"]) or "-",
+        })
+        print(json.dumps(results[-1], ensure_ascii=False))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,141 @@
+# benchmarks/bench_tflite.py
+# Compare the Keras .h5 sentiment path with the quantized TFLite path on CPU.
+#   python benchmarks/bench_tflite.py --export dynamic
+#   python benchmarks/bench_tflite.py --csv reviews.csv --text-col Review_Text --label-col Sentiment
+# Each path runs in its own process so peak RSS reflects only that path's imports and model.
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import multiprocessing
+from queue import Empty
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+SAMPLE_TEXTS = [
+    "I love this product, it works perfectly!",
+    "Battery drains too fast, not satisfied at all.",
+    "Average quality, okay for daily use.",
+    "The sound quality is amazing and very clear.",
+    "Totally disappointed, the item stopped working in a week.",
+    "Excellent performance and great value for money!",
+    "The design is nice but the material feels cheap.",
+    "Not worth the price, expected better performance.",
+]
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / 1024 if sys.platform != "darwin" else rss / 1024 ** 2
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024 ** 2
+
+
+def _bench(path_name, texts, single_runs, queue):
+    started = time.perf_counter()
+    if path_name == "keras":
+        from modules.recommend_utils import predict_sentiment, predict_sentiment_batch
+        predict_one = predict_sentiment
+        predict_many = lambda xs: list(predict_sentiment_batch(xs, batch_size=256))
+        predict_one(texts[0])
+    else:
+        from modules.tflite_export import TFLiteSentimentPredictor
+        predictor = TFLiteSentimentPredictor()
+        predict_one = predictor.predict
+        predict_many = lambda xs: list(predictor.predict_batch(xs, batch_size=256))
+        predict_one(texts[0])
+    load_s = time.perf_counter() - started
+
+    latencies = []
+    for i in range(single_runs):
+        t = time.perf_counter()
+        predict_one(texts[i % len(texts)])
+        latencies.append((time.perf_counter() - t) * 1000)
+
+    t = time.perf_counter()
+    results = predict_many(texts)
+    batch_s = time.perf_counter() - t
+
+    latencies.sort()
+    queue.put({
+        "path": path_name,
+        "import+load s": round(load_s, 2),
+        "single p50 ms": round(statistics.median(latencies), 3),
+        "single p95 ms": round(latencies[int(0.95 * (len(latencies) - 1))], 3),
+        "batch texts/s": round(len(texts) / batch_s, 1),
+        "peak RSS MB": round(_peak_rss_mb(), 1),
+        "results": results,
+    })
+
+
+def run_isolated(path_name, texts, single_runs):
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_bench, args=(path_name, texts, single_runs, queue))
+    proc.start()
+    # Poll so a crashed child (e.g. a converter/interpreter abort) can't hang the parent
+    while True:
+        try:
+            result = queue.get(timeout=1.0)
+            break
+        except Empty:
+            if not proc.is_alive():
+                raise RuntimeError(f"❌ {path_name} benchmark process exited with code {proc.exitcode}")
+    proc.join()
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keras vs TFLite sentiment benchmark (CPU).")
+    parser.add_argument("--export", choices=["none", "dynamic", "int8"], default=None,
+                        help="(Re)export models/lstm_model.h5 to TFLite with this quantization first.")
+    parser.add_argument("--csv", default=None, help="Optional CSV of reviews to benchmark on.")
+    parser.add_argument("--text-col", default="text")
+    parser.add_argument("--label-col", default=None, help="Optional gold label column for accuracy.")
+    parser.add_argument("--n", type=int, default=2000, help="Texts used for the batch run.")
+    parser.add_argument("--single-runs", type=int, default=200)
+    args = parser.parse_args()
+
+    labels = None
+    if args.csv:
+        import pandas as pd
+        df = pd.read_csv(args.csv).head(args.n)
+        texts = df[args.text_col].astype(str).tolist()
+        labels = df[args.label_col].astype(str).tolist() if args.label_col else None
+    else:
+        texts = (SAMPLE_TEXTS * (args.n // len(SAMPLE_TEXTS) + 1))[:args.n]
+
+    if args.export:
+        import pickle
+        from tensorflow.keras.models import load_model
+        from modules.tflite_export import export_tflite
+        with open("models/lstm_tokenizer.pkl", "rb") as f:
+            tokenizer = pickle.load(f)
+        encoder = None
+        if os.path.exists("models/lstm_encoder.pkl"):
+            with open("models/lstm_encoder.pkl", "rb") as f:
+                encoder = pickle.load(f)
+        _, _, size = export_tflite(load_model("models/lstm_model.h5"), tokenizer, encoder,
+                                   quantization=args.export, representative_texts=texts)
+        print(f"📦 Exported TFLite ({args.export}): {size / 1024:.0f} KB "
+              f"(h5: {os.path.getsize('models/lstm_model.h5') / 1024:.0f} KB)")
+
+    keras_res = run_isolated("keras", texts, args.single_runs)
+    lite_res = run_isolated("tflite", texts, args.single_runs)
+
+    for res in (keras_res, lite_res):
+        print(json.dumps({k: v for k, v in res.items() if k != "results"}))
+
+    k_out, l_out = keras_res["results"], lite_res["results"]
+    agreement = sum(a[0] == b[0] for a, b in zip(k_out, l_out)) / len(k_out)
+    drift = [abs(a[1] - b[1]) for a, b in zip(k_out, l_out)]
+    print(f"🎯 Label agreement: {agreement:.2%} | score drift mean {statistics.mean(drift):.4f}, max {max(drift):.4f}")
+    if labels:
+        for name, out in (("keras", k_out), ("tflite", l_out)):
+            acc = sum(str(p[0]) == g for p, g in zip(out, labels)) / len(labels)
+            print(f"   {name} accuracy vs '{args.label_col}': {acc:.2%}")
@@ -0,0 +1,69 @@
+# benchmarks/load_test_service.py
+# Local load test for serve.py.
+#   python benchmarks/load_test_service.py --endpoint /recommend/basket --items Milk,Bread -c 32 -n 5000
+import json
+import time
+import asyncio
+import argparse
+import statistics
+
+
+async def _worker(host, port, request_bytes, count, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(count):
+            started = time.perf_counter()
+            writer.write(request_bytes)
+            await writer.drain()
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.decode("latin-1").split("\r\n"):
+                if line.lower().startswith("content-length:"):
+                    length = int(line.split(":", 1)[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - started)
+            if not head.startswith(b"HTTP/1.1 200"):
+                errors.append(head.split(b"\r\n", 1)[0].decode())
+    finally:
+        writer.close()
+
+
+async def run(host, port, endpoint, payload, concurrency, total):
+    body = json.dumps(payload).encode("utf-8")
+    method = "GET" if endpoint in ("/health", "/metrics") else "POST"
+    request_bytes = (
+        f"{method} {endpoint} HTTP/1.1\r\nHost: {host}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+    ).encode("latin-1") + body
+
+    latencies, errors = [], []
+    per_worker = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        _worker(host, port, request_bytes, n, latencies, errors) for n in per_worker if n
+    ])
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+    print(f"📊 {endpoint}: {len(latencies)} requests, concurrency {concurrency}")
+    print(f"   Throughput: {len(latencies) / elapsed:,.0f} req/s over {elapsed:.2f}s")
+    print(f"   Latency ms: mean {statistics.mean(latencies) * 1000:.2f} | p50 {pct(0.50):.2f} "
+          f"| p95 {pct(0.95):.2f} | p99 {pct(0.99):.2f} | max {latencies[-1] * 1000:.2f}")
+    print(f"   Errors: {len(errors)}" + (f" (first: {errors[0]})" if errors else ""))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the headless recommendation service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--endpoint", default="/recommend/basket",
+                        choices=["/health", "/metrics", "/recommend/basket", "/recommend/next", "/sentiment"])
+    parser.add_argument("--items", default="Milk,Bread", help="Comma separated items for basket/next-item.")
+    parser.add_argument("--text", default="This product is amazing!", help="Review text for /sentiment.")
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("-n", "--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    payload = {"text": args.text} if args.endpoint == "/sentiment" else {"items": args.items.split(",")}
+    asyncio.run(run(args.host, args.port, args.endpoint, payload, args.concurrency, args.requests))
@@ -0,0 +1,273 @@
+# ============================================
+# batch_scoring.py
+# ============================================
+"""
+Offline batch scoring: stream a CSV/JSONL file in chunks, score each chunk in a
+process pool (one model copy per worker) and stream results to a JSONL file.
+
+Memory stays bounded: at most `max_pending` chunks are read ahead, and results
+are written in input order as soon as the oldest chunk finishes. After every
+written chunk a checkpoint records the input position and output byte offset,
+so an interrupted run resumes where it stopped.
+"""
+
+import os
+import sys
+import json
+import time
+import pickle
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from modules.model_versions import atomic_write, current_artifact, current_version
+
+MODES = ["basket", "next", "sentiment"]
+
+# Per-process state, filled by _init_worker
+_WORKER = {}
+
+
+# ============================================================
+# 📂 Input streaming
+# ============================================================
+def _input_format(path):
+    return "jsonl" if path.endswith((".jsonl", ".json")) else "csv"
+
+
+def iter_chunks(path, chunk_size=10000, skip_rows=0):
+    """Yield lists of record dicts from a CSV or JSONL file, skipping `skip_rows` data rows."""
+    if _input_format(path) == "csv":
+        skip = range(1, skip_rows + 1) if skip_rows else None
+        for chunk in pd.read_csv(path, chunksize=chunk_size, skiprows=skip):
+            yield chunk.to_dict("records")
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        batch = []
+        seen = 0   # records so far; blank lines are not rows, so they don't count toward skip_rows
+        for line in f:
+            if not line.strip():
+                continue
+            seen += 1
+            if seen <= skip_rows:
+                continue
+            batch.append(json.loads(line))
+            if len(batch) >= chunk_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def _parse_items(value):
+    if isinstance(value, (list, tuple)):
+        return [str(v).strip() for v in value if str(v).strip()]
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return []
+    return [i.strip() for i in str(value).split(",") if i.strip()]
+
+
+# ============================================================
+# 🧠 Model resolution (pinned once per job)
+# ============================================================
+def resolve_model_paths(mode, algorithm="Apriori", models_dir="models"):
+    """
+    Artifact paths for `mode`, taken from the current registry version when one
+    exists. Resolved once in the parent so every worker scores with the same version.
+    """
+    registry_dir = os.path.join(models_dir, "registry")
+
+    def pick(algo, key, legacy):
+        return current_artifact(algo, key, registry_dir) or os.path.join(models_dir, legacy)
+
+    if mode == "basket":
+        legacy = "apriori_model.pkl" if algorithm == "Apriori" else "fpgrowth_model.pkl"
+        paths = {"model": pick(algorithm, "model", legacy)}
+        version = current_version(algorithm, registry_dir)
+    elif mode == "next":
+        algo = "Sequential Pattern Matching"
+        paths = {
+            "model": pick(algo, "model", "sequential_model.pkl"),
+            "mapping": pick(algo, "mapping", "item_mapping.pkl"),
+        }
+        version = current_version(algo, registry_dir)
+    else:
+        algo = "LSTM (Sentiment Analysis)"
+        paths = {
+            "model": pick(algo, "model", "lstm_model.h5"),
+            "tokenizer": pick(algo, "tokenizer", "lstm_tokenizer.pkl"),
+            "encoder": pick(algo, "encoder", "lstm_encoder.pkl"),
+        }
+        version = current_version(algo, registry_dir)
+        end_to_end = pick(algo, "end_to_end", "lstm_end_to_end.keras")
+        if os.path.exists(end_to_end):
+            # Raw strings in: tokenization runs in-graph, no tokenizer pickle needed
+            paths = {"model": end_to_end, "encoder": paths["encoder"]}
+
+    for name, path in paths.items():
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"❌ {name} artifact not found at {path}. Train the model first.")
+    return paths, (version["version"] if version else None)
+
+
+def _init_worker(mode, algorithm, paths, version=None):
+    """Load the model once per worker process."""
+    _WORKER.clear()
+    _WORKER["mode"] = mode
+    _WORKER["algorithm"] = algorithm
+    _WORKER["version"] = version
+
+    if mode == "basket":
+        if algorithm == "Apriori":
+            from modules.train_apriori import load_apriori_model
+            _, rules = load_apriori_model(paths["model"])
+        else:
+            from modules.train_fp_growth import load_fp_growth_model
+            _, rules = load_fp_growth_model(paths["model"])
+        _WORKER["model"] = rules
+
+    elif mode == "next":
+        from modules.train_sequential import load_sequential_model, to_readable_model
+        encoded = load_sequential_model(paths["model"])
+        with open(paths["mapping"], "rb") as f:
+            mapping = pickle.load(f)
+        _WORKER["model"] = to_readable_model(encoded, mapping["id_to_item"])
+
+    else:
+        from modules.recommend_utils import _load_keras_model
+        _WORKER["model"] = _load_keras_model(paths["model"])
+        _WORKER["tokenizer"] = None
+        if "tokenizer" in paths:
+            with open(paths["tokenizer"], "rb") as f:
+                _WORKER["tokenizer"] = pickle.load(f)
+        _WORKER["paths"] = paths
+
+
+def _score_chunk(records, input_col, id_col, top_n):
+    from modules.recommend_utils import predict_sentiment_batch
+    from modules.result_cache import cached_recommend_from_patterns, cached_recommend_from_rules
+
+    mode = _WORKER["mode"]
+    results = [{id_col: record.get(id_col)} if id_col else {} for record in records]
+
+    if mode == "sentiment":
+        texts = ["" if r.get(input_col) is None else str(r.get(input_col)) for r in records]
+        predictions = predict_sentiment_batch(
+            texts, _WORKER["model"], _WORKER["tokenizer"], encoder_path=_WORKER["paths"]["encoder"]
+        )
+        for out, text, (label, score) in zip(results, texts, predictions):
+            out["text"] = text
+            out["label"] = label
+            out["score"] = score
+        return results
+
+    for out, record in zip(results, records):
+        items = _parse_items(record.get(input_col))
+        out["items"] = items
+        if mode == "basket":
+            out["recommendations"] = cached_recommend_from_rules(
+                items, _WORKER["model"], _WORKER["algorithm"], _WORKER["version"]
+            )[:top_n] if items else []
+        else:
+            recs = cached_recommend_from_patterns(items, _WORKER["model"], _WORKER["version"], top_n=top_n)
+            out["recommendations"] = [] if recs and str(recs[0]).startswith("⚠️") else recs
+    return results
+
+
+# ============================================================
+# 💾 Checkpoints
+# ============================================================
+def _checkpoint_path(output_path):
+    return output_path + ".ckpt.json"
+
+
+def _load_checkpoint(output_path, input_path, mode):
+    path = _checkpoint_path(output_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        ckpt = json.load(f)
+    if ckpt.get("input") != os.path.abspath(input_path) or ckpt.get("mode") != mode:
+        raise ValueError(f"❌ Checkpoint {path} belongs to a different job. Delete it or use a new output path.")
+    return ckpt
+
+
+# ============================================================
+# 🚀 Driver
+# ============================================================
+def run_batch(input_path, output_path, mode, input_col, id_col=None, algorithm="Apriori",
+              top_n=5, chunk_size=10000, workers=None, max_pending=None, resume=True,
+              models_dir="models", progress_every=1):
+    """
+    Score `input_path` into `output_path` (JSONL). Returns a summary dict.
+    """
+    if mode not in MODES:
+        raise ValueError(f"❌ mode must be one of {MODES}")
+
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 2
+    paths, version = resolve_model_paths(mode, algorithm, models_dir)
+
+    ckpt = _load_checkpoint(output_path, input_path, mode) if resume else None
+    if ckpt and not os.path.exists(output_path):
+        ckpt = None
+    if ckpt:
+        rows_done, out_offset = ckpt["rows_done"], ckpt["output_bytes"]
+        if ckpt.get("model_version") != version:
+            print(f"⚠️ Model version changed since checkpoint ({ckpt.get('model_version')} → {version}).",
+                  file=sys.stderr)
+        print(f"↩️ Resuming after {rows_done:,} rows.", file=sys.stderr)
+    else:
+        rows_done, out_offset = 0, 0
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    out = open(output_path, "r+b" if ckpt else "wb")
+    out.truncate(out_offset)
+    out.seek(out_offset)
+
+    started = time.perf_counter()
+    rows_this_run = 0
+    chunks_written = 0
+
+    def write_result(records):
+        nonlocal rows_done, rows_this_run, chunks_written
+        out.write("".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in records).encode("utf-8"))
+        out.flush()
+        os.fsync(out.fileno())
+        rows_done += len(records)
+        rows_this_run += len(records)
+        chunks_written += 1
+        atomic_write(_checkpoint_path(output_path), json.dumps({
+            "input": os.path.abspath(input_path),
+            "mode": mode,
+            "model_version": version,
+            "rows_done": rows_done,
+            "output_bytes": out.tell(),
+        }), mode="w")
+        if chunks_written % progress_every == 0:
+            rate = rows_this_run / max(time.perf_counter() - started, 1e-9)
+            print(f"⏳ {rows_done:,} rows scored ({rate:,.0f} rows/s)", file=sys.stderr)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(mode, algorithm, paths, version)) as pool:
+            pending = deque()
+            for records in iter_chunks(input_path, chunk_size, skip_rows=rows_done):
+                pending.append(pool.submit(_score_chunk, records, input_col, id_col, top_n))
+                # Backpressure: never hold more than max_pending chunks in memory
+                while len(pending) >= max_pending:
+                    write_result(pending.popleft().result())
+            while pending:
+                write_result(pending.popleft().result())
+    finally:
+        out.close()
+
+    if os.path.exists(_checkpoint_path(output_path)):
+        os.remove(_checkpoint_path(output_path))
+    elapsed = time.perf_counter() - started
+    summary = {"rows": rows_done, "rows_this_run": rows_this_run, "seconds": round(elapsed, 2),
+               "model_version": version, "output": output_path}
+    print(f"✅ Scored {rows_this_run:,} rows in {elapsed:.1f}s → {output_path}", file=sys.stderr)
+    return summary
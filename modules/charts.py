@@ -0,0 +1,142 @@
+# ============================================
+# charts.py
+# ============================================
+"""
+Cached, screen-sized matplotlib charts for the EDA and preprocessing pages.
+
+Figures are rendered once to PNG and memoized in CHART_CACHE (a separate LRU
+from the step outputs) under (dataset key, chart name, chart params), so a rerun
+that doesn't change a chart just re-sends its image. Trend lines are downsampled with LTTB
+(Largest-Triangle-Three-Buckets) to about one point per horizontal pixel, which
+keeps their shape (peaks included) at any length. Past HEATMAP_MAX_COLUMNS
+numeric columns, the correlation grid becomes a ranked list of the most
+correlated pairs.
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+
+FIGURE_DPI = 100
+TREND_POINTS = 640          # ≈ horizontal pixels of the default 6.4-inch figure
+HEATMAP_MAX_COLUMNS = 15    # wider data → top correlated pairs instead of the full grid
+ANNOTATE_MAX_COLUMNS = 12   # heatmap cells are labelled only when they are readable
+TOP_PAIRS = 20
+
+
+# ============================================================
+# 📉 Downsampling
+# ============================================================
+def lttb(x, y, n_out=TREND_POINTS):
+    """
+    Indices of the `n_out` points Largest-Triangle-Three-Buckets keeps from (x, y).
+    x must be numeric and increasing; the first and last points are always kept.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)   # n_out - 2 buckets between the end points
+    kept = np.empty(n_out, dtype=np.intp)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        start, stop = edges[b], edges[b + 1]
+        # Average of the next bucket (the last point for the final bucket)
+        if b + 2 < len(edges):
+            next_x, next_y = x[stop:edges[b + 2]].mean(), y[stop:edges[b + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        # Point of this bucket forming the largest triangle with the previous pick and that average
+        areas = np.abs((x[a] - next_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (next_y - y[a]))
+        a = start + int(np.argmax(areas))
+        kept[b + 1] = a
+    return kept
+
+
+def downsample_series(series, n_out=TREND_POINTS):
+    """`series` (datetime or numeric index, sorted) reduced to `n_out` points with LTTB."""
+    index = series.index
+    x = index.asi8 if isinstance(index, pd.DatetimeIndex) else np.asarray(index, dtype=np.float64)
+    return series.iloc[lttb(x, series.to_numpy(dtype=np.float64, na_value=np.nan), n_out)]
+
+
+# ============================================================
+# 🖼️ Rendering / cache
+# ============================================================
+def render_png(fig):
+    """PNG bytes of a matplotlib figure (the figure is closed)."""
+    import matplotlib.pyplot as plt
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=FIGURE_DPI, bbox_inches="tight")
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def cached_chart(name, key, params, draw):
+    """PNG of `draw()` (a function returning a figure), memoized by (key, chart, params) when key is given."""
+    if key is None:
+        return render_png(draw())
+    from modules.step_cache import CHART_CACHE
+    png, _ = CHART_CACHE.run(f"chart.{name}", key, params, lambda: render_png(draw()))
+    return png
+
+
+# ============================================================
+# 📊 Charts
+# ============================================================
+def correlation_ui(corr, key=None, top_k=TOP_PAIRS):
+    """Heatmap of `corr`, or for wide data a ranked table / bar chart of its top-k pairs."""
+    import streamlit as st
+    from modules.data_profile import top_correlated_pairs
+
+    def heatmap():
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
+        fig, ax = plt.subplots(figsize=(8, 6))
+        sns.heatmap(corr, annot=len(corr) <= ANNOTATE_MAX_COLUMNS, cmap="coolwarm", fmt=".2f", ax=ax)
+        return fig
+
+    if len(corr) <= HEATMAP_MAX_COLUMNS:
+        st.image(cached_chart("corr_heatmap", key, {"columns": list(corr.columns)}, heatmap))
+        return
+
+    pairs = top_correlated_pairs(corr, top_k)
+
+    def bars():
+        import matplotlib.pyplot as plt
+
+        fig, ax = plt.subplots(figsize=(8, max(3, 0.3 * len(pairs))))
+        labels = pairs["column A"].astype(str) + " ↔ " + pairs["column B"].astype(str)
+        ax.barh(labels[::-1], pairs["correlation"][::-1],
+                color=np.where(pairs["correlation"][::-1] >= 0, "#b40426", "#3b4cc0"))
+        ax.set_xlim(-1, 1)
+        ax.set_xlabel("Pearson correlation")
+        return fig
+
+    st.caption(f"{len(corr)} numeric columns: showing the {len(pairs)} most correlated pairs.")
+    st.image(cached_chart("corr_top_pairs", key, {"columns": list(corr.columns), "k": top_k}, bars))
+    st.dataframe(pairs)
+
+
+def trend_chart(series, title, key=None, params=None, n_out=TREND_POINTS):
+    """Line chart of a (long) time series, LTTB-downsampled to screen resolution; returns PNG bytes."""
+    def draw():
+        import matplotlib.pyplot as plt
+
+        points = downsample_series(series, n_out)
+        fig, ax = plt.subplots()
+        ax.plot(points.index, points.to_numpy(), marker="o" if len(points) <= 100 else None,
+                markersize=3, color="orange")
+        ax.set_title(title)
+        ax.set_xlabel("Date")
+        ax.set_ylabel("Value Count")
+        plt.setp(ax.get_xticklabels(), rotation=45)
+        return fig
+
+    return cached_chart("trend", key, {**(params or {}), "title": title, "points": n_out}, draw)
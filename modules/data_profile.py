@@ -0,0 +1,402 @@
+# ============================================
+# data_profile.py
+# ============================================
+"""
+Every EDA statistic from one chunked pass over the data.
+
+    profile = dataset_profile(df, key)    # memoized per dataset key in STEP_CACHE
+
+Per column, updated chunk by chunk (only one chunk's temporaries alive at a time):
+- numeric: count / mean / std / min / max (merged moments), quartiles from a
+  KLL-style quantile sketch (exact while a column fits in the sketch) and the
+  pairwise correlation matrix (summed Gram matrices);
+- every column: missing count, distinct count (exact while the heavy-hitter table
+  never overflowed, else HyperLogLog) and the most frequent values (Misra-Gries);
+- per timestamp column: daily row counts, daily sums of numeric columns and
+  daily non-null counts of the other columns (the EDA trend chart).
+
+The result is plain pandas objects, small enough to keep per dataset.
+"""
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNK_ROWS = 500_000
+SKETCH_SIZE = 4096        # values per sketch level: rank error ~1% at 10⁸ rows, exact below 4096
+HLL_PRECISION = 14        # 16384 registers: ~0.8% relative error
+TOP_CAPACITY = 1000       # heavy-hitter table size per column
+TOP_KEEP = 100            # values kept in the profile per column
+DATE_KEYWORDS = ("date", "time", "timestamp")
+CORR_BLOCK_VALUES = 4_000_000   # values per block of the correlation matrix products (~32 MB)
+
+
+# ============================================================
+# 📐 Sketches
+# ============================================================
+class Moments:
+    """Count, mean, M2, min, max of a stream of numeric chunks (Chan's parallel merge)."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        n = len(values)
+        if n == 0:
+            return
+        mean = values.mean()
+        m2 = ((values - mean) ** 2).sum()
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta ** 2 * self.n * n / total
+        self.n = total
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else np.nan
+
+
+class QuantileSketch:
+    """
+    KLL-style compactor: level h holds values of weight 2^h. A full level is sorted
+    and every other value (random offset) moves up, so memory stays
+    O(size · log(n / size)).
+    """
+
+    def __init__(self, size=SKETCH_SIZE, seed=0):
+        self.size = size
+        self.levels = [np.empty(0)]
+        self.n = 0
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.size:
+                items = np.sort(items)
+                # An odd value out stays at this level, the rest is halved into the next one
+                keep, items = items[len(items) - len(items) % 2:], items[:len(items) - len(items) % 2]
+                promoted = items[self._rng.integers(2)::2]
+                self.levels[level] = keep
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    @property
+    def exact(self):
+        return len(self.levels) == 1
+
+    def quantiles(self, qs):
+        if self.n == 0:
+            return np.full(len(qs), np.nan)
+        if self.exact:
+            # Nothing compacted yet: same linear interpolation as pandas' describe
+            return np.quantile(self.levels[0], qs)
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** h) for h, items in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        ranks = np.searchsorted(cumulative, np.asarray(qs) * cumulative[-1], side="left")
+        return values[order][np.minimum(ranks, len(values) - 1)]
+
+
+def hash_values(values):
+    """64-bit hash per value (pandas' hash_pandas_object); unhashable cells such as item lists by their text."""
+    # No categorize step: the hashes are factorized right after, one hash table per chunk is enough
+    try:
+        return pd.util.hash_pandas_object(values, index=False, categorize=False).to_numpy()
+    except (TypeError, ValueError):
+        # TypeError for dicts / sets, ValueError ("setting an array element with a sequence") for lists
+        return pd.util.hash_pandas_object(values.astype(str), index=False, categorize=False).to_numpy()
+
+
+def _labels(values):
+    """Object Index of cell values; a plain list of lists would become a MultiIndex."""
+    labels = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        labels[i] = value
+    return pd.Index(labels, dtype=object)
+
+
+def distinct_hashes(hashes):
+    """(distinct hashes, count of each, position of its first occurrence) in one factorize."""
+    codes, uniques = pd.factorize(hashes)
+    counts = np.bincount(codes, minlength=len(uniques))
+    first = np.empty(len(uniques), dtype=np.intp)
+    first[codes[::-1]] = np.arange(len(codes) - 1, -1, -1)
+    return uniques, counts, first
+
+
+def exact_top(values, n=TOP_KEEP):
+    """Exact top-n counts of a column (value_counts keyed like HeavyHitters, so list cells work too)."""
+    values = values.dropna()
+    uniques, counts, first = distinct_hashes(hash_values(values))
+    order = np.argsort(-counts, kind="stable")[:n]
+    return pd.Series(counts[order], index=_labels(values.iloc[first[order]]), dtype=np.int64)
+
+
+class HyperLogLog:
+    """Distinct-count estimate from 64-bit value hashes."""
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.p = precision
+        self.m = 1 << precision
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def update(self, hashes):
+        if len(hashes) == 0:
+            return
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.intp)
+        # Remaining bits, with a sentinel so the rank is at most 64 - p + 1
+        rest = (hashes << np.uint64(self.p)) | np.uint64(1 << (self.p - 1))
+        high = (rest >> np.uint64(32)).astype(np.float64)
+        low = (rest & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        with np.errstate(divide="ignore"):
+            leading = np.where(high > 0, 31 - np.floor(np.log2(high)), 63 - np.floor(np.log2(low)))
+        np.maximum.at(self.registers, index, (leading + 1).astype(np.uint8))
+
+    def estimate(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        raw = alpha * self.m ** 2 / np.sum(2.0 ** -self.registers.astype(np.float64))
+        zeros = np.count_nonzero(self.registers == 0)
+        if raw <= 2.5 * self.m and zeros:
+            return self.m * np.log(self.m / zeros)   # linear counting for small cardinalities
+        return raw
+
+
+class HeavyHitters:
+    """
+    Misra-Gries summary keyed by value hash: exact counts until more than `capacity`
+    distinct values have been seen, lower bounds (error ≤ rows / capacity) after.
+    Each chunk's counts are reduced to `capacity` entries before merging.
+    """
+
+    def __init__(self, capacity=TOP_CAPACITY):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.int64)
+        self.values = {}           # hash -> a value with that hash
+        self.exact = True
+
+    def _prune(self, counts):
+        if len(counts) <= self.capacity:
+            return counts
+        self.exact = False
+        threshold = counts.nlargest(self.capacity + 1).iloc[-1]
+        return counts[counts > threshold] - threshold
+
+    def update(self, values, uniques, counts, first):
+        """`values` is the chunk; uniques / counts / first come from distinct_hashes of its hashes."""
+        if len(counts) > self.capacity:
+            # Reduce the chunk to its own summary first (one partition, no index over every hash)
+            self.exact = False
+            cut = len(counts) - self.capacity - 1
+            threshold = np.partition(counts, cut)[cut]
+            keep = counts > threshold
+            uniques, counts, first = uniques[keep], counts[keep] - threshold, first[keep]
+        new = ~np.isin(uniques, self.counts.index.to_numpy())
+        self.values.update(zip(uniques[new], values.iloc[first[new]]))
+        chunk = pd.Series(counts, index=uniques)
+        merged = self.counts.add(chunk, fill_value=0).astype(np.int64) if len(self.counts) else chunk
+        self.counts = self._prune(merged)
+        if not self.exact:
+            self.values = {h: self.values[h] for h in self.counts.index}
+
+    @property
+    def distinct(self):
+        return len(self.counts)
+
+    def top(self, n=TOP_KEEP):
+        top = self.counts.sort_values(ascending=False, kind="stable").head(n)
+        return pd.Series(top.to_numpy(), index=_labels([self.values[h] for h in top.index]), dtype=np.int64)
+
+
+class CorrelationAccumulator:
+    """
+    Pairwise-complete Pearson correlation (what DataFrame.corr computes) from Gram
+    matrices summed over row blocks: one matrix product per statistic and block
+    instead of a loop over column pairs.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        p = len(self.columns)
+        self.shift = None     # first block's means: keeps the sums small for numerical stability
+        self.n = np.zeros((p, p))
+        self.sx = np.zeros((p, p))     # [i, j]: sum of column i over rows where i and j are present
+        self.sxx = np.zeros((p, p))
+        self.sxy = np.zeros((p, p))
+
+    def update(self, frame, block_values=CORR_BLOCK_VALUES):
+        rows = max(block_values // max(len(self.columns), 1), 1)
+        for start in range(0, len(frame), rows):
+            values = frame.iloc[start:start + rows].to_numpy(dtype=np.float64, na_value=np.nan)
+            present = ~np.isnan(values)
+            if self.shift is None:
+                counts = present.sum(axis=0)
+                self.shift = np.where(counts > 0, np.nansum(values, axis=0) / np.maximum(counts, 1), 0.0)
+            x = np.where(present, values - self.shift, 0.0)
+            m = present.astype(np.float64)
+            self.n += m.T @ m
+            self.sx += x.T @ m
+            self.sxx += (x * x).T @ m
+            self.sxy += x.T @ x
+
+    def result(self):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = self.sxy - self.sx * self.sx.T / self.n
+            var = self.sxx - self.sx ** 2 / self.n
+            corr = np.clip(cov / np.sqrt(var * var.T), -1.0, 1.0)
+        corr[self.n < 2] = np.nan
+        np.fill_diagonal(corr, np.where(np.diag(var) > 0, 1.0, np.nan))
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+
+def correlation_matrix(df):
+    """DataFrame.corr() of the numeric columns, computed with CorrelationAccumulator."""
+    numeric = df.select_dtypes(include=["number"]).columns.tolist()
+    accumulator = CorrelationAccumulator(numeric)
+    accumulator.update(df[numeric])
+    return accumulator.result()
+
+
+def top_correlated_pairs(corr, k=20):
+    """The k column pairs with the largest |correlation| (upper triangle, one vectorized pass)."""
+    values = corr.to_numpy()
+    i, j = np.triu_indices(len(values), k=1)
+    r = values[i, j]
+    keep = ~np.isnan(r)
+    i, j, r = i[keep], j[keep], r[keep]
+    order = np.argsort(-np.abs(r), kind="stable")[:k]
+    return pd.DataFrame({"column A": corr.index[i[order]], "column B": corr.columns[j[order]],
+                         "correlation": r[order]})
+
+
+# ============================================================
+# 🔎 Profile
+# ============================================================
+def date_columns(df, layout=None):
+    """
+    {column: strftime format or None} to bucket by day: datetime columns, sampled
+    timestamp columns (modules/schema_inference.py) and non-numeric columns whose name
+    mentions a date / time (parsed per value, as the EDA page always did).
+    """
+    from modules.schema_inference import infer_layout
+
+    dates = dict((layout or infer_layout(df))["timestamp_columns"])
+    for col in df.columns:
+        if (col not in dates and any(keyword in str(col).lower() for keyword in DATE_KEYWORDS)
+                and not pd.api.types.is_numeric_dtype(df[col])):
+            dates[col] = None
+    return dates
+
+
+def _as_days(values, fmt):
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        values = pd.to_datetime(values, format=fmt, errors="coerce")
+    return values.dt.normalize()
+
+
+def _add(total, part):
+    return part if total is None else total.add(part, fill_value=0)
+
+
+def profile_frame(df, chunk_rows=DEFAULT_CHUNK_ROWS, layout=None):
+    """Profile of `df` (see the module docstring) from one pass over row chunks."""
+    numeric = df.select_dtypes(include=["number"]).columns.tolist()
+    categorical = df.select_dtypes(include=["object", "category"]).columns.tolist()
+    dates = date_columns(df, layout)
+    # Trend values: daily sums of numeric columns, else daily counts of the categorical ones
+    trend_sum, trend_count = (numeric, []) if numeric else ([], categorical)
+
+    correlation = CorrelationAccumulator(numeric)
+    moments = {col: Moments() for col in numeric}
+    sketches = {col: QuantileSketch() for col in numeric}
+    hitters = {col: HeavyHitters() for col in df.columns}
+    hlls = {col: HyperLogLog() for col in df.columns}
+    missing = pd.Series(0, index=df.columns, dtype=np.int64)
+    daily = {col: None for col in dates}
+
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        correlation.update(chunk[numeric])
+        for col in df.columns:
+            values = chunk[col]
+            present = values.notna().to_numpy()
+            if not present.all():
+                missing[col] += len(present) - present.sum()
+                values = values[present]
+            if col in moments:
+                floats = values.to_numpy(dtype=np.float64)
+                moments[col].update(floats)
+                sketches[col].update(floats)
+            uniques, counts, first = distinct_hashes(hash_values(values))
+            hitters[col].update(values, uniques, counts, first)
+            hlls[col].update(uniques)
+        for col, fmt in dates.items():
+            days = _as_days(chunk[col], fmt).rename("Date")
+            grouped = chunk.groupby(days)
+            part = grouped.size().rename("rows").to_frame()
+            if trend_sum:
+                part = part.join(grouped[trend_sum].sum())
+            if trend_count:
+                part = part.join(grouped[trend_count].count())
+            daily[col] = _add(daily[col], part)
+
+    distinct = pd.Series({col: hitters[col].distinct if hitters[col].exact else int(round(hlls[col].estimate()))
+                          for col in df.columns}, dtype=np.int64)
+    if numeric:
+        describe = pd.DataFrame({
+            col: [moments[col].n, moments[col].mean if moments[col].n else np.nan, moments[col].std,
+                  moments[col].min if moments[col].n else np.nan,
+                  *sketches[col].quantiles([0.25, 0.5, 0.75]),
+                  moments[col].max if moments[col].n else np.nan]
+            for col in numeric
+        }, index=["count", "mean", "std", "min", "25%", "50%", "75%", "max"])
+    else:
+        # Like describe() of a frame without numeric columns: count / unique / top / freq
+        describe = {}
+        for col in df.columns:
+            top = hitters[col].top(1)
+            describe[col] = [len(df) - missing[col], distinct[col],
+                             top.index[0] if len(top) else np.nan, top.iloc[0] if len(top) else np.nan]
+        describe = pd.DataFrame(describe, index=["count", "unique", "top", "freq"], dtype=object)
+
+    return {
+        "rows": len(df),
+        "columns": list(df.columns),
+        "numeric": numeric,
+        "categorical": categorical,
+        "dates": list(dates),
+        "missing": missing,
+        "describe": describe,
+        "quantiles_exact": all(sketches[col].exact for col in numeric),
+        "corr": correlation.result(),
+        "distinct": distinct,
+        "distinct_exact": pd.Series({col: hitters[col].exact for col in df.columns}, dtype=bool),
+        "top": {col: hitters[col].top() for col in df.columns},
+        "daily": {col: (frame.sort_index().astype(np.float64) if frame is not None else pd.DataFrame())
+                  for col, frame in daily.items()},
+    }
+
+
+def dataset_profile(df, key=None, chunk_rows=DEFAULT_CHUNK_ROWS, trace=None):
+    """profile_frame memoized per dataset key (e.g. the upload's step-cache key); uncached without one."""
+    if key is None:
+        return profile_frame(df, chunk_rows)
+    from modules.schema_inference import dataset_layout
+    from modules.step_cache import STEP_CACHE
+
+    layout = dataset_layout(df, key, trace=trace)
+    profile, _ = STEP_CACHE.run("eda.profile", key, {"chunk_rows": chunk_rows},
+                                lambda: profile_frame(df, chunk_rows, layout), trace)
+    return profile
@@ -0,0 +1,281 @@
+# ============================================
+# dataset_cache.py
+# ============================================
+"""
+Content-hash cache for uploaded datasets.
+
+Streamlit reruns the whole script on every widget change, and the file uploader
+keeps handing back the same upload, so without a cache every slider move
+re-parses the file. Here an upload is parsed once per distinct content:
+
+    upload bytes → SHA-256 → data_cache/<hash>_<format>.arrow   (Arrow IPC / Feather v2)
+
+Later loads of the same content (in this or any other session, or after a restart)
+memory-map the Arrow file and read only the requested columns. Parquet / Feather
+uploads are accepted natively. Without pyarrow the cache falls back to pickle
+(no column projection or memory mapping). CSVs can optionally be read with
+compact dtypes (modules/csv_ingest.py); their memory report is kept next to the cache.
+The directory is capped at MAX_CACHE_BYTES: storing a new upload evicts the
+least recently used ones (every load refreshes its entry's mtime).
+"""
+
+import os
+import json
+import uuid
+import pickle
+import hashlib
+
+import pandas as pd
+
+from modules.model_versions import atomic_write
+
+CACHE_DIR = "data_cache"
+MAX_CACHE_BYTES = 2 * 1024 ** 3
+_CACHE_EXTENSIONS = (".arrow", ".pkl", ".json")
+
+# Upload extension → parser
+TABULAR_TYPES = {".csv": "csv", ".xlsx": "excel", ".xls": "excel",
+                 ".parquet": "parquet", ".feather": "feather", ".arrow": "feather"}
+TEXT_TYPES = {".csv": "csv", ".json": "jsonl", ".jsonl": "jsonl", ".txt": "lines", ".log": "lines",
+              ".parquet": "parquet", ".feather": "feather", ".arrow": "feather"}
+
+# file_id of a Streamlit upload → content hash, so reruns don't re-hash the same upload
+_UPLOAD_HASHES = {}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.feather  # noqa: F401
+        return pyarrow
+    except ImportError:
+        return None
+
+
+# ============================================================
+# 🔑 Hashing
+# ============================================================
+def content_hash(uploaded_file):
+    """SHA-256 of an uploaded file's bytes (memoized per Streamlit upload id)."""
+    file_id = getattr(uploaded_file, "file_id", None)
+    if file_id is not None and file_id in _UPLOAD_HASHES:
+        return _UPLOAD_HASHES[file_id]
+
+    digest = hashlib.sha256()
+    uploaded_file.seek(0)
+    for block in iter(lambda: uploaded_file.read(1 << 20), b""):
+        digest.update(block)
+    uploaded_file.seek(0)
+    checksum = digest.hexdigest()
+    if file_id is not None:
+        _UPLOAD_HASHES[file_id] = checksum
+    return checksum
+
+
+def upload_format(name, kind="tabular"):
+    """Parser name for an upload, by extension ("tabular" or "text" upload rules)."""
+    types = TABULAR_TYPES if kind == "tabular" else TEXT_TYPES
+    ext = os.path.splitext(name)[1].lower()
+    # Unknown text extensions are read as plain lines, like the original uploader
+    return types.get(ext, "lines" if kind == "text" else "csv")
+
+
+# ============================================================
+# 📥 Parsing
+# ============================================================
+def parse_upload(uploaded_file, fmt):
+    """
+    Parse an upload the way the Dataset page always has (one full read).
+    Returns (df, report); report is the memory report of "csv_optimized", else None.
+    """
+    uploaded_file.seek(0)
+    if fmt == "csv_optimized":
+        from modules.csv_ingest import read_csv_optimized
+        return read_csv_optimized(uploaded_file)
+    return _parse(uploaded_file, fmt), None
+
+
+def _parse(uploaded_file, fmt):
+    if fmt == "csv":
+        return pd.read_csv(uploaded_file)
+    if fmt == "excel":
+        return pd.read_excel(uploaded_file)
+    if fmt == "jsonl":
+        return pd.read_json(uploaded_file, lines=True)
+    if fmt == "parquet":
+        return pd.read_parquet(uploaded_file)
+    if fmt == "feather":
+        return pd.read_feather(uploaded_file)
+    text_data = uploaded_file.read().decode("utf-8", errors="ignore")
+    lines = [line.strip() for line in text_data.splitlines() if line.strip()]
+    return pd.DataFrame({"text": lines})
+
+
+# ============================================================
+# 💾 Cache
+# ============================================================
+def cache_path(checksum, fmt, cache_dir=CACHE_DIR):
+    """Arrow file of a cached upload, or its pickle fallback when that is what exists."""
+    base = os.path.join(cache_dir, f"{checksum[:32]}_{fmt}")
+    if os.path.exists(base + ".arrow"):
+        return base + ".arrow"
+    if os.path.exists(base + ".pkl"):
+        return base + ".pkl"
+    return None
+
+
+def _has_nested_cells(df, sample=1000):
+    """List / dict cells (e.g. JSON transactions) would come back from Arrow as arrays."""
+    return any(
+        df[col].head(sample).map(lambda x: isinstance(x, (list, set, tuple, dict))).any()
+        for col in df.columns if df[col].dtype == object
+    )
+
+
+def _store(df, checksum, fmt, cache_dir, report=None):
+    """Persist a parsed upload. Arrow when possible, pickle for columns Arrow can't type."""
+    base = os.path.join(cache_dir, f"{checksum[:32]}_{fmt}")
+    if report is not None:
+        atomic_write(base + ".json", json.dumps(report, indent=2), mode="w")
+    pa = _pyarrow()
+    if pa is not None and not _has_nested_cells(df):
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            table = None  # e.g. object columns mixing ints and strings
+        if table is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Unique per writer: two sessions storing the same upload must not share it
+            tmp_path = f"{base}.arrow.tmp-{uuid.uuid4().hex[:8]}"
+            try:
+                # Uncompressed so the reload can be memory-mapped without a decode step
+                pa.feather.write_feather(table, tmp_path, compression="uncompressed")
+                os.replace(tmp_path, base + ".arrow")
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            return base + ".arrow"
+    atomic_write(base + ".pkl", pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL))
+    return base + ".pkl"
+
+
+def cached_columns(path):
+    """Column names of a cached upload (reads only the Arrow schema)."""
+    if path.endswith(".arrow") and _pyarrow() is not None:
+        import pyarrow.ipc as ipc
+        import pyarrow as pa
+        with pa.memory_map(path) as source:
+            return ipc.open_file(source).schema.names
+    return list(load_cached(path).columns)
+
+
+def load_cached(path, columns=None):
+    """
+    DataFrame from the cache, reading only `columns` via a memory map. Columns the
+    file doesn't have (a selection made for another upload) are ignored; all are
+    read when none of them exist or `columns` is empty.
+    """
+    if path.endswith(".arrow"):
+        import pyarrow.feather as feather
+        if columns:
+            available = set(cached_columns(path))
+            columns = [col for col in columns if col in available]
+        table = feather.read_table(path, columns=columns or None, memory_map=True)
+        return table.to_pandas()
+    with open(path, "rb") as f:
+        df = pickle.load(f)
+    columns = [col for col in columns or () if col in df.columns]
+    return df[columns] if columns else df
+
+
+def load_upload(uploaded_file, kind="tabular", columns=None, cache_dir=CACHE_DIR, optimize=False):
+    """
+    Parsed DataFrame for a Streamlit upload, parsing each distinct content only once.
+    `optimize=True` reads CSVs with modules/csv_ingest.py (chunked, compact dtypes).
+    Returns (df, info) where info has the content hash, format, cache path, whether
+    this call hit the cache and the ingestion memory report (or None).
+    """
+    fmt = upload_format(uploaded_file.name, kind)
+    if optimize and fmt == "csv":
+        fmt = "csv_optimized"
+    checksum = content_hash(uploaded_file)
+    path = cache_path(checksum, fmt, cache_dir)
+    df = None
+    if path is not None:
+        try:
+            os.utime(path)   # most recently used
+            df = load_cached(path, columns)
+        except FileNotFoundError:
+            path = None      # evicted by another session since the lookup: parse again
+    hit = path is not None
+    if not hit:
+        parsed, report = parse_upload(uploaded_file, fmt)
+        path = _store(parsed, checksum, fmt, cache_dir, report)
+        del parsed
+        prune_cache(cache_dir, keep=path)
+        # Always read back from the cache so first and later loads give identical dtypes
+        df = load_cached(path, columns)
+    report_path = os.path.splitext(path)[0] + ".json"
+    try:
+        with open(report_path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+    except FileNotFoundError:
+        report = None
+    return df, {"hash": checksum, "format": fmt, "path": path, "cache_hit": hit, "report": report}
+
+
+def _cache_entries(cache_dir):
+    """{entry base path: [files]} of the cached uploads (data file + optional memory report)."""
+    entries = {}
+    for name in os.listdir(cache_dir):
+        base, ext = os.path.splitext(name)
+        if ext in _CACHE_EXTENSIONS:
+            entries.setdefault(os.path.join(cache_dir, base), []).append(os.path.join(cache_dir, name))
+    return entries
+
+
+def prune_cache(cache_dir=CACHE_DIR, max_bytes=None, keep=None):
+    """
+    Delete least recently used uploads until the cache fits in `max_bytes`
+    (MAX_CACHE_BYTES by default); the entry of `keep` (a cache path) always stays.
+    Returns the number of uploads removed.
+    """
+    if not os.path.isdir(cache_dir):
+        return 0
+    max_bytes = MAX_CACHE_BYTES if max_bytes is None else max_bytes
+    keep = os.path.splitext(keep)[0] if keep else None
+    entries = []
+    for base, files in _cache_entries(cache_dir).items():
+        try:
+            stats = [os.stat(f) for f in files]
+        except FileNotFoundError:
+            continue   # removed by another session meanwhile
+        entries.append((max(st.st_mtime for st in stats), sum(st.st_size for st in stats), base, files))
+    total = sum(size for _, size, _, _ in entries)
+    removed = 0
+    for _, size, base, files in sorted(entries):
+        if total <= max_bytes:
+            break
+        if base == keep:
+            continue
+        try:
+            for f in files:
+                os.remove(f)
+        except OSError:
+            continue   # still open elsewhere (e.g. memory-mapped on Windows)
+        total -= size
+        removed += 1
+    return removed
+
+
+def clear_cache(cache_dir=CACHE_DIR):
+    """Delete every cached upload; returns the number of files removed."""
+    if not os.path.isdir(cache_dir):
+        return 0
+    removed = 0
+    for name in os.listdir(cache_dir):
+        if name.endswith(_CACHE_EXTENSIONS):
+            os.remove(os.path.join(cache_dir, name))
+            removed += 1
+    return removed
@@ -0,0 +1,129 @@
+# ============================================
+# dataset_store.py
+# ============================================
+"""
+One copy of the data per session.
+
+A session can hold the raw upload and several processed versions of it at once
+(SESSION_DATASETS). The app switches pandas to copy-on-write once at start-up
+(enable_copy_on_write(), top of app.py, before any frame exists):
+
+    base = st.session_state["uploaded_df"]
+    work = working_copy(base)          # new frame, no data copied
+    work["text"] = work["text"].str.lower()   # only this column gets new memory
+
+so every processed frame is the base frame's buffers plus overlays for the
+columns (or rows) a step actually changed, and an accidental in-place write can
+never reach the base. session_memory() follows each column to the buffer it
+lives in and counts every buffer once, so the report shows what the session
+really holds next to what plain copies would have cost.
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Session-state keys holding frames / arrays, base first
+SESSION_DATASETS = ("uploaded_df", "processed_tabular_df", "processed_text_df", "padded_sequences")
+
+# Rows sampled to estimate the string payload of object columns
+_OBJECT_SAMPLE = 1000
+
+
+def enable_copy_on_write():
+    """
+    Process-wide pandas copy-on-write: derived frames share unchanged buffers and the
+    first write to a shared column copies that column only. Call it once at start-up,
+    so every module sees the same semantics whichever page runs first.
+    """
+    pd.set_option("mode.copy_on_write", True)
+
+
+def working_copy(df):
+    """Frame to modify without touching `df`: shares every buffer until a column is written."""
+    return df.copy(deep=False)
+
+
+def _root(array):
+    """Outermost ndarray owning the memory of a view."""
+    while isinstance(array.base, np.ndarray):
+        array = array.base
+    return array
+
+
+def _object_payload(array):
+    """Estimated bytes of the Python objects an object array points to (sampled)."""
+    if array.size == 0:
+        return 0
+    sample = array.ravel()[:: max(array.size // _OBJECT_SAMPLE, 1)]
+    return int(np.mean([sys.getsizeof(x) for x in sample]) * array.size)
+
+
+def _array_buffers(array):
+    root = _root(array)
+    nbytes = root.nbytes + (_object_payload(root) if root.dtype == object else 0)
+    yield root.__array_interface__["data"][0], nbytes
+
+
+def _buffers(value):
+    """(buffer id, bytes) of everything `value` keeps alive; views of one buffer share its id."""
+    if isinstance(value, np.ndarray):
+        yield from _array_buffers(value)
+    elif isinstance(value, pd.DataFrame):
+        if not isinstance(value.index, pd.RangeIndex) and isinstance(value.index.dtype, np.dtype):
+            yield from _array_buffers(value.index.to_numpy())
+        for col in range(value.shape[1]):
+            yield from _buffers(value.iloc[:, col])
+    elif isinstance(value, pd.Series):
+        array = value.array
+        if isinstance(array, pd.Categorical):
+            yield from _array_buffers(array.codes)
+            yield from _array_buffers(array.categories.to_numpy())
+        elif isinstance(value.dtype, np.dtype):
+            yield from _array_buffers(value.to_numpy())
+        else:
+            # Other extension arrays (nullable ints, Arrow strings): counted per array object
+            yield id(array), array.nbytes
+
+
+def session_memory(session, keys=SESSION_DATASETS):
+    """
+    Memory held by the datasets in `session` (a dict-like, e.g. st.session_state).
+    Returns {"datasets": [{key, shape, full_copy_mb, new_mb}], "full_copies_mb", "held_mb"}:
+    full_copy_mb is what the dataset would take on its own, new_mb what it adds on top
+    of the datasets listed before it.
+    """
+    seen = set()
+    rows = []
+    for key in keys:
+        value = session.get(key)
+        if value is None:
+            continue
+        total = new = 0
+        own = set()   # columns of one 2-D block share a buffer
+        for buffer_id, nbytes in _buffers(value):
+            if buffer_id in own:
+                continue
+            own.add(buffer_id)
+            total += nbytes
+            if buffer_id not in seen:
+                seen.add(buffer_id)
+                new += nbytes
+        rows.append({"key": key, "shape": "×".join(map(str, np.shape(value))),
+                     "full_copy_mb": round(total / 1024 ** 2, 2), "new_mb": round(new / 1024 ** 2, 2)})
+    return {"datasets": rows,
+            "full_copies_mb": round(sum(r["full_copy_mb"] for r in rows), 2),
+            "held_mb": round(sum(r["new_mb"] for r in rows), 2)}
+
+
+def show_session_memory(session):
+    """Streamlit expander with session_memory() for the current session."""
+    import streamlit as st
+
+    report = session_memory(session)
+    if not report["datasets"]:
+        return
+    with st.expander(f"🧠 Session memory: {report['held_mb']:,.1f} MB held "
+                     f"({report['full_copies_mb']:,.1f} MB as separate copies)"):
+        st.dataframe(pd.DataFrame(report["datasets"]))
@@ -1,10 +1,72 @@
 # modules/dataset_upload.py
+import os
+
 import streamlit as st
-import pandas as pd
 
 # --- Import preprocessing modules ---
 from modules.preprocess_sequential import preprocess_sequential_ui
 from modules.preprocess_tabular import preprocess_tabular_ui
+from modules.dataset_cache import cached_columns, content_hash, load_upload
+from modules.step_cache import step_key
+from modules.dataset_store import show_session_memory, working_copy
+
+
+def load_uploaded_dataset(uploaded_file, kind, optimize=False):
+    """
+    DataFrame for an upload without re-parsing it on every rerun.
+    The same content and column selection as the last rerun reuses the frame already
+    in session_state; otherwise it comes from the content-hash cache (parsed once,
+    then memory-mapped), projected to the columns picked below.
+    """
+    checksum = content_hash(uploaded_file)
+    previous = st.session_state.get("uploaded_key")
+    if previous is not None and previous[0] != checksum:
+        # New file: the column selection belonged to the previous one
+        st.session_state[f"{kind}_load_columns"] = []
+    columns = st.session_state.get(f"{kind}_load_columns") or None
+    key = (checksum, kind, optimize, tuple(columns or ()))
+    if previous == key and "uploaded_df" in st.session_state:
+        st.caption(f"⚡ Reusing parsed dataset (`{checksum[:12]}`)")
+        return st.session_state["uploaded_df"]
+
+    df, info = load_upload(uploaded_file, kind=kind, columns=columns, optimize=optimize)
+    # A pipeline fitted on the previous data stays available for replay, but is not
+    # saved with a model trained on this data unless it is replayed on it
+    previous_pre = st.session_state.pop("tabular_preprocessor", None)
+    if previous_pre is not None:
+        st.session_state["replay_preprocessor"] = previous_pre
+    source = "cache (memory-mapped)" if info["cache_hit"] else "file (parsed once, now cached)"
+    st.caption(f"📦 Loaded from {source} · `{checksum[:12]}` · {info['format']}")
+
+    st.session_state["uploaded_key"] = key
+    st.session_state["uploaded_cache_path"] = info["path"]
+    st.session_state["ingest_report"] = info["report"]
+    return df
+
+
+def upload_step_key():
+    """Step-cache key of the loaded upload: content hash, parser options and column selection."""
+    return step_key("upload", "load", list(st.session_state["uploaded_key"]))
+
+
+def memory_report_ui():
+    """Memory before (default dtypes) vs after (optimized ingestion) for the loaded dataset."""
+    report = st.session_state.get("ingest_report")
+    if not report:
+        return
+    before, after = report["memory_before_mb"], report["memory_after_mb"]
+    saved = 100 * (1 - after / before) if before else 0.0
+    st.metric("🧮 Memory (default → optimized dtypes)", f"{after:,.1f} MB",
+              delta=f"-{saved:.0f}% vs {before:,.1f} MB", delta_color="inverse")
+    with st.expander(f"Per-column memory ({report['rows']:,} rows, {report['chunks']} chunks)"):
+        st.dataframe(report["columns"])
+
+
+def column_projection_ui(kind):
+    """Optional column subset to load from the cached dataset (Arrow cache only)."""
+    path = st.session_state.get("uploaded_cache_path")
+    if path and path.endswith(".arrow") and os.path.exists(path):   # may have been evicted since
+        st.multiselect("Columns to load (empty = all):", cached_columns(path), key=f"{kind}_load_columns")
 
 def upload_dataset():
     """
@@ -31,18 +93,22 @@ def upload_dataset():
     # 🧩 TABULAR DATA SECTION
     # ------------------------------------------------------------------
     if selected_tab == "Tabular Data":
-        st.subheader("📁 Upload Tabular Data (CSV / Excel)")
+        st.subheader("📁 Upload Tabular Data (CSV / Excel / Parquet / Feather)")
         tab_file = st.file_uploader(
-            "Upload CSV or Excel file",
-            type=["csv", "xlsx", "xls"],
+            "Upload CSV, Excel, Parquet or Feather file",
+            type=["csv", "xlsx", "xls", "parquet", "feather", "arrow"],
             key="tabular_uploader"
         )
 
         if tab_file:
-            if tab_file.name.endswith(".csv"):
-                df = pd.read_csv(tab_file)
-            else:
-                df = pd.read_excel(tab_file)
+            optimize = tab_file.name.lower().endswith(".csv") and st.checkbox(
+                "🗜️ Chunked, memory-optimized CSV ingestion", value=False,
+                help="Categories for repeated strings, downcast numbers, timestamps parsed once."
+            )
+            df = load_uploaded_dataset(tab_file, "tabular", optimize=optimize)
+            column_projection_ui("tabular")
+            if optimize:
+                memory_report_ui()
 
             st.success("✅ Tabular dataset loaded!")
             st.dataframe(df.head())
@@ -51,32 +117,27 @@ def upload_dataset():
             st.session_state["uploaded_df"] = df
             st.session_state["data_type"] = "Tabular Data"
 
-            # --- Preprocess tabular data ---
-            processed_df = preprocess_tabular_ui(df)
+            # --- Preprocess tabular data (on a copy-on-write view: the loaded frame is reused across reruns) ---
+            processed_df = preprocess_tabular_ui(working_copy(df), input_key=upload_step_key())
+            show_session_memory(st.session_state)
             return processed_df
 
     # ------------------------------------------------------------------
     # 📜 SEQUENTIAL / TEXT DATA SECTION
     # ------------------------------------------------------------------
     elif selected_tab == "Sequential/Text Data":
-        st.subheader("📄 Upload Text / Sequential Data (TXT / LOG / JSON / CSV)")
+        st.subheader("📄 Upload Text / Sequential Data (TXT / LOG / JSON / CSV / Parquet / Feather)")
 
         text_file = st.file_uploader(
             "Upload your file",
-            type=["txt", "log", "json", "csv"],
+            type=["txt", "log", "json", "jsonl", "csv", "parquet", "feather", "arrow"],
             key="text_uploader"
         )
 
         if text_file:
-            # --- Load file ---
-            if text_file.name.endswith(".csv"):
-                df = pd.read_csv(text_file)
-            elif text_file.name.endswith(".json"):
-                df = pd.read_json(text_file, lines=True)
-            else:
-                text_data = text_file.read().decode("utf-8", errors="ignore")
-                lines = [line.strip() for line in text_data.splitlines() if line.strip()]
-                df = pd.DataFrame({"text": lines})
+            # --- Load file (parsed once per content, see modules/dataset_cache.py) ---
+            df = load_uploaded_dataset(text_file, "text")
+            column_projection_ui("text")
 
             st.success("✅ Sequential/Text dataset loaded!")
             st.dataframe(df.head())
@@ -87,7 +148,7 @@ def upload_dataset():
 
             # Call preprocessing UI
             from modules.preprocess_sequential import preprocess_sequential_ui
-            processed_df = preprocess_sequential_ui(df)
+            processed_df = preprocess_sequential_ui(working_copy(df), input_key=upload_step_key())
 
             # ✅ Ensure consistent downstream data
             st.session_state["processed_text_df"] = processed_df
@@ -97,4 +158,5 @@ def upload_dataset():
             else:
                 st.warning("⚠️ Complete tokenization before training the LSTM.")
 
+            show_session_memory(st.session_state)
             return processed_df
@@ -4,8 +4,6 @@
 
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 
 def eda_page():
     st.title("📊 Exploratory Data Analysis (EDA)")
@@ -17,47 +15,59 @@ def eda_page():
         st.warning("⚠️ Please upload the dataset first!")
         return
 
-    df = st.session_state["uploaded_df"].copy()
+    # Charts are rendered (and matplotlib / seaborn imported) only on a chart-cache miss
+    from modules.charts import TREND_POINTS, cached_chart, correlation_ui, trend_chart
+    from modules.dataset_store import working_copy
+    from modules.dataset_upload import upload_step_key
+    from modules.data_profile import dataset_profile, exact_top
+
+    df = working_copy(st.session_state["uploaded_df"])
     st.info("Using **Raw Data** for EDA — categorical columns are human-readable.")
 
+    # Every statistic below comes from one chunked pass, cached per dataset;
+    # charts are cached under the same key and their parameters
+    key = upload_step_key() if "uploaded_key" in st.session_state else None
+    with st.spinner("Profiling dataset (once per dataset)..."):
+        profile = dataset_profile(df, key)
+
     # ---------------------------------------------
     # 2️⃣ Dataset Preview
     # ---------------------------------------------
     st.subheader("📄 Dataset Preview")
     st.dataframe(df.head(5))
-    st.write(f"**Shape:** {df.shape[0]} rows × {df.shape[1]} columns")
+    st.write(f"**Shape:** {profile['rows']} rows × {len(profile['columns'])} columns")
+
+    def top_counts(col, n):
+        """Profile counts when exact; after the top-k table overflowed they are lower bounds, so count exactly."""
+        if profile["distinct_exact"][col]:
+            return profile["top"][col].head(n)
+        return exact_top(df[col], n)
 
     # ---------------------------------------------
     # 3️⃣ Statistical Description
     # ---------------------------------------------
     if st.checkbox("📈 Show Statistical Description"):
-        st.dataframe(df.describe())
+        st.dataframe(profile["describe"])
+        if not profile["quantiles_exact"]:
+            st.caption("Quartiles are sketch estimates (rank error well under 1%).")
+        st.dataframe(pd.DataFrame({"missing": profile["missing"], "distinct": profile["distinct"],
+                                   "distinct exact": profile["distinct_exact"]}))
 
     # ---------------------------------------------
     # 4️⃣ Detect Data Types
     # ---------------------------------------------
-    numeric_cols = df.select_dtypes(include=["number"]).columns.tolist()
-    cat_cols = df.select_dtypes(include="object").columns.tolist()
+    numeric_cols = profile["numeric"]
+    cat_cols = profile["categorical"]
 
-    # Auto-detect and convert date/time columns
-    date_cols = []
-    for col in df.columns:
-        if any(keyword in col.lower() for keyword in ["date", "time", "timestamp"]):
-            try:
-                df[col] = pd.to_datetime(df[col], errors="coerce")
-                if df[col].notna().sum() > 0:
-                    date_cols.append(col)
-            except Exception:
-                pass
+    # Date/time columns with at least one parsed timestamp (bucketed by day in the profile)
+    date_cols = [col for col in profile["dates"] if not profile["daily"][col].empty]
 
     # ---------------------------------------------
     # 5️⃣ Correlation Heatmap
     # ---------------------------------------------
     if len(numeric_cols) > 1:
         st.subheader("🔗 Correlation Heatmap")
-        fig, ax = plt.subplots(figsize=(8, 6))
-        sns.heatmap(df[numeric_cols].corr(), annot=True, cmap="coolwarm", fmt=".2f", ax=ax)
-        st.pyplot(fig)
+        correlation_ui(profile["corr"], key)
 
     # ---------------------------------------------
     # 7️⃣ Line Chart (Trend Over Time - Fixed)
@@ -71,20 +81,12 @@ def eda_page():
         if possible_y_cols:
             y_col = st.selectbox("Select column to analyze trend:", possible_y_cols)
 
-            # Aggregate daily counts or sums
-            if y_col in numeric_cols:
-                df_trend = df.groupby(df[date_col].dt.date)[y_col].sum().reset_index()
-            else:
-                df_trend = df.groupby(df[date_col].dt.date)[y_col].count().reset_index()
-
-            df_trend.rename(columns={date_col: "Date", y_col: "Value"}, inplace=True)
-            fig, ax = plt.subplots()
-            ax.plot(df_trend["Date"], df_trend["Value"], marker="o", color="orange")
-            ax.set_title(f"{y_col} Trend Over Time ({date_col})")
-            ax.set_xlabel("Date")
-            ax.set_ylabel("Value Count")
-            plt.xticks(rotation=45)
-            st.pyplot(fig)
+            # Daily sums (numeric) or non-null counts (categorical), from the profile
+            trend = profile["daily"][date_col][y_col]
+            st.image(trend_chart(trend, f"{y_col} Trend Over Time ({date_col})", key,
+                                 {"date_col": date_col, "y_col": y_col}))
+            if len(trend) > TREND_POINTS:
+                st.caption(f"{len(trend):,} daily points, downsampled (LTTB) to screen resolution.")
         else:
             st.info("No valid columns to plot trend.")
     else:
@@ -97,12 +99,19 @@ def eda_page():
         st.subheader("🏆 Most Frequent Categorical Values")
         selected_cat = st.selectbox("Select column for bar chart:", cat_cols)
         top_n = st.slider("Select top N categories:", 5, 20, 10)
-        top_items = df[selected_cat].value_counts().head(top_n)
 
-        fig, ax = plt.subplots()
-        sns.barplot(x=top_items.values, y=top_items.index, ax=ax, palette="mako")
-        ax.set_title(f"Top {top_n} {selected_cat} Categories")
-        st.pyplot(fig)
+        def bar_chart():
+            import matplotlib.pyplot as plt
+            import seaborn as sns
+
+            # Exact counts are recomputed (if needed) only on a chart-cache miss
+            top_items = top_counts(selected_cat, top_n)
+            fig, ax = plt.subplots()
+            sns.barplot(x=top_items.values, y=top_items.index.astype(str), ax=ax, palette="mako")
+            ax.set_title(f"Top {top_n} {selected_cat} Categories")
+            return fig
+
+        st.image(cached_chart("top_bar", key, {"column": selected_cat, "top_n": top_n}, bar_chart))
 
     # ---------------------------------------------
     # 9️⃣ Pie Chart
@@ -110,12 +119,17 @@ def eda_page():
     if cat_cols:
         st.subheader("🥧 Category Percentage Share")
         selected_pie_col = st.selectbox("Select column for Pie Chart:", cat_cols)
-        top_values = df[selected_pie_col].value_counts().head(10)
 
-        fig, ax = plt.subplots()
-        ax.pie(top_values.values, labels=top_values.index, autopct="%1.1f%%", startangle=90)
-        ax.axis("equal")
-        ax.set_title(f"Top 10 {selected_pie_col} - Percentage Share")
-        st.pyplot(fig)
+        def pie_chart():
+            import matplotlib.pyplot as plt
+
+            top_values = top_counts(selected_pie_col, 10)
+            fig, ax = plt.subplots()
+            ax.pie(top_values.values, labels=top_values.index.astype(str), autopct="%1.1f%%", startangle=90)
+            ax.axis("equal")
+            ax.set_title(f"Top 10 {selected_pie_col} - Percentage Share")
+            return fig
+
+        st.image(cached_chart("top_pie", key, {"column": selected_pie_col}, pie_chart))
 
     st.success("✅ EDA Visualizations Completed Successfully!")
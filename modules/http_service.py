@@ -0,0 +1,340 @@
+# ============================================
+# http_service.py
+# ============================================
+"""
+Headless recommendation service (no Streamlit).
+
+Endpoints (JSON in / JSON out):
+    GET  /health               → loaded models and their versions
+    GET  /metrics              → result cache and sentiment micro-batcher counters
+    POST /recommend/basket     {"items": [...], "top_n": 5, "algorithm": "Apriori"}
+    POST /recommend/next       {"items": [...], "top_n": 5}
+    POST /sentiment            {"text": "..."}
+
+Models come from the shared model registry, so they are loaded once per process
+and hot-swapped when a new version is published. Concurrent /sentiment requests
+are coalesced by a micro-batcher into one LSTM forward pass; with a fast-path
+threshold set, confident inputs are answered by a hashed n-gram model instead.
+"""
+
+import os
+import json
+import time
+import asyncio
+import multiprocessing
+from collections import Counter
+
+from modules.model_registry import (
+    available_model_types,
+    get_shared_model,
+    model_checksum,
+    model_version,
+    resolve_artifact,
+    start_hot_swap,
+)
+from modules.micro_batcher import SentimentMicroBatcher
+from modules.ngram_fast_path import hybrid_predict
+from modules.recommend_utils import predict_sentiment, predict_sentiment_batch
+from modules.result_cache import RESULT_CACHE, cached_recommend_from_patterns, cached_recommend_from_rules
+
+MAX_BODY_BYTES = 1 << 20
+MAX_TOP_N = 100
+RULE_MODELS = ["Apriori", "FP-Growth"]
+
+# Per-process sentiment micro-batcher, created by serve()
+_BATCHER = None
+# Margin above which the hashed n-gram model answers /sentiment itself (None = LSTM only)
+_FAST_PATH_THRESHOLD = None
+_SENTIMENT_SOURCES = Counter()
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# ============================================================
+# 🔌 Handlers (plain functions — run in the default executor)
+# ============================================================
+def _items(payload):
+    items = payload.get("items")
+    if isinstance(items, str):
+        items = [i.strip() for i in items.split(",")]
+    if not isinstance(items, list) or not [i for i in items if str(i).strip()]:
+        raise HTTPError(400, "'items' must be a non-empty list (or comma separated string).")
+    return [str(i).strip() for i in items if str(i).strip()]
+
+
+def _top_n(payload):
+    top_n = payload.get("top_n", 5)
+    if isinstance(top_n, str) and top_n.strip().isdigit():
+        top_n = int(top_n)
+    if isinstance(top_n, bool) or not isinstance(top_n, int) or not 1 <= top_n <= MAX_TOP_N:
+        raise HTTPError(400, f"'top_n' must be an integer between 1 and {MAX_TOP_N}.")
+    return top_n
+
+
+def _require(model_type):
+    model = get_shared_model(model_type)
+    if model is None:
+        raise HTTPError(503, f"No trained '{model_type}' model available.")
+    return model
+
+
+def handle_basket(payload):
+    algorithm = payload.get("algorithm") or next(
+        (t for t in RULE_MODELS if t in available_model_types()), "Apriori"
+    )
+    if algorithm not in RULE_MODELS:
+        raise HTTPError(400, f"'algorithm' must be one of {RULE_MODELS}.")
+    items = _items(payload)
+    top_n = _top_n(payload)
+    model = _require(algorithm)
+    recommendations = cached_recommend_from_rules(items, model, algorithm, model_checksum(algorithm))[:top_n]
+    return {"algorithm": algorithm, "version": model_version(algorithm),
+            "items": items, "recommendations": recommendations}
+
+
+def handle_next(payload):
+    model_type = "Sequential Pattern Matching"
+    items = _items(payload)
+    top_n = _top_n(payload)
+    model = _require(model_type)
+    result = cached_recommend_from_patterns(items, model, model_checksum(model_type), top_n=top_n)
+    if result and str(result[0]).startswith("⚠️"):
+        return {"version": model_version(model_type), "items": items,
+                "recommendations": [], "message": result[0]}
+    return {"version": model_version(model_type), "items": items, "recommendations": result}
+
+
+def _sentiment_pipeline():
+    """End-to-end model (in-graph tokenization) when saved, else LSTM + tokenizer."""
+    end_to_end = get_shared_model("LSTM End-to-End")
+    if end_to_end is not None:
+        return end_to_end, None
+    return _require("LSTM (Sentiment Analysis)"), _require("LSTM Tokenizer")
+
+
+def _score_texts(texts):
+    """
+    One batched pass; runs on the micro-batcher's inference thread. Returns
+    (label, score, source) — confident inputs are answered by the n-gram fast path
+    when enabled, the rest go through one LSTM forward pass.
+    """
+    model, tokenizer = _sentiment_pipeline()
+
+    def lstm(batch):
+        return list(predict_sentiment_batch(
+            batch, model, tokenizer,
+            encoder_path=resolve_artifact("LSTM Encoder"), batch_size=max(len(batch), 1),
+        ))
+
+    ngram = get_shared_model("LSTM N-gram") if _FAST_PATH_THRESHOLD is not None else None
+    if ngram is None:
+        results = [(label, score, "lstm") for label, score in lstm(texts)]
+    else:
+        results = hybrid_predict(texts, ngram, lstm, _FAST_PATH_THRESHOLD,
+                                 encoder=get_shared_model("LSTM Encoder"))
+    _SENTIMENT_SOURCES.update(source for _, _, source in results)
+    return results
+
+
+async def handle_sentiment(payload):
+    model_type = "LSTM (Sentiment Analysis)"
+    text = payload.get("text")
+    if not isinstance(text, str) or not text.strip():
+        raise HTTPError(400, "'text' must be a non-empty string.")
+
+    if _BATCHER is None:
+        timings = {}
+        label, score = await asyncio.get_running_loop().run_in_executor(None, lambda: predict_sentiment(
+            text, *_sentiment_pipeline(),
+            encoder_path=resolve_artifact("LSTM Encoder"), timings=timings,
+        ))
+        return {"version": model_version(model_type), "label": label, "score": score,
+                "source": "lstm", "timings_ms": timings}
+
+    label, score, source = await _BATCHER.predict(text)
+    return {"version": model_version(model_type), "label": label, "score": score, "source": source}
+
+
+def handle_health(_payload):
+    return {
+        "status": "ok",
+        "pid": os.getpid(),
+        "models": {t: model_version(t) for t in available_model_types()},
+    }
+
+
+def handle_metrics(_payload):
+    return {
+        "result_cache": RESULT_CACHE.stats(),
+        "sentiment_batcher": _BATCHER.stats() if _BATCHER is not None else None,
+        "sentiment_fast_path": {"threshold": _FAST_PATH_THRESHOLD, "answered_by": dict(_SENTIMENT_SOURCES)},
+    }
+
+
+ROUTES = {
+    ("GET", "/health"): handle_health,
+    ("GET", "/metrics"): handle_metrics,
+    ("POST", "/recommend/basket"): handle_basket,
+    ("POST", "/recommend/next"): handle_next,
+    ("POST", "/sentiment"): handle_sentiment,
+}
+
+
+# ============================================================
+# 🌐 Minimal HTTP/1.1 over asyncio streams (keep-alive)
+# ============================================================
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large",
+            500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+def _response(status, body, keep_alive):
+    data = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(data)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + data
+
+
+async def _read_request(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    method, target, version = lines[0].split(" ", 2)
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length", 0))
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, "Request body too large.")
+    body = await reader.readexactly(length) if length else b""
+
+    keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+    return method.upper(), target.split("?", 1)[0], body, keep_alive
+
+
+async def _handle_connection(reader, writer):
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            try:
+                method, path, body, keep_alive = await _read_request(reader)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            except HTTPError as e:
+                writer.write(_response(e.status, {"error": e.message}, False))
+                break
+            except (ValueError, asyncio.LimitOverrunError):
+                writer.write(_response(400, {"error": "Malformed request."}, False))
+                break
+
+            handler = ROUTES.get((method, path))
+            try:
+                if handler is None:
+                    raise HTTPError(404, f"No route for {method} {path}.")
+                payload = json.loads(body) if body else {}
+                if not isinstance(payload, dict):
+                    raise HTTPError(400, "Request body must be a JSON object.")
+                if asyncio.iscoroutinefunction(handler):
+                    result = await handler(payload)
+                else:
+                    result = await loop.run_in_executor(None, handler, payload)
+                status = 200
+            except HTTPError as e:
+                status, result = e.status, {"error": e.message}
+            except json.JSONDecodeError:
+                status, result = 400, {"error": "Request body is not valid JSON."}
+            except Exception as e:
+                status, result = 500, {"error": str(e)}
+
+            writer.write(_response(status, result, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    finally:
+        writer.close()
+
+
+# ============================================================
+# 🚀 Entry points
+# ============================================================
+def warm_models():
+    """Load every trained model into the shared registry before accepting traffic."""
+    started = time.perf_counter()
+    for model_type in available_model_types():
+        get_shared_model(model_type)
+    if "LSTM (Sentiment Analysis)" in available_model_types():
+        get_shared_model("LSTM Tokenizer")
+        get_shared_model("LSTM Encoder")
+        get_shared_model("LSTM End-to-End")
+        get_shared_model("LSTM N-gram")
+    return time.perf_counter() - started
+
+
+async def serve(host="127.0.0.1", port=8000, reuse_port=False, max_batch=64, max_wait_ms=5.0,
+                fast_path_threshold=None):
+    global _BATCHER, _FAST_PATH_THRESHOLD
+    _FAST_PATH_THRESHOLD = fast_path_threshold
+    _BATCHER = await SentimentMicroBatcher(_score_texts, max_batch, max_wait_ms).start()
+    server = await asyncio.start_server(_handle_connection, host, port, reuse_port=reuse_port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await _BATCHER.stop()
+        _BATCHER = None
+
+
+def run_worker(host, port, reuse_port=False, hot_swap_interval=2.0, max_batch=64, max_wait_ms=5.0,
+               fast_path_threshold=None):
+    """Single serving process: warm models, start hot-swap watcher, serve forever."""
+    elapsed = warm_models()
+    start_hot_swap(hot_swap_interval)
+    print(f"✅ Worker {os.getpid()} ready on http://{host}:{port} (models loaded in {elapsed:.2f}s)")
+    try:
+        asyncio.run(serve(host, port, reuse_port, max_batch, max_wait_ms, fast_path_threshold))
+    except KeyboardInterrupt:
+        pass
+
+
+def run_server(host="127.0.0.1", port=8000, workers=1, hot_swap_interval=2.0, max_batch=64, max_wait_ms=5.0,
+               fast_path_threshold=None):
+    """
+    Run the service. With workers > 1 each process binds the same port with
+    SO_REUSEPORT and the kernel spreads connections across them (Linux/BSD only).
+    `max_batch` / `max_wait_ms` configure the sentiment micro-batcher; `fast_path_threshold`
+    enables the hashed n-gram fast path for confident /sentiment inputs.
+    """
+    if workers <= 1:
+        run_worker(host, port, False, hot_swap_interval, max_batch, max_wait_ms, fast_path_threshold)
+        return
+
+    import socket
+    if not hasattr(socket, "SO_REUSEPORT"):
+        raise RuntimeError("❌ Worker-pool mode needs SO_REUSEPORT; run with --workers 1 on this platform.")
+
+    processes = [
+        multiprocessing.Process(
+            target=run_worker,
+            args=(host, port, True, hot_swap_interval, max_batch, max_wait_ms, fast_path_threshold),
+            daemon=True,
+        )
+        for _ in range(workers)
+    ]
+    for p in processes:
+        p.start()
+    try:
+        for p in processes:
+            p.join()
+    except KeyboardInterrupt:
+        for p in processes:
+            p.terminate()
@@ -0,0 +1,153 @@
+# ============================================
+# micro_batcher.py
+# ============================================
+"""
+Asyncio micro-batcher for the sentiment LSTM.
+
+Concurrent callers `await batcher.predict(text)`. Requests are gathered for up to
+`max_wait_ms` or until `max_batch` are queued, then scored with ONE batched
+forward pass on a dedicated inference thread, and each caller's future is
+resolved with its own (label, score).
+"""
+
+import time
+import asyncio
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _bucket(n):
+    """Histogram bucket: smallest power of two >= n (1, 2, 4, 8, ...)."""
+    size = 1
+    while size < n:
+        size *= 2
+    return size
+
+
+class SentimentMicroBatcher:
+    def __init__(self, predict_batch_fn, max_batch=64, max_wait_ms=5.0):
+        """
+        predict_batch_fn(list_of_texts) -> list of (label, score), same order.
+        """
+        self.predict_batch_fn = predict_batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = None
+        self._task = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lstm-inference")
+
+        self.requests = 0
+        self.batches = 0
+        self.batch_size_hist = Counter()
+        self.queue_depth_hist = Counter()
+        self.inference_seconds = 0.0
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+    async def start(self):
+        """Start the collector, or restart it if it died (requests already queued are kept)."""
+        if self._task is None or self._task.done():
+            if self._queue is None:
+                self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+        return self
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            except Exception:
+                pass   # the collector had already died; nothing left to wait for
+            self._task = None
+        self._queue = None
+        self._executor.shutdown(wait=False)
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    async def predict(self, text):
+        if self._task is None or self._task.done():
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        self.queue_depth_hist[_bucket(self._queue.qsize() + 1)] += 1
+        await self._queue.put((text, future))
+        return await future
+
+    def stats(self):
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "avg_inference_ms": round(self.inference_seconds / self.batches * 1000, 3) if self.batches else 0.0,
+            "batch_size_histogram": {f"<={k}": v for k, v in sorted(self.batch_size_hist.items())},
+            "queue_depth_histogram": {f"<={k}": v for k, v in sorted(self.queue_depth_hist.items())},
+        }
+
+    # -----------------------------
+    # Collector loop
+    # -----------------------------
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            # Drain whatever is already queued without waiting
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            remaining = deadline - loop.time()
+            if len(batch) >= self.max_batch or remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Callers that gave up (cancelled) don't need a forward pass
+            batch = [(text, fut) for text, fut in batch if not fut.done()]
+            if not batch:
+                continue
+
+            try:
+                await self._score(loop, batch)
+            except Exception as e:
+                # Whatever went wrong, no caller of this batch may be left waiting
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+
+    async def _score(self, loop, batch):
+        """One forward pass for `batch` and its fan-out to the callers' futures."""
+        texts = [text for text, _ in batch]
+        started = time.perf_counter()
+        try:
+            results = list(await loop.run_in_executor(self._executor, self.predict_batch_fn, texts))
+            if len(results) != len(texts):
+                raise RuntimeError(f"Batch predictor returned {len(results)} results for {len(texts)} texts.")
+            error = None
+        except Exception as e:
+            results, error = None, e
+        self.inference_seconds += time.perf_counter() - started
+
+        self.requests += len(batch)
+        self.batches += 1
+        self.batch_size_hist[_bucket(len(batch))] += 1
+
+        for i, (_, fut) in enumerate(batch):
+            if fut.done():
+                continue
+            if error is not None:
+                fut.set_exception(error)
+            else:
+                fut.set_result(results[i])
@@ -9,7 +9,68 @@ from modules import train_sequential
 from modules.train_apriori import train_apriori
 from modules.train_fp_growth import train_fp_growth
 from modules.train_sequential import train_sequential
-from modules.train_lstm_sentiment import train_lstm_sentiment
+from modules.model_registry import available_model_types, get_shared_model, publish_model, registry_memory_report
+
+
+def _register_lstm(model, tokenizer, model_path):
+    """Share a freshly trained / fine-tuned LSTM with every session."""
+    publish_model("LSTM (Sentiment Analysis)", model, model_path)
+    publish_model("LSTM Tokenizer", tokenizer)
+    st.session_state["tokenizer"] = tokenizer
+    st.session_state["model_type"] = "LSTM (Sentiment Analysis)"
+    st.session_state["model_path"] = model_path
+
+
+def _train_lstm_from_files_ui():
+    """Train the LSTM straight from CSV / JSONL / TXT files on disk (never loaded whole)."""
+    from modules.train_lstm_sentiment import train_lstm_sentiment_from_files
+
+    paths_text = st.text_area("Training files (one path per line):",
+                              help="CSV / JSONL with text and label columns, or TXT lines of `label<TAB>text`.")
+    paths = [line.strip() for line in paths_text.splitlines() if line.strip()]
+    text_col = st.text_input("Text column / field:", "text")
+    label_col = st.text_input("Label column / field:", "label")
+    embedding_dim = st.number_input("Embedding Dimension:", 16, 256, 64, key="files_embedding_dim")
+    lstm_units = st.number_input("LSTM Units:", 16, 256, 64, key="files_lstm_units")
+    epochs = st.number_input("Training Epochs:", 1, 50, 5, key="files_epochs")
+    batch_size = st.select_slider("Batch size:", [32, 64, 128, 256, 512], value=32, key="files_batch_size")
+    cache_path = st.text_input("On-disk tf.data cache prefix (optional):", "",
+                               help="Tokenized rows are cached here after the first epoch; empty = re-read the files.")
+
+    if st.button("🚀 Train LSTM from Files", disabled=not paths):
+        missing = [p for p in paths if not os.path.isfile(p)]
+        if missing:
+            st.error(f"❌ File(s) not found: {', '.join(missing)}")
+            return
+        with st.spinner("Streaming files through the LSTM trainer..."):
+            try:
+                model, tokenizer, model_path = train_lstm_sentiment_from_files(
+                    paths,
+                    text_col=text_col,
+                    label_col=label_col,
+                    embedding_dim=embedding_dim,
+                    lstm_units=lstm_units,
+                    epochs=epochs,
+                    batch_size=batch_size,
+                    cache=cache_path or None,
+                )
+            except (ValueError, KeyError) as e:
+                st.error(f"❌ {e}")
+                return
+            _register_lstm(model, tokenizer, model_path)
+            st.success(f"✅ LSTM model trained from {len(paths)} file(s)! Saved at {model_path}")
+
+
+def show_shared_model_memory():
+    """Expander listing the models shared by all sessions in this process."""
+    with st.expander("🧮 Shared Model Memory"):
+        report = registry_memory_report()
+        if not report:
+            st.info("No models loaded in this process yet.")
+            return
+        report_df = pd.DataFrame(report)
+        st.dataframe(report_df)
+        st.write(f"**Total:** {report_df['Memory (MB)'].sum():.2f} MB (shared across all sessions)")
 
 
 def model_page():
@@ -55,8 +116,9 @@ def model_page():
 
         if st.button("🚀 Train Apriori Model"):
             with st.spinner("Training Apriori model..."):
-                rules, path = train_apriori(df, min_support, min_confidence)
-                st.session_state["trained_model"] = rules
+                rules, path = train_apriori(df, min_support, min_confidence,
+                                            preprocessor=st.session_state.get("tabular_preprocessor"))
+                publish_model("Apriori", rules, path)
                 st.session_state["model_type"] = "Apriori"
                 st.success(f"✅ Apriori model trained successfully! Saved at {path}")
                 st.dataframe(rules.head())
@@ -70,8 +132,9 @@ def model_page():
 
         if st.button("🚀 Train FP-Growth Model"):
             with st.spinner("Training FP-Growth model..."):
-                rules, path = train_fp_growth(df, min_support, min_confidence)
-                st.session_state["trained_model"] = rules
+                rules, path = train_fp_growth(df, min_support, min_confidence,
+                                              preprocessor=st.session_state.get("tabular_preprocessor"))
+                publish_model("FP-Growth", rules, path)
                 st.session_state["model_type"] = "FP-Growth"
                 st.success(f"✅ FP-Growth model trained successfully! Saved at {path}")
                 st.dataframe(rules.head())
@@ -84,17 +147,28 @@ def model_page():
             st.warning("⚠️ Please upload and preprocess data first on the Dataset page.")
             return
 
+        from modules.dataset_upload import upload_step_key
+        from modules.schema_inference import dataset_layout
+
         df = st.session_state["uploaded_df"]
-        session_col = st.selectbox("Select Session/User Column:", df.columns)
-        time_col = st.selectbox("Select Timestamp Column:", df.columns)
-        item_col = st.selectbox("Select Item Column:", df.columns)
+        layout = dataset_layout(df, upload_step_key() if "uploaded_key" in st.session_state else None)
+        columns = list(df.columns)
+
+        def _default(candidates):
+            return columns.index(candidates[0]) if candidates else 0
+
+        session_col = st.selectbox("Select Session/User Column:", columns, index=_default(layout["id_columns"]))
+        time_col = st.selectbox("Select Timestamp Column:", columns, index=_default(list(layout["timestamp_columns"])))
+        item_col = st.selectbox("Select Item Column:", columns,
+                                index=_default([layout["item_column"]] if layout["item_column"] else []))
         order = st.number_input("Order (e.g. 1 for next-item):", min_value=1, max_value=5, value=1)
         min_support = st.number_input("Minimum Support:", min_value=1, max_value=10, value=1)
 
         if st.button("🚀 Train Sequential Pattern Model"):
             with st.spinner("Training Sequential Pattern model..."):
-                model, model_path, json_path = train_sequential(df, session_col, time_col, item_col, order, min_support)
-                st.session_state["trained_model"] = model
+                model, model_path, json_path = train_sequential(df, session_col, time_col, item_col, order, min_support,
+                                                                   layout=layout)
+                publish_model("Sequential Pattern Matching", model, json_path)
                 st.session_state["model_type"] = "Sequential Pattern Matching"
                 st.session_state["json_path"] = json_path
 
@@ -107,6 +181,19 @@ def model_page():
     # LSTM (Sentiment Analysis)
     # ------------------------------------------------------------
     elif algo == "LSTM (Sentiment Analysis)":
+        # TensorFlow is only imported once the LSTM is picked
+        from modules.train_lstm_sentiment import (
+            configure_cpu_threads,
+            finetune_lstm_sentiment,
+            train_lstm_sentiment,
+            train_lstm_sentiment_bucketed,
+        )
+
+        data_source = st.radio("Training data:", ["Preprocessed dataset", "Files on disk (streaming)"],
+                               horizontal=True)
+        if data_source == "Files on disk (streaming)":
+            _train_lstm_from_files_ui()
+            return
         if "processed_text_df" not in st.session_state:
             st.warning("⚠️ Please preprocess text data first on the Dataset page.")
             return
@@ -116,28 +203,88 @@ def model_page():
         text_col = st.selectbox("Select Text Column:", df.columns)
         label_col = st.selectbox("Select Label Column:", df.columns)
 
-        embedding_dim = st.number_input("Embedding Dimension:", 16, 256, 64)
-        lstm_units = st.number_input("LSTM Units:", 16, 256, 64)
-        epochs = st.number_input("Training Epochs:", 1, 50, 5)
+        finetune = "LSTM (Sentiment Analysis)" in available_model_types() and st.checkbox(
+            "🔁 Fine-tune the current model on this data (warm start)", value=False
+        )
+        if finetune:
+            epochs = st.number_input("Fine-tuning Epochs:", 1, 20, 2)
+            replay_ratio = st.slider("Replay ratio (previous rows per new row):", 0.0, 3.0, 1.0, step=0.25)
+            grow_vocab = st.checkbox("➕ Add frequent new words to the vocabulary", value=False)
 
-        if st.button("🚀 Train LSTM Model"):
-            with st.spinner("Training LSTM sentiment model..."):
-                model, tokenizer, model_path = train_lstm_sentiment(
-                    df,
-                    text_col=text_col,
-                    label_col=label_col,
-                    embedding_dim=embedding_dim,
-                    lstm_units=lstm_units,
-                    epochs=epochs,
-                )
+            if st.button("🔁 Fine-tune LSTM Model"):
+                with st.spinner("Fine-tuning the current LSTM model..."):
+                    model, tokenizer, model_path = finetune_lstm_sentiment(
+                        df,
+                        text_col=text_col,
+                        label_col=label_col,
+                        epochs=epochs,
+                        replay_ratio=replay_ratio,
+                        grow_vocab=grow_vocab,
+                    )
+                    _register_lstm(model, tokenizer, model_path)
+                    st.success(f"✅ LSTM model fine-tuned and published as a new version! Saved at {model_path}")
+
+        else:
+            embedding_dim = st.number_input("Embedding Dimension:", 16, 256, 64)
+            lstm_units = st.number_input("LSTM Units:", 16, 256, 64)
+            epochs = st.number_input("Training Epochs:", 1, 50, 5)
+            pipeline = st.radio(
+                "Input pipeline:",
+                ["In-memory (fixed padding)", "tf.data (length-bucketed, dynamic padding)"],
+                horizontal=True,
+            )
+            fast_mode = st.checkbox("⚡ Fast CPU training mode", value=False,
+                                    help="No recurrent dropout (fused kernel), optional GRU, "
+                                         "larger batches with a scaled learning rate.")
+            cell, batch_size, intra_threads, inter_threads = "LSTM", 32, 0, 0
+            if fast_mode:
+                cell = st.radio("Recurrent cell:", ["LSTM", "GRU"], horizontal=True)
+                batch_size = st.select_slider("Batch size:", [32, 64, 128, 256, 512], value=256)
+                intra_threads = st.number_input("Intra-op threads (0 = auto):", 0, 256, 0)
+                inter_threads = st.number_input("Inter-op threads (0 = auto):", 0, 64, 0)
+            reuse_tokenizer = "tokenizer" in st.session_state and st.checkbox(
+                "🔡 Reuse tokenizer from preprocessing", value=True
+            )
+            export_lite = st.checkbox("📦 Export quantized TFLite model", value=False)
+            quantization = st.radio("Quantization:", ["dynamic", "int8"], horizontal=True) if export_lite else None
+
+            if st.button("🚀 Train LSTM Model"):
+                if (intra_threads or inter_threads) and not configure_cpu_threads(intra_threads, inter_threads):
+                    st.warning("⚠️ TensorFlow is already running in this process, so thread pools can't be "
+                               "resized now. Set TF_NUM_INTRAOP_THREADS / TF_NUM_INTEROP_THREADS before "
+                               "starting the app instead.")
+                with st.spinner("Training LSTM sentiment model..."):
+                    trainer = train_lstm_sentiment if pipeline.startswith("In-memory") else train_lstm_sentiment_bucketed
+                    model, tokenizer, model_path = trainer(
+                        df,
+                        text_col=text_col,
+                        label_col=label_col,
+                        embedding_dim=embedding_dim,
+                        lstm_units=lstm_units,
+                        epochs=epochs,
+                        tokenizer=st.session_state["tokenizer"] if reuse_tokenizer else None,
+                        fast=fast_mode,
+                        cell=cell,
+                        batch_size=batch_size,
+                    )
+
+                    _register_lstm(model, tokenizer, model_path)
 
-                st.session_state["trained_model"] = model
-                st.session_state["tokenizer"] = tokenizer
-                st.session_state["model_type"] = "LSTM (Sentiment Analysis)"
-                st.session_state["model_path"] = model_path
+                    st.success(f"✅ LSTM model trained successfully! Saved at {model_path}")
 
-                st.success(f"✅ LSTM model trained successfully! Saved at {model_path}")
+                if export_lite:
+                    from modules.tflite_export import export_tflite
+                    with st.spinner(f"Converting to TFLite ({quantization})..."):
+                        lite_path, _, size = export_tflite(
+                            model, tokenizer, get_shared_model("LSTM Encoder"),
+                            quantization=quantization,
+                            representative_texts=df[text_col].astype(str).tolist(),
+                        )
+                    h5_size = os.path.getsize(model_path)
+                    st.success(f"📦 TFLite model saved at {lite_path} "
+                               f"({size / 1024:.0f} KB vs {h5_size / 1024:.0f} KB .h5)")
 
     # ------------------------------------------------------------
     st.markdown("---")
+    show_shared_model_memory()
     st.info("✅ Once training is complete, go to the **Recommendation Page** for predictions.")
@@ -0,0 +1,263 @@
+# ============================================
+# model_registry.py
+# ============================================
+
+import os
+import sys
+import json
+import pickle
+import hashlib
+import threading
+from datetime import datetime
+from modules.model_versions import ManifestWatcher, current_artifact, current_version
+
+
+# -----------------------------
+# Default artifact locations (written by the train_* modules)
+# -----------------------------
+MODEL_ARTIFACTS = {
+    "Apriori": "models/apriori_model.pkl",
+    "FP-Growth": "models/fpgrowth_model.pkl",
+    "Sequential Pattern Matching": "models/sequential_model_readable.json",
+    "LSTM (Sentiment Analysis)": "models/lstm_model.h5",
+    "LSTM Tokenizer": "models/lstm_tokenizer.pkl",
+    "LSTM Encoder": "models/lstm_encoder.pkl",
+    "LSTM End-to-End": "models/lstm_end_to_end.keras",
+    "LSTM N-gram": "models/lstm_ngram.pkl",
+}
+# Companion artifacts of the LSTM, not selectable models on their own
+_COMPANIONS = {"LSTM Tokenizer", "LSTM Encoder", "LSTM End-to-End", "LSTM N-gram"}
+
+# Where each model type lives inside a published registry version
+VERSIONED_ARTIFACTS = {
+    "Apriori": ("Apriori", "model"),
+    "FP-Growth": ("FP-Growth", "model"),
+    "Sequential Pattern Matching": ("Sequential Pattern Matching", "readable"),
+    "LSTM (Sentiment Analysis)": ("LSTM (Sentiment Analysis)", "model"),
+    "LSTM Tokenizer": ("LSTM (Sentiment Analysis)", "tokenizer"),
+    "LSTM Encoder": ("LSTM (Sentiment Analysis)", "encoder"),
+    "LSTM End-to-End": ("LSTM (Sentiment Analysis)", "end_to_end"),
+    "LSTM N-gram": ("LSTM (Sentiment Analysis)", "ngram"),
+}
+
+# Process-wide cache: every Streamlit session (and any other caller in this
+# process) reads the same in-memory instance.  Entries are treated as read-only.
+_REGISTRY = {}
+_CHECKSUMS = {}
+_SWAP_LISTENERS = []
+_LOCK = threading.RLock()
+
+
+# ============================================================
+# 🔑 Checksums
+# ============================================================
+def artifact_checksum(path):
+    """
+    SHA-256 of an artifact file.
+    Memoized on (path, mtime, size) so reruns don't re-hash unchanged files.
+    """
+    stat = os.stat(path)
+    stamp = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    cached = _CHECKSUMS.get(stamp[0])
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    checksum = digest.hexdigest()
+    _CHECKSUMS[stamp[0]] = (stamp, checksum)
+    return checksum
+
+
+# ============================================================
+# 📦 Loaders (one per model type)
+# ============================================================
+def _load_rules(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)["rules"]
+
+
+def _load_sequential(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _load_keras(path):
+    # Shares the (path, mtime) artifact cache used by predict_sentiment
+    from modules.recommend_utils import cached_artifact, _load_keras_model
+    return cached_artifact(path, _load_keras_model)
+
+
+def _load_pickle(path):
+    from modules.recommend_utils import cached_artifact, _load_pickle as load
+    return cached_artifact(path, load)
+
+
+_LOADERS = {
+    "Apriori": _load_rules,
+    "FP-Growth": _load_rules,
+    "Sequential Pattern Matching": _load_sequential,
+    "LSTM (Sentiment Analysis)": _load_keras,
+    "LSTM Tokenizer": _load_pickle,
+    "LSTM Encoder": _load_pickle,
+    "LSTM End-to-End": _load_keras,
+    "LSTM N-gram": _load_pickle,
+}
+
+
+# ============================================================
+# 🧮 Memory accounting
+# ============================================================
+def estimate_memory(obj, _seen=None):
+    """Rough in-memory size (bytes) of a DataFrame, Keras model or plain Python structure."""
+    if hasattr(obj, "memory_usage") and hasattr(obj, "columns"):
+        return int(obj.memory_usage(deep=True).sum())
+    if hasattr(obj, "count_params"):
+        return int(obj.count_params()) * 4  # float32 weights
+    if hasattr(obj, "nbytes"):
+        return int(obj.nbytes)
+
+    _seen = set() if _seen is None else _seen
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_memory(k, _seen) + estimate_memory(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_memory(i, _seen) for i in obj)
+    elif hasattr(obj, "__dict__"):
+        size += estimate_memory(vars(obj), _seen)
+    return size
+
+
+# ============================================================
+# 🗂️ Registry API
+# ============================================================
+def resolve_artifact(model_type):
+    """
+    Path of the artifact to serve: the current published registry version when one
+    exists (immutable, never overwritten), otherwise the legacy fixed path.
+    """
+    algorithm, key = VERSIONED_ARTIFACTS[model_type]
+    return current_artifact(algorithm, key) or MODEL_ARTIFACTS[model_type]
+
+
+def model_version(model_type):
+    """Published version id of `model_type` (None for unversioned legacy artifacts)."""
+    version = current_version(VERSIONED_ARTIFACTS[model_type][0])
+    return version["version"] if version else None
+
+
+def model_checksum(model_type):
+    """Checksum of the artifact currently served for `model_type` (used as a cache version)."""
+    path = resolve_artifact(model_type)
+    return artifact_checksum(path) if os.path.exists(path) else None
+
+
+def add_swap_listener(callback):
+    """Call `callback(model_type)` whenever a loaded model is replaced by a new version."""
+    _SWAP_LISTENERS.append(callback)
+
+
+def _store(model_type, checksum, path, model):
+    # Keep only the current version of each model type; sessions still holding
+    # the old object keep it alive until they drop their reference.
+    replaced = [k for k in _REGISTRY if k[0] == model_type and k[1] != checksum]
+    for key in replaced:
+        old_path = _REGISTRY.pop(key)["path"]
+        if old_path != path and _LOADERS[model_type] in (_load_keras, _load_pickle):
+            from modules.recommend_utils import evict_artifact
+            evict_artifact(old_path)
+    if replaced:
+        for listener in _SWAP_LISTENERS:
+            listener(model_type)
+    _REGISTRY[(model_type, checksum)] = {
+        "model": model,
+        "path": path,
+        "loaded_at": datetime.now().isoformat(timespec="seconds"),
+        "bytes": estimate_memory(model),
+    }
+
+
+def get_shared_model(model_type, path=None):
+    """
+    Return the shared in-memory model for `model_type`, loading it from disk once per
+    artifact checksum. Returns None when no artifact has been trained yet.
+    """
+    path = path or resolve_artifact(model_type)
+    if not os.path.exists(path):
+        return None
+
+    checksum = artifact_checksum(path)
+    key = (model_type, checksum)
+    entry = _REGISTRY.get(key)
+    if entry is not None:
+        return entry["model"]
+
+    with _LOCK:
+        entry = _REGISTRY.get(key)
+        if entry is None:
+            _store(model_type, checksum, path, _LOADERS[model_type](path))
+            entry = _REGISTRY[key]
+    return entry["model"]
+
+
+def publish_model(model_type, model, path=None):
+    """Register a freshly trained model (already saved at `path`) without reloading it."""
+    path = path or resolve_artifact(model_type)
+    checksum = artifact_checksum(path)
+    with _LOCK:
+        _store(model_type, checksum, path, model)
+    return checksum
+
+
+def available_model_types():
+    """Model types with a trained artifact on disk."""
+    return [
+        t for t in MODEL_ARTIFACTS
+        if t not in _COMPANIONS and os.path.exists(resolve_artifact(t))
+    ]
+
+
+def registry_memory_report():
+    """One row per loaded model: type, checksum, artifact path, size and load time."""
+    with _LOCK:
+        return [
+            {
+                "Model": model_type,
+                "Version": model_version(model_type),
+                "Checksum": checksum[:12],
+                "Artifact": entry["path"],
+                "Memory (MB)": round(entry["bytes"] / 1024 ** 2, 2),
+                "Loaded At": entry["loaded_at"],
+            }
+            for (model_type, checksum), entry in _REGISTRY.items()
+        ]
+
+
+# ============================================================
+# 🔄 Hot-swap for long-running serving processes
+# ============================================================
+_WATCHER = None
+
+
+def _reload_loaded_models(manifest):
+    # Preload the new current version of every model type already being served.
+    # get_shared_model() swaps the registry entry; callers holding the old object
+    # finish their request with it.
+    for model_type in {k[0] for k in list(_REGISTRY)}:
+        get_shared_model(model_type)
+
+
+def start_hot_swap(interval=2.0):
+    """Start (once per process) a background watcher that hot-swaps newly published versions."""
+    global _WATCHER
+    with _LOCK:
+        if _WATCHER is None:
+            _WATCHER = ManifestWatcher(_reload_loaded_models, interval=interval)
+            _WATCHER.start()
+    return _WATCHER
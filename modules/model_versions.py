@@ -0,0 +1,294 @@
+# ============================================
+# model_versions.py
+# ============================================
+"""
+Versioned model registry on disk.
+
+    models/registry/
+        manifest.json
+        <algorithm>/<version>/<artifact files>
+
+Each training run writes into a private staging directory which is renamed into
+place in one step, then the manifest is swapped atomically (write-then-rename).
+Readers therefore only ever see complete, immutable version directories.
+"""
+
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:   # Windows: msvcrt.locking instead
+    fcntl = None
+
+REGISTRY_DIR = os.path.join("models", "registry")
+MANIFEST_NAME = "manifest.json"
+
+_MANIFEST_CACHE = {}
+_LOCK = threading.Lock()
+
+
+# ============================================================
+# 🧰 Atomic file helpers
+# ============================================================
+def atomic_write(path, data, mode="wb"):
+    """Write `data` to a temp file next to `path`, fsync it, then rename over `path`."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp-{uuid.uuid4().hex[:8]}"
+    with open(tmp_path, mode, **({} if "b" in mode else {"encoding": "utf-8"})) as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def atomic_copy(src, dst):
+    """Copy `src` over `dst` without readers ever seeing a half-written `dst`."""
+    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    root, ext = os.path.splitext(dst)
+    tmp_path = f"{root}.tmp-{uuid.uuid4().hex[:8]}{ext}"
+    shutil.copyfile(src, tmp_path)
+    os.replace(tmp_path, dst)
+
+
+def dataframe_hash(df):
+    """Stable SHA-256 of a DataFrame's contents (used as the training data fingerprint)."""
+    try:
+        hashed = pd.util.hash_pandas_object(df, index=True).values
+    except TypeError:
+        # Unhashable cells (lists, sets) — fall back to their string form
+        hashed = pd.util.hash_pandas_object(df.astype(str), index=True).values
+    digest = hashlib.sha256(hashed.tobytes())
+    digest.update(",".join(map(str, df.columns)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+# ============================================================
+# 📜 Manifest
+# ============================================================
+def _slug(algorithm):
+    return "".join(c.lower() if c.isalnum() else "_" for c in algorithm).strip("_")
+
+
+def manifest_path(registry_dir=REGISTRY_DIR):
+    return os.path.join(registry_dir, MANIFEST_NAME)
+
+
+def load_manifest(registry_dir=REGISTRY_DIR):
+    """Read the manifest, re-parsing only when its mtime changes."""
+    path = manifest_path(registry_dir)
+    try:
+        stamp = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return {"models": {}}
+
+    cached = _MANIFEST_CACHE.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    _MANIFEST_CACHE[path] = (stamp, manifest)
+    return manifest
+
+
+class _ManifestLock:
+    """
+    Cross-process lock guarding manifest read-modify-write: an advisory lock
+    (flock, or msvcrt.locking on Windows) on a lock file that is never deleted.
+    The OS drops it when its owner exits, so a crashed publisher can't leave a
+    stale lock behind.
+    """
+
+    def __init__(self, registry_dir, timeout=30.0):
+        self.path = manifest_path(registry_dir) + ".lock"
+        self.timeout = timeout
+        self._file = None
+
+    @staticmethod
+    def _try_lock(f):
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                import msvcrt
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        f = open(self.path, "a+")
+        deadline = time.monotonic() + self.timeout
+        while not self._try_lock(f):
+            if time.monotonic() > deadline:
+                f.close()
+                raise TimeoutError(f"❌ Could not acquire registry lock {self.path}")
+            time.sleep(0.05)
+        self._file = f
+        return self
+
+    def __exit__(self, *exc):
+        f, self._file = self._file, None
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                import msvcrt
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            f.close()
+
+
+def current_version(algorithm, registry_dir=REGISTRY_DIR):
+    """Manifest entry of the currently published version of `algorithm` (or None)."""
+    entry = load_manifest(registry_dir)["models"].get(algorithm)
+    if not entry:
+        return None
+    return entry["versions"][entry["current"]]
+
+
+def current_artifact(algorithm, key, registry_dir=REGISTRY_DIR):
+    """Path of artifact `key` in the current version of `algorithm`, or None."""
+    version = current_version(algorithm, registry_dir)
+    if version is None or key not in version["files"]:
+        return None
+    return os.path.join(registry_dir, version["files"][key])
+
+
+def list_versions(algorithm, registry_dir=REGISTRY_DIR):
+    entry = load_manifest(registry_dir)["models"].get(algorithm, {})
+    return list(entry.get("versions", {}).values())
+
+
+# ============================================================
+# 🚀 Publishing
+# ============================================================
+class StagedVersion:
+    """
+    Context manager for one training run:
+
+        with StagedVersion("Apriori", params, data_hash) as stage:
+            with open(stage.file("model", "models/apriori_model.pkl"), "wb") as f:
+                pickle.dump(model, f)
+            stage.metrics["num_rules"] = len(rules)
+
+    On success the staging directory is renamed into `<algorithm>/<version>/`, the
+    manifest is updated, and each file is mirrored atomically to its legacy path.
+    The mirror is per file, so a reader of the legacy paths can briefly see one new
+    and one old artifact; readers needing a consistent set use current_artifact(),
+    which resolves every file inside the one immutable version directory.
+    """
+
+    def __init__(self, algorithm, params=None, data_hash=None, registry_dir=REGISTRY_DIR):
+        self.algorithm = algorithm
+        self.params = params or {}
+        self.data_hash = data_hash
+        self.registry_dir = registry_dir
+        self.metrics = {}
+        self.version = f"v{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+        self.created_at = datetime.now().isoformat(timespec="seconds")
+        self._algo_dir = os.path.join(registry_dir, _slug(algorithm))
+        self._staging = os.path.join(self._algo_dir, f".staging-{self.version}")
+        self._files = {}
+
+    def file(self, key, legacy_path=None):
+        """Staging path for artifact `key`; mirrored to `legacy_path` once published."""
+        name = os.path.basename(legacy_path) if legacy_path else key
+        self._files[key] = (name, legacy_path)
+        return os.path.join(self._staging, name)
+
+    def __enter__(self):
+        os.makedirs(self._staging, exist_ok=True)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            shutil.rmtree(self._staging, ignore_errors=True)
+            return False
+        self.publish()
+        return False
+
+    def publish(self):
+        version_dir = os.path.join(self._algo_dir, self.version)
+        os.rename(self._staging, version_dir)
+
+        rel_dir = os.path.relpath(version_dir, self.registry_dir)
+        record = {
+            "algorithm": self.algorithm,
+            "version": self.version,
+            "params": self.params,
+            "data_hash": self.data_hash,
+            "metrics": self.metrics,
+            "files": {key: os.path.join(rel_dir, name) for key, (name, _) in self._files.items()},
+            "created_at": self.created_at,
+            "published_at": datetime.now().isoformat(timespec="seconds"),
+        }
+
+        with _LOCK, _ManifestLock(self.registry_dir):
+            _MANIFEST_CACHE.pop(manifest_path(self.registry_dir), None)
+            manifest = load_manifest(self.registry_dir)
+            entry = manifest["models"].setdefault(self.algorithm, {"versions": {}})
+            entry["versions"][self.version] = record
+            entry["current"] = self.version
+            atomic_write(
+                manifest_path(self.registry_dir),
+                json.dumps(manifest, indent=2, ensure_ascii=False, default=str),
+                mode="w",
+            )
+
+        # Keep the legacy fixed paths working for older callers (each file atomic, not the set)
+        for name, legacy_path in self._files.values():
+            if legacy_path:
+                atomic_copy(os.path.join(version_dir, name), legacy_path)
+        return record
+
+
+# ============================================================
+# 👀 Manifest watcher (hot-swap for serving processes)
+# ============================================================
+class ManifestWatcher(threading.Thread):
+    """
+    Polls the manifest and calls `on_change(manifest)` whenever a new version is
+    published. Callers swap models inside the callback; requests already holding
+    the previous model object finish with it untouched.
+    """
+
+    def __init__(self, on_change, registry_dir=REGISTRY_DIR, interval=2.0):
+        super().__init__(daemon=True, name="manifest-watcher")
+        self.on_change = on_change
+        self.registry_dir = registry_dir
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._last_stamp = None
+
+    def _stamp(self):
+        try:
+            return os.stat(manifest_path(self.registry_dir)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def run(self):
+        while not self._stop_event.is_set():
+            stamp = self._stamp()
+            if stamp is not None and stamp != self._last_stamp:
+                self._last_stamp = stamp
+                try:
+                    self.on_change(load_manifest(self.registry_dir))
+                except Exception as e:
+                    print(f"⚠️ Model hot-swap failed: {e}")
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
@@ -2,56 +2,114 @@
 # preprocessing_sequential_ui.py
 # ============================================
 
-import re
+import os
 import string
+import multiprocessing
 import pandas as pd
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 import streamlit as st
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
-import nltk
-from tensorflow.keras.preprocessing.text import Tokenizer
-from tensorflow.keras.preprocessing.sequence import pad_sequences
-from sklearn.preprocessing import LabelEncoder
-
-# -----------------------------
-# Download NLTK resources (quietly)
-# -----------------------------
-nltk.download('stopwords', quiet=True)
-nltk.download('wordnet', quiet=True)
-nltk.download('omw-1.4', quiet=True)
-
-# -----------------------------
-# Global objects
-# -----------------------------
-stop_words = set(stopwords.words('english'))
-lemmatizer = WordNetLemmatizer()
+
+from modules.step_cache import STEP_CACHE, show_step_trace, step_key
+
+# NLTK corpora: resource name -> path checked with nltk.data.find before downloading
+NLTK_RESOURCES = {"stopwords": "corpora/stopwords", "wordnet": "corpora/wordnet", "omw-1.4": "corpora/omw-1.4"}
+
+# Characters removed by the original re.sub(f"[{string.punctuation}]", "", text).
+# Inside that character class "\]" is an escape, so the backslash itself survives.
+_PUNCT_TABLE = str.maketrans("", "", string.punctuation.replace("\\", ""))
+
+# Process-pool mode kicks in above this many *unique* texts
+PARALLEL_THRESHOLD = 50_000
 
 # ============================================================
 # 🧹 Core Helper Functions
 # ============================================================
 
+@lru_cache(maxsize=None)
+def nltk_resources():
+    """
+    (stop_words, lemmatizer), built on first use. NLTK is imported and each corpus is
+    downloaded only if it isn't installed yet; the result is cached for the process.
+    """
+    import nltk
+    from nltk.corpus import stopwords
+    from nltk.stem import WordNetLemmatizer
+
+    for name, path in NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            nltk.download(name, quiet=True)
+    return set(stopwords.words('english')), WordNetLemmatizer()
+
+
+@lru_cache(maxsize=200_000)
+def _lemma(word: str):
+    """Lemma of a lower-cased token, or None for a stopword (memoized per vocabulary word)."""
+    stop_words, lemmatizer = nltk_resources()
+    if word in stop_words:
+        return None
+    return lemmatizer.lemmatize(word)
+
+
+def _clean_normalized(text: str) -> str:
+    """Stopword removal + lemmatization of already lower-cased, punctuation-free text."""
+    return " ".join([lemma for lemma in map(_lemma, text.split()) if lemma is not None])
+
+
 def clean_text(text: str) -> str:
     """Clean text by removing punctuation, stopwords, and lemmatizing."""
     if not isinstance(text, str):
         text = str(text)
-    text = text.lower()
-    text = re.sub(f"[{string.punctuation}]", "", text)
-    text = " ".join([word for word in text.split() if word not in stop_words])
-    text = " ".join([lemmatizer.lemmatize(word) for word in text.split()])
-    return text
+    return _clean_normalized(text.lower().translate(_PUNCT_TABLE))
+
+
+def _clean_many(texts):
+    """Clean a list of strings; lower-casing / punctuation removal use pandas string ops."""
+    normalized = pd.Series(texts, dtype=object).str.lower().str.translate(_PUNCT_TABLE)
+    return [_clean_normalized(text) for text in normalized]
+
+
+def clean_text_column(series: pd.Series, workers: int = None,
+                      parallel_threshold: int = PARALLEL_THRESHOLD) -> pd.Series:
+    """
+    clean_text over a whole column. Each distinct text is cleaned once; with more than
+    `parallel_threshold` distinct texts they are split across a process pool
+    (`workers=1` forces a single process).
+    """
+    values = series.astype(str)
+    uniques = list(pd.unique(values))
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(uniques) >= parallel_threshold:
+        chunk_size = -(-len(uniques) // (workers * 4))
+        chunks = [uniques[i:i + chunk_size] for i in range(0, len(uniques), chunk_size)]
+        # Never fork: the Streamlit server is multi-threaded and may have TensorFlow loaded
+        start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context(start_method)) as pool:
+            cleaned = [text for chunk in pool.map(_clean_many, chunks) for text in chunk]
+    else:
+        cleaned = _clean_many(uniques)
+
+    return values.map(dict(zip(uniques, cleaned)))
 
 
 def preprocess_text_data(df: pd.DataFrame, text_column: str) -> pd.DataFrame:
     """Cleans text column and adds 'clean_text'."""
     st.info("🧹 Cleaning text data...")
     df[text_column] = df[text_column].astype(str)
-    df["clean_text"] = df[text_column].apply(clean_text)
+    df["clean_text"] = clean_text_column(df[text_column])
     st.success("✅ Text cleaned successfully!")
     return df
 
 
 def tokenize_and_pad(df: pd.DataFrame, text_column: str, vocab_size: int = 5000, max_length: int = 100):
     """Tokenize text and pad sequences."""
+    from tensorflow.keras.preprocessing.text import Tokenizer
+    from tensorflow.keras.preprocessing.sequence import pad_sequences
+
     st.info("🔡 Tokenizing and padding text...")
     tokenizer = Tokenizer(num_words=vocab_size, oov_token="<OOV>")
     tokenizer.fit_on_texts(df[text_column])
@@ -65,6 +123,8 @@ def tokenize_and_pad(df: pd.DataFrame, text_column: str, vocab_size: int = 5000,
 
 def encode_labels(df: pd.DataFrame, label_column: str):
     """Encode target labels."""
+    from sklearn.preprocessing import LabelEncoder
+
     encoder = LabelEncoder()
     df[label_column] = encoder.fit_transform(df[label_column])
     st.success("✅ Label encoding complete!")
@@ -75,21 +135,34 @@ def encode_labels(df: pd.DataFrame, label_column: str):
 # 📄 Streamlit UI Wrapper (like preprocess_tabular_ui)
 # ============================================================
 
-def preprocess_sequential_ui(df: pd.DataFrame):
-    """Streamlit UI for text/sequential data preprocessing."""
+def preprocess_sequential_ui(df: pd.DataFrame, input_key: str = None):
+    """
+    Streamlit UI for text/sequential data preprocessing. Cleaning, tokenization and
+    label encoding are memoized by (input key, step, parameters) in STEP_CACHE:
+    tokenization and label encoding both read the cleaned frame, so changing the
+    vocabulary size reruns only tokenization. `input_key` identifies `df` (e.g. the
+    upload's content hash); without it the frame is hashed once here.
+    """
     st.write("### 🧠 Text / Sequential Data Preprocessing")
+    if input_key is None:
+        from modules.model_versions import dataframe_hash
+        input_key = dataframe_hash(df)
+    trace = []
 
     # -----------------------------
     # 1️⃣ Select text column
     # -----------------------------
     text_col = st.selectbox("Select the text column:", df.columns)
     df[text_col] = df[text_col].astype(str)
+    key = step_key(input_key, "text.as_str", {"text_col": text_col})
 
     # -----------------------------
     # 2️⃣ Text Cleaning
     # -----------------------------
     if st.checkbox("🧹 Clean Text Data"):
-        df = preprocess_text_data(df, text_col)
+        # Shallow copy: the cached frame shares the input's columns and adds clean_text
+        df, key = STEP_CACHE.run("text.clean", key, {"text_col": text_col},
+                                 lambda df=df: preprocess_text_data(df.copy(deep=False), text_col), trace)
         st.dataframe(df.head(5))
 
     # -----------------------------
@@ -99,8 +172,10 @@ def preprocess_sequential_ui(df: pd.DataFrame):
         vocab_size = st.slider("Vocabulary Size:", 1000, 20000, 5000, step=1000)
         max_length = st.slider("Max Sequence Length:", 50, 500, 100, step=10)
 
-        X, tokenizer = tokenize_and_pad(df, "clean_text" if "clean_text" in df.columns else text_col,
-                                        vocab_size=vocab_size, max_length=max_length)
+        column = "clean_text" if "clean_text" in df.columns else text_col
+        (X, tokenizer), _ = STEP_CACHE.run(
+            "text.tokenize", key, {"column": column, "vocab_size": vocab_size, "max_length": max_length},
+            lambda: tokenize_and_pad(df, column, vocab_size=vocab_size, max_length=max_length), trace)
         st.write("Sample encoded sequence:", X[0][:30])
         st.write("✅ Tokenization Done.")
 
@@ -113,10 +188,14 @@ def preprocess_sequential_ui(df: pd.DataFrame):
     if st.checkbox("🔢 Encode Label Column (Optional)"):
         label_col = st.selectbox("Select label column:", ["None"] + list(df.columns))
         if label_col != "None":
-            df, encoder = encode_labels(df, label_col)
+            (df, encoder), key = STEP_CACHE.run(
+                "text.encode_labels", key, {"label_col": label_col},
+                lambda df=df: encode_labels(df.copy(deep=False), label_col), trace)
             st.session_state["encoder"] = encoder
             st.success(f"✅ Label encoding applied on '{label_col}'")
 
+    show_step_trace(trace)
+
     # -----------------------------
     # 5️⃣ Save for downstream modules
     # -----------------------------
@@ -4,57 +4,41 @@
 
 import pandas as pd
 import streamlit as st
-import seaborn as sns
-import matplotlib.pyplot as plt
-from sklearn.preprocessing import LabelEncoder
-from mlxtend.preprocessing import TransactionEncoder
+from modules.tabular_pipeline import TabularPreprocessor
+from modules.step_cache import STEP_CACHE, show_step_trace
+from modules.schema_inference import dataset_layout
 
 # -----------------------------
 # Handle Missing Values
 # -----------------------------
 def fill_missing(df, method="Mean"):
-    for col in df.columns:
-        if df[col].dtype in ["int64", "float64"]:
-            if method == "Mean":
-                df[col].fillna(df[col].mean(), inplace=True)
-            elif method == "Median":
-                df[col].fillna(df[col].median(), inplace=True)
-            else:
-                df[col].fillna(df[col].mode()[0], inplace=True)
-        else:
-            df[col].fillna(df[col].mode()[0], inplace=True)
-    return df
+    """One-step TabularPreprocessor: numeric columns by mean/median/mode, others by mode."""
+    return TabularPreprocessor().add("fill_missing", method=method).fit_transform(df)
 
 
 # -----------------------------
 # Remove Outliers
 # -----------------------------
 def remove_outliers(df):
-    numeric_cols = df.select_dtypes(include=["int64", "float64"]).columns
-    for col in numeric_cols:
-        Q1 = df[col].quantile(0.25)
-        Q3 = df[col].quantile(0.75)
-        IQR = Q3 - Q1
-        df = df[(df[col] >= Q1 - 1.5 * IQR) & (df[col] <= Q3 + 1.5 * IQR)]
-    return df
+    """One-step TabularPreprocessor: drop rows outside 1.5×IQR in any numeric column (one mask)."""
+    return TabularPreprocessor().add("remove_outliers").fit_transform(df)
 
 
 # -----------------------------
 # Encode Categorical Columns
 # -----------------------------
+def _known_classes():
+    """Classes of the session's label encoders ({column: classes}), kept when a column is encoded again."""
+    return {col: encoder.classes_ for col, encoder in st.session_state.get("label_encoders", {}).items()}
+
+
 def encode_data(df):
-    cat_cols = df.select_dtypes(include="object").columns.tolist()
+    """Label-encode categorical columns, reusing the session's encoders for columns seen before."""
     le_dict = st.session_state.get("label_encoders", {})
+    pre = TabularPreprocessor(known_classes=_known_classes()).add("encode")
+    df = pre.fit_transform(df)
 
-    for col in cat_cols:
-        if col in le_dict:
-            le = le_dict[col]
-            df[col] = df[col].map(lambda x: le.transform([x])[0] if x in le.classes_ else -1)
-        else:
-            le = LabelEncoder()
-            df[col] = le.fit_transform(df[col])
-            le_dict[col] = le
-
+    le_dict = {**pre.label_encoders, **le_dict}
     st.session_state["label_encoders"] = le_dict
     return df, le_dict
 
@@ -62,25 +46,27 @@ def encode_data(df):
 # -----------------------------
 # Transaction Encoder for Association Rules
 # -----------------------------
-def transaction_encode(df):
-    """Automatically detect and convert transaction-style dataset."""
-    # Detect if dataset has list-like column
-    list_cols = [col for col in df.columns if df[col].apply(lambda x: isinstance(x, (list, set, tuple))).any()]
-
-    if list_cols:
-        st.info(f"🧺 Detected transaction data in column: {list_cols[0]}")
-        transactions = df[list_cols[0]].tolist()
+def transaction_encode(df, layout=None):
+    """
+    Automatically detect and convert transaction-style dataset.
+    `layout` is the dataset's sampled layout (modules/schema_inference.py); inferred here if not given.
+    """
+    from mlxtend.preprocessing import TransactionEncoder
+    from modules.schema_inference import infer_layout
+
+    layout = layout or infer_layout(df)
+    if layout["format"] == "list":
+        list_col = layout["list_columns"][0]
+        st.info(f"🧺 Detected transaction data in column: {list_col}")
+        transactions = df[list_col].tolist()
+    elif layout["format"] == "long":
+        # Transactional rows: group items by the detected Transaction_ID / Customer_ID column
+        key_col, item_col = layout["key_column"], layout["item_column"]
+        transactions = df.groupby(key_col)[item_col].apply(list).tolist()
+        st.info(f"🧺 Grouped '{item_col}' by '{key_col}'")
     else:
-        # Assume transactional rows, group items by Transaction_ID or Customer_ID
-        possible_keys = [col for col in df.columns if "id" in col.lower() or "transaction" in col.lower()]
-        if possible_keys:
-            key_col = possible_keys[0]
-            item_col = [col for col in df.columns if col != key_col][-1]
-            transactions = df.groupby(key_col)[item_col].apply(list).tolist()
-            st.info(f"🧺 Grouped transactional data by '{key_col}'")
-        else:
-            st.warning("⚠️ Could not detect transaction format. Provide explicit transaction and item columns.")
-            return df
+        st.warning("⚠️ Could not detect transaction format. Provide explicit transaction and item columns.")
+        return df
 
     te = TransactionEncoder()
     te_ary = te.fit(transactions).transform(transactions)
@@ -95,36 +81,39 @@ def transaction_encode(df):
 # -----------------------------
 # Correlation Heatmap
 # -----------------------------
-def display_correlation_heatmap(df):
+def display_correlation_heatmap(df, key=None):
+    """
+    Correlation heatmap (top correlated pairs for wide data) from one vectorized pass.
+    With `key` identifying `df`, the chart is cached across reruns.
+    """
+    from modules.charts import correlation_ui
+    from modules.data_profile import correlation_matrix
+
     numeric_cols = df.select_dtypes(include=["number"]).columns
     if len(numeric_cols) == 0:
         st.warning("No numeric columns available for correlation heatmap.")
         return
-    corr = df[numeric_cols].corr()
-    fig, ax = plt.subplots(figsize=(8, 6))
-    sns.heatmap(corr, annot=True, cmap="coolwarm", fmt=".2f", ax=ax)
-    st.pyplot(fig)
+
+    if key is None:
+        corr = correlation_matrix(df)
+    else:
+        corr, _ = STEP_CACHE.run("tabular.correlation", key, None, lambda: correlation_matrix(df))
+    correlation_ui(corr, key)
 
 
 # -----------------------------
-# Streamlit UI Wrapper
+# Step selection → one fitted pipeline
 # -----------------------------
-def preprocess_tabular_ui(df):
-    st.write("### 🛠️ Tabular / Transactional Data Preprocessing")
-
-    # Detect if dataset contains transactional structure
-    if any(df[col].apply(lambda x: isinstance(x, (list, set, tuple))).any() for col in df.columns):
-        # Type 2 format: list of items in one column
-        if st.checkbox("Apply Transaction Encoder for List-based Data 🧺"):
-            df = transaction_encode(df)
-    
-    elif st.checkbox("Detect & Convert Transactional Rows (Apriori/FPGrowth) 🧾"):
-        st.warning("⚠️ This option is **only for Apriori or FP-Growth algorithms**. Please uncheck it for other models.")
-        df = transaction_encode(df)
-
+def _fit_pipeline_ui(df, input_key=None, trace=None):
+    """
+    Collect the chosen steps into a TabularPreprocessor, fit it and apply it once.
+    With `input_key`, each step is memoized in STEP_CACHE across reruns.
+    Returns the processed frame and a key identifying it (None without `input_key`).
+    """
     # -----------------------------
     # Handle Missing / Outliers
     # -----------------------------
+    pre = TabularPreprocessor(known_classes=_known_classes())
     if st.checkbox("Show Missing Values ⚠️"):
         missing_df = pd.DataFrame({
             "Column": df.columns,
@@ -135,12 +124,10 @@ def preprocess_tabular_ui(df):
 
     if st.checkbox("Fill Missing Values 🧮"):
         method = st.radio("Method:", ["Mean", "Median", "Mode"], horizontal=True)
-        df = fill_missing(df, method)
-        st.success("✅ Missing values filled")
+        pre.add("fill_missing", method=method)
 
     if st.checkbox("Remove Outliers 📊"):
-        df = remove_outliers(df)
-        st.success("✅ Outliers removed")
+        pre.add("remove_outliers")
 
     # -----------------------------
     # Label Encoding (optional now)
@@ -148,17 +135,102 @@ def preprocess_tabular_ui(df):
     st.markdown("---")
     st.subheader("🔢 Label Encoding Control")
 
-    if st.checkbox("Apply Label Encoding (for non-sequential models)"):
-        df, le_dict = encode_data(df)
+    encode = st.checkbox("Apply Label Encoding (for non-sequential models)")
+    if encode:
+        pre.add("encode")
+
+    # -----------------------------
+    # Fit + apply every chosen step in one pass
+    # -----------------------------
+    if pre.steps:
+        df = pre.fit_transform(df, cache=STEP_CACHE, input_key=input_key, trace=trace)
+        # Chained key of the last step: covers every option, known encoder classes included
+        input_key = pre.output_key_
+        st.session_state["tabular_preprocessor"] = pre
+        for name, _ in pre.steps:
+            if name == "fill_missing":
+                st.success("✅ Missing values filled")
+            elif name == "remove_outliers":
+                st.success("✅ Outliers removed")
+        with st.expander("🧾 Fitted preprocessing steps (saved with the next trained model)"):
+            st.dataframe(pd.DataFrame(pre.describe()).astype(str))
+    else:
+        # Nothing fitted: don't let an older pipeline be saved with the next model
+        st.session_state.pop("tabular_preprocessor", None)
+
+    if encode:
+        st.session_state["label_encoders"] = {**pre.label_encoders, **st.session_state.get("label_encoders", {})}
         st.success("✅ Encoding complete. Mappings saved for future use.")
     else:
         st.info("ℹ️ Skipped label encoding — keep original names for Sequential Pattern models.")
 
+    return df, input_key
+
+
+# -----------------------------
+# Streamlit UI Wrapper
+# -----------------------------
+def _transaction_encode_step(df, layout, input_key, trace):
+    """transaction_encode memoized in STEP_CACHE; restores the session's encoder on a hit."""
+    def encode():
+        st.session_state.pop("transaction_encoder", None)
+        encoded = transaction_encode(df, layout)
+        return encoded, st.session_state.get("transaction_encoder")
+
+    (encoded, te), key = STEP_CACHE.run("tabular.transaction_encode", input_key, None, encode, trace)
+    if te is not None:
+        st.session_state["transaction_encoder"] = te
+    return encoded, key
+
+
+def preprocess_tabular_ui(df, input_key=None):
+    """
+    Tabular preprocessing controls. `input_key` identifies `df` (e.g. the upload's
+    content hash); without it the frame is hashed once here. Every step's output is
+    memoized by (input key, step, parameters), so a rerun only recomputes the steps
+    after the control that changed.
+    """
+    st.write("### 🛠️ Tabular / Transactional Data Preprocessing")
+    if input_key is None:
+        from modules.model_versions import dataframe_hash
+        input_key = dataframe_hash(df)
+    trace = []
+
+    # Detect if dataset contains transactional structure (sampled, once per dataset)
+    layout = dataset_layout(df, input_key, trace=trace)
+    if layout["format"] == "list":
+        # Type 2 format: list of items in one column
+        if st.checkbox("Apply Transaction Encoder for List-based Data 🧺"):
+            df, input_key = _transaction_encode_step(df, layout, input_key, trace)
+    
+    elif st.checkbox("Detect & Convert Transactional Rows (Apriori/FPGrowth) 🧾"):
+        st.warning("⚠️ This option is **only for Apriori or FP-Growth algorithms**. Please uncheck it for other models.")
+        df, input_key = _transaction_encode_step(df, layout, input_key, trace)
+
+    # -----------------------------
+    # Replay a fitted pipeline (same fill values, bounds and encoders as before)
+    # -----------------------------
+    saved = st.session_state.get("tabular_preprocessor")
+    if saved is None:
+        saved = st.session_state.get("replay_preprocessor")   # fitted on a previous upload
+    if saved is not None and saved.is_fitted and st.checkbox(
+        "♻️ Replay the fitted preprocessing on this data", value=False,
+        help="Applies the fill values, outlier bounds and encoders learned earlier instead of refitting."
+    ):
+        df = saved.transform(df)
+        st.session_state["tabular_preprocessor"] = saved   # prepared this data: saved with the next model
+        input_key = None   # fitted elsewhere: not a cacheable function of this input
+        st.success("✅ Replayed: " + " → ".join(name for name, _ in saved.steps))
+    else:
+        df, input_key = _fit_pipeline_ui(df, input_key, trace)
+
     # -----------------------------
     # Correlation Heatmap (Optional)
     # -----------------------------
     if st.checkbox("Show Correlation Heatmap 🔗"):
-        display_correlation_heatmap(df)
+        display_correlation_heatmap(df, input_key)
+
+    show_step_trace(trace)
 
     # Always save processed df to session_state
     st.session_state["processed_tabular_df"] = df
@@ -2,42 +2,92 @@
 # recommend_page.py (UPDATED for Sequential Pattern)
 # ============================================
 
+import time
 import streamlit as st
-from modules.recommend_utils import recommend_from_patterns
-from modules.recommend_utils import recommend_from_rules
-from modules.recommend_utils import predict_sentiment
+import pandas as pd
+from modules.ngram_fast_path import DEFAULT_THRESHOLD, hybrid_predict
+from modules.recommend_utils import predict_sentiment, predict_sentiment_batch
+from modules.model_registry import available_model_types, get_shared_model, model_checksum, resolve_artifact
+from modules.result_cache import RESULT_CACHE, cached_recommend_from_patterns, cached_recommend_from_rules
+from modules.model_page import show_shared_model_memory
+
+def sentiment_pipeline(model):
+    """
+    (model, tokenizer) to score with: the end-to-end model when one was saved
+    (tokenizes in-graph, no tokenizer needed), else the LSTM plus its tokenizer.
+    """
+    end_to_end = get_shared_model("LSTM End-to-End")
+    if end_to_end is not None:
+        return end_to_end, None
+    return model, get_shared_model("LSTM Tokenizer") or st.session_state.get("tokenizer", None)
+
+
+def batch_sentiment_ui(model):
+    """Upload a CSV of reviews and score every row with the batched LSTM API."""
+    with st.expander("📄 Score a CSV of reviews"):
+        review_file = st.file_uploader("Upload CSV", type=["csv"], key="sentiment_batch_uploader")
+        if not review_file:
+            return
+
+        reviews_df = pd.read_csv(review_file)
+        text_col = st.selectbox("Select text column:", reviews_df.columns, key="sentiment_batch_col")
+        batch_size = st.select_slider("Batch size:", [64, 128, 256, 512, 1024], value=512)
+
+        if st.button("⚡ Score CSV"):
+            from modules.text_vectorizer import accepts_raw_text
+            model, tokenizer = sentiment_pipeline(model)
+            if tokenizer is None and not accepts_raw_text(model):
+                st.error("❌ Tokenizer not found. Please train the LSTM model first.")
+                return
+
+            total = len(reviews_df)
+            progress = st.progress(0.0, text="Scoring reviews...")
+            labels, scores = [], []
+            results = predict_sentiment_batch(
+                reviews_df[text_col].astype(str), model, tokenizer,
+                encoder_path=resolve_artifact("LSTM Encoder"), batch_size=batch_size,
+            )
+            for i, (label, score) in enumerate(results, start=1):
+                labels.append(label)
+                scores.append(score)
+                if i % batch_size == 0 or i == total:
+                    progress.progress(i / total, text=f"Scored {i:,} / {total:,} reviews")
+
+            reviews_df["sentiment"] = labels
+            reviews_df["confidence"] = scores
+            st.success(f"✅ Scored {total:,} reviews.")
+            st.dataframe(reviews_df.head(20))
+            st.download_button(
+                label="Download Results CSV",
+                data=reviews_df.to_csv(index=False),
+                file_name="sentiment_predictions.csv",
+                mime="text/csv"
+            )
+
 
 def recommend_page():
     st.header("🛒 Recommendation Page")
     st.write("Get top-N recommendations or predictions based on the selected algorithm.")
 
     # ------------------------------------------------------------
-    # 1️⃣ Ensure model is trained
+    # 1️⃣ Resolve the shared (process-wide) model
     # ------------------------------------------------------------
-    if "trained_model" not in st.session_state:
+    available = available_model_types()
+    if not available:
         st.warning("⚠️ Please train a model first on the Model page.")
         st.stop()
 
     algo = st.session_state.get("model_type", None)
-    model = st.session_state.get("trained_model", None)
+    if algo not in available:
+        algo = st.selectbox("Select a trained model:", available)
 
-    # ------------------------------------------------------------
-    # 2️⃣ Load processed data safely (avoid truth-value ambiguity)
-    # ------------------------------------------------------------
-    df = None
-    if "processed_tabular_df" in st.session_state and not st.session_state["processed_tabular_df"].empty:
-        df = st.session_state["processed_tabular_df"]
-    elif "processed_text_df" in st.session_state and not st.session_state["processed_text_df"].empty:
-        df = st.session_state["processed_text_df"]
-    elif "uploaded_df" in st.session_state and not st.session_state["uploaded_df"].empty:
-        df = st.session_state["uploaded_df"]
-
-    if df is None or df.empty:
-        st.warning("⚠️ Please upload and preprocess data first on the Dataset page.")
-        st.stop()
+    model = get_shared_model(algo)
+    show_shared_model_memory()
+    with st.expander("⚡ Result Cache"):
+        st.json(RESULT_CACHE.stats())
 
     # ------------------------------------------------------------
-    # 3️⃣ User Input UI
+    # 2️⃣ User Input UI
     # ------------------------------------------------------------
     user_input = ""
     top_n = 5
@@ -51,8 +101,6 @@ def recommend_page():
         top_n = st.number_input("Number of recommendations:", min_value=1, max_value=20, value=5)
         
     elif algo == "Sequential Pattern Matching":
-        model = st.session_state.get("trained_model", None)
-
         # ✅ Load model order dynamically
         import os, json
         meta_path = "models/sequential_model_meta.json"
@@ -81,9 +129,16 @@ def recommend_page():
             "Enter text or sequence for sentiment prediction:",
             placeholder="Example: This product is amazing!"
         )
+        ngram = get_shared_model("LSTM N-gram")
+        if ngram is not None:
+            threshold = st.slider(
+                "⚡ Fast-path confidence threshold:", 0.0, 1.0, DEFAULT_THRESHOLD, step=0.05,
+                help="Inputs whose n-gram margin is below this go to the LSTM (0 = never, 1 = always)."
+            )
+        batch_sentiment_ui(model)
 
     # ------------------------------------------------------------
-    # 4️⃣ Generate Recommendations
+    # 3️⃣ Generate Recommendations
     # ------------------------------------------------------------
     if st.button("🔍 Get Recommendations / Prediction"):
         if not user_input:
@@ -97,7 +152,7 @@ def recommend_page():
         # ---------------------------------------------
         if algo in ["Apriori", "FP-Growth"]:
             rules_df = model
-            recommended_items = recommend_from_rules(user_items, rules_df)
+            recommended_items = cached_recommend_from_rules(user_items, rules_df, algo, model_checksum(algo))
             recommended_items = list(recommended_items)[:top_n]
 
         # ---------------------------------------------
@@ -106,7 +161,9 @@ def recommend_page():
         elif algo == "Sequential Pattern Matching":
             # from modules.recommend_utils import recommend_from_patterns
             with st.spinner("Generating recommendations..."):
-                recommended_items = recommend_from_patterns(user_items, model, top_n=top_n)
+                recommended_items = cached_recommend_from_patterns(
+                    user_items, model, model_checksum(algo), top_n=top_n
+                )
 
             # ✅ Display result
             if recommended_items and "⚠️" not in recommended_items[0]:
@@ -121,13 +178,32 @@ def recommend_page():
         # 🤖 LSTM SENTIMENT ANALYSIS
         # ---------------------------------------------
         elif algo == "LSTM (Sentiment Analysis)":
-            tokenizer = st.session_state.get("tokenizer", None)
-            if tokenizer is None:
+            from modules.text_vectorizer import accepts_raw_text
+            model, tokenizer = sentiment_pipeline(model)
+            if tokenizer is None and not accepts_raw_text(model):
                 st.error("❌ Tokenizer not found. Please preprocess text data first.")
                 st.stop()
 
-            sentiment, prob = predict_sentiment(user_input, model, tokenizer)
+            if ngram is not None:
+                started = time.perf_counter()
+                ((sentiment, prob, source),) = hybrid_predict(
+                    [user_input], ngram,
+                    lambda texts: list(predict_sentiment_batch(
+                        texts, model, tokenizer, encoder_path=resolve_artifact("LSTM Encoder"))),
+                    threshold, encoder=get_shared_model("LSTM Encoder"),
+                )
+                st.success(f"✅ Sentiment Prediction: **{sentiment}** (Confidence: {prob:.2f})")
+                st.caption(f"Answered by the {'n-gram fast path' if source == 'ngram' else 'LSTM'} "
+                           f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+                return
+
+            timings = {}
+            sentiment, prob = predict_sentiment(
+                user_input, model, tokenizer,
+                encoder_path=resolve_artifact("LSTM Encoder"), timings=timings,
+            )
             st.success(f"✅ Sentiment Prediction: **{sentiment}** (Confidence: {prob:.2f})")
+            st.caption(" | ".join(f"{k.replace('_ms', '')}: {v:.1f} ms" for k, v in timings.items()))
             return  # No recommendation list for LSTM
 
         # ---------------------------------------------
@@ -2,8 +2,11 @@
 # recommend_utils.py
 # ============================================
 
+import os
+import time
+import pickle
+import threading
 from collections import defaultdict
-from tensorflow.keras.preprocessing.sequence import pad_sequences
 
 
 # -----------------------------
@@ -63,9 +66,83 @@ def recommend_from_patterns(user_items, model, top_n=5):
     return recommendations
 
 
+# ============================================
+# 🗃️ LSTM Artifact Cache (model / tokenizer / encoder)
+# ============================================
+# Keyed by absolute path; an entry is reused while the file's mtime is unchanged,
+# so retraining (which replaces the file) is picked up on the next call.
+_ARTIFACT_CACHE = {}
+_ARTIFACT_LOCK = threading.Lock()
+
+
+def _load_keras_model(path):
+    from tensorflow.keras.models import load_model
+    import modules.text_vectorizer  # noqa: F401 — registers the in-graph standardize fn
+    return load_model(path)
+
+
+def _load_pickle(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def cached_artifact(path, loader):
+    """Load `path` with `loader` once per (path, mtime)."""
+    key = os.path.abspath(path)
+    stamp = os.stat(key).st_mtime_ns
+    entry = _ARTIFACT_CACHE.get(key)
+    if entry is not None and entry[0] == stamp:
+        return entry[1]
+    with _ARTIFACT_LOCK:
+        entry = _ARTIFACT_CACHE.get(key)
+        if entry is None or entry[0] != stamp:
+            entry = (stamp, loader(key))
+            _ARTIFACT_CACHE[key] = entry
+    return entry[1]
+
+
+def evict_artifact(path):
+    """Forget a cached artifact (e.g. a superseded model version)."""
+    _ARTIFACT_CACHE.pop(os.path.abspath(path), None)
+
+
+def warm_lstm_cache(model_path=None, tokenizer_path=None, encoder_path=None):
+    """
+    Preload the LSTM pipeline so the first prediction pays no disk I/O. Paths default
+    to the current registry version (legacy paths when none is published). Later calls
+    only stat the files. Returns seconds spent.
+    """
+    from modules.model_registry import resolve_artifact
+
+    started = time.perf_counter()
+    for path, loader in [(model_path or resolve_artifact("LSTM (Sentiment Analysis)"), _load_keras_model),
+                         (tokenizer_path or resolve_artifact("LSTM Tokenizer"), _load_pickle),
+                         (encoder_path or resolve_artifact("LSTM Encoder"), _load_pickle)]:
+        if os.path.exists(path):
+            cached_artifact(path, loader)
+    return time.perf_counter() - started
+
+
 # ============================================
 # 🤖 LSTM Sentiment Analysis
 # ============================================
+def decode_predictions(preds, encoder=None):
+    """Turn a (batch, n_outputs) prediction array into parallel lists of labels and scores."""
+    import numpy as np
+
+    preds = np.asarray(preds)
+    if preds.shape[-1] == 1:
+        scores = preds[:, 0].astype(float)
+    else:
+        scores = preds.max(axis=-1).astype(float)
+
+    if encoder is not None and preds.shape[-1] > 1:
+        labels = list(encoder.inverse_transform(preds.argmax(axis=-1)))
+    else:
+        labels = ["Positive 😀" if s >= 0.5 else "Negative 😞" for s in scores]
+    return labels, [float(s) for s in scores]
+
+
 def predict_sentiment(
     text,
     model=None,
@@ -73,57 +150,151 @@ def predict_sentiment(
     model_path="models/lstm_model.h5",
     tokenizer_path="models/lstm_tokenizer.pkl",
     encoder_path="models/lstm_encoder.pkl",
-    max_length=100
+    max_length=100,
+    timings=None
 ):
     """
     Predict sentiment (or category) using trained LSTM model.
-    Works with either preloaded session models or saved files.
+    Works with either preloaded session models or saved files (cached per path + mtime).
+    Pass a dict as `timings` to receive the per-stage latency breakdown in ms
+    (load / tokenize / predict / decode / total).
+    An end-to-end model (models/lstm_end_to_end.keras) tokenizes in-graph, so no
+    tokenizer is needed and the tokenize stage is ~0.
     """
     import numpy as np
-    import pickle
-    from tensorflow.keras.models import load_model
+    from tensorflow.keras.preprocessing.sequence import pad_sequences
+    from modules.text_vectorizer import accepts_raw_text
+
+    started = time.perf_counter()
 
     # -----------------------------
     # Load model + tokenizer if not provided
     # -----------------------------
     if model is None:
         try:
-            model = load_model(model_path)
+            model = cached_artifact(model_path, _load_keras_model)
         except Exception as e:
             return f"❌ Model load error: {e}", 0.0
 
-    if tokenizer is None:
+    raw_text = accepts_raw_text(model)
+    if tokenizer is None and not raw_text:
         try:
-            with open(tokenizer_path, "rb") as f:
-                tokenizer = pickle.load(f)
+            tokenizer = cached_artifact(tokenizer_path, _load_pickle)
         except Exception as e:
             return f"❌ Tokenizer load error: {e}", 0.0
 
     try:
-        with open(encoder_path, "rb") as f:
-            encoder = pickle.load(f)
+        encoder = cached_artifact(encoder_path, _load_pickle)
     except Exception:
         encoder = None
+    loaded = time.perf_counter()
 
     # -----------------------------
     # Tokenize and pad
     # -----------------------------
-    seq = tokenizer.texts_to_sequences([text])
-    padded = pad_sequences(seq, maxlen=max_length, padding="post", truncating="post")
+    if raw_text:
+        inputs = np.asarray([[text]], dtype=object)
+    else:
+        seq = tokenizer.texts_to_sequences([text])
+        inputs = pad_sequences(seq, maxlen=max_length, padding="post", truncating="post")
+    tokenized = time.perf_counter()
 
     # -----------------------------
     # Predict
     # -----------------------------
-    preds = model.predict(padded)
-    score = float(preds[0][0]) if preds.shape[-1] == 1 else float(np.max(preds))
+    preds = np.asarray(model.predict_on_batch(inputs))
+    predicted = time.perf_counter()
 
     # -----------------------------
     # Decode label
     # -----------------------------
-    if encoder is not None and preds.shape[-1] > 1:
-        label_idx = int(np.argmax(preds))
-        label = encoder.inverse_transform([label_idx])[0]
-    else:
-        label = "Positive 😀" if score >= 0.5 else "Negative 😞"
+    labels, scores = decode_predictions(preds, encoder)
+    label, score = labels[0], scores[0]
+    decoded = time.perf_counter()
+
+    if timings is not None:
+        timings.update({
+            "load_ms": round((loaded - started) * 1000, 3),
+            "tokenize_ms": round((tokenized - loaded) * 1000, 3),
+            "predict_ms": round((predicted - tokenized) * 1000, 3),
+            "decode_ms": round((decoded - predicted) * 1000, 3),
+            "total_ms": round((decoded - started) * 1000, 3),
+        })
 
     return label, round(score, 3)
+
+
+def _uses_masking(model):
+    """True when the model's Embedding masks padding (then shorter padding is safe)."""
+    return any(getattr(layer, "mask_zero", False) for layer in getattr(model, "layers", []))
+
+
+def predict_sentiment_batch(
+    texts,
+    model=None,
+    tokenizer=None,
+    model_path="models/lstm_model.h5",
+    tokenizer_path="models/lstm_tokenizer.pkl",
+    encoder_path="models/lstm_encoder.pkl",
+    max_length=100,
+    batch_size=512,
+    sort_window=16
+):
+    """
+    Score an iterable of texts, yielding (label, score) in input order.
+
+    Texts are consumed in windows of `batch_size * sort_window`, tokenized in bulk,
+    sorted by token length and sent through the model in fixed-size batches, so
+    memory stays bounded for arbitrarily large inputs. When the model masks padding
+    (Embedding(mask_zero=True)) each batch is padded only to its longest sequence;
+    otherwise everything is padded to `max_length`, matching predict_sentiment exactly.
+    End-to-end models receive the raw strings in batches of `batch_size`.
+    """
+    import numpy as np
+    from itertools import islice
+    from tensorflow.keras.preprocessing.sequence import pad_sequences
+    from modules.text_vectorizer import accepts_raw_text
+
+    if model is None:
+        model = cached_artifact(model_path, _load_keras_model)
+    raw_text = accepts_raw_text(model)
+    if tokenizer is None and not raw_text:
+        tokenizer = cached_artifact(tokenizer_path, _load_pickle)
+    try:
+        encoder = cached_artifact(encoder_path, _load_pickle)
+    except Exception:
+        encoder = None
+
+    dynamic = _uses_masking(model)
+    iterator = iter(texts)
+    while True:
+        window = [t if isinstance(t, str) else str(t) for t in islice(iterator, batch_size * sort_window)]
+        if not window:
+            return
+
+        if raw_text:
+            for start in range(0, len(window), batch_size):
+                batch = np.asarray([[t] for t in window[start:start + batch_size]], dtype=object)
+                batch_labels, batch_scores = decode_predictions(model.predict_on_batch(batch), encoder)
+                yield from zip(batch_labels, [round(s, 3) for s in batch_scores])
+            continue
+
+        seqs = tokenizer.texts_to_sequences(window)
+        order = sorted(range(len(seqs)), key=lambda i: len(seqs[i]))
+        labels, scores = [None] * len(seqs), [None] * len(seqs)
+
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            batch = [seqs[i] for i in idx]
+            width = max_length
+            if dynamic:
+                longest = max(len(seq) for seq in batch) or 1
+                width = min(max_length, -(-longest // 16) * 16)  # round up to limit retracing
+            padded = pad_sequences(batch, maxlen=width, padding="post", truncating="post")
+
+            batch_labels, batch_scores = decode_predictions(model.predict_on_batch(padded), encoder)
+            for j, i in enumerate(idx):
+                labels[i] = batch_labels[j]
+                scores[i] = round(batch_scores[j], 3)
+
+        yield from zip(labels, scores)
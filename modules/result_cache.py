@@ -0,0 +1,125 @@
+# ============================================
+# result_cache.py
+# ============================================
+"""
+Result cache in front of recommend_from_rules / recommend_from_patterns.
+
+Keys are the *normalized* request plus the model version, so repeated popular
+baskets hit the cache regardless of item order, and a newly trained model can
+never serve stale results. Entries are evicted least-recently-used once the
+cache is full and expire after `ttl` seconds.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+from modules.model_registry import add_swap_listener
+from modules.recommend_utils import recommend_from_rules, recommend_from_patterns
+
+
+class ResultCache:
+    """Thread-safe LRU cache with per-entry TTL and hit/miss counters."""
+
+    def __init__(self, max_size=10000, ttl=600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def get(self, key):
+        """Return (found, value)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            expires_at, value = entry
+            if expires_at < now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, model_type=None):
+        """Drop every entry (or only those of `model_type`, the first key element)."""
+        with self._lock:
+            if model_type is None:
+                dropped = len(self._data)
+                self._data.clear()
+            else:
+                stale = [k for k in self._data if k[0] == model_type]
+                for k in stale:
+                    del self._data[k]
+                dropped = len(stale)
+            self.invalidations += dropped
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+# Shared by every session / request handler in this process. Entries of a model
+# type are dropped as soon as the registry swaps in a newly trained version.
+RESULT_CACHE = ResultCache()
+add_swap_listener(RESULT_CACHE.invalidate)
+
+
+# ============================================================
+# 🔑 Request normalization
+# ============================================================
+def basket_key(user_items):
+    """Rule matching only depends on the item *set*, so order and duplicates don't matter."""
+    return tuple(sorted({str(i).strip() for i in user_items if str(i).strip()}))
+
+
+def sequence_key(user_items, k=1):
+    """recommend_from_patterns only looks at the last `k` items of the sequence."""
+    return tuple(str(i).strip() for i in user_items[-k:])
+
+
+# ============================================================
+# ⚡ Cached recommendation functions
+# ============================================================
+def cached_recommend_from_rules(user_items, rules_df, model_type, version, cache=RESULT_CACHE):
+    key = (model_type, version, basket_key(user_items))
+    found, value = cache.get(key)
+    if not found:
+        value = recommend_from_rules(list(key[2]), rules_df)
+        cache.put(key, value)
+    return list(value)
+
+
+def cached_recommend_from_patterns(user_items, model, version, top_n=5,
+                                   model_type="Sequential Pattern Matching", cache=RESULT_CACHE):
+    items = [str(i).strip() for i in user_items]
+    key = (model_type, version, sequence_key(items), top_n)
+    found, value = cache.get(key)
+    if not found:
+        value = recommend_from_patterns(items, model, top_n=top_n)
+        cache.put(key, value)
+    return list(value)
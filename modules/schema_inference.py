@@ -0,0 +1,91 @@
+# ============================================
+# schema_inference.py
+# ============================================
+"""
+Dataset layout from a bounded random sample instead of every cell.
+
+    layout = dataset_layout(df, key)      # memoized per dataset key in STEP_CACHE
+    layout["format"]        # "list" | "long" | None
+    layout["list_columns"]  # cells holding lists / sets / tuples (one basket per row)
+    layout["key_column"], layout["item_column"]   # long format: one item per row
+    layout["timestamp_columns"]   # {column: strftime format, or None if already datetime}
+    layout["id_columns"]
+
+Transaction encoding and build_sequences read it instead of scanning the frame.
+"""
+
+import numpy as np
+import pandas as pd
+
+from modules.csv_ingest import _datetime_format
+
+DEFAULT_SAMPLE_ROWS = 2_000
+# Name hints of the original transaction detection (grouping key of long-format rows)
+KEY_HINTS = ("id", "transaction")
+
+
+def sample_frame(df, n=DEFAULT_SAMPLE_ROWS, seed=0):
+    """Up to `n` random rows (in their original order); the frame itself when it is smaller."""
+    if len(df) <= n:
+        return df
+    rows = np.sort(np.random.default_rng(seed).choice(len(df), size=n, replace=False))
+    return df.iloc[rows]
+
+
+def _is_list_column(values):
+    return values.dtype == object and values.map(lambda x: isinstance(x, (list, set, tuple))).any()
+
+
+def infer_layout(df, sample_rows=DEFAULT_SAMPLE_ROWS):
+    """Layout of `df` (see the module docstring) from `sample_rows` random rows."""
+    sample = sample_frame(df, sample_rows)
+    list_columns = [col for col in df.columns if _is_list_column(sample[col])]
+
+    timestamp_columns = {}
+    for col in df.columns:
+        values = sample[col]
+        if col in list_columns or pd.api.types.is_bool_dtype(values):
+            continue
+        if pd.api.types.is_datetime64_any_dtype(values):
+            timestamp_columns[col] = None
+        elif not pd.api.types.is_numeric_dtype(values):
+            fmt = _datetime_format(values)
+            if fmt is not None:
+                timestamp_columns[col] = fmt
+
+    id_columns = [col for col in df.columns
+                  if col not in list_columns and any(hint in str(col).lower() for hint in KEY_HINTS)]
+
+    key_column = item_column = None
+    if list_columns:
+        fmt = "list"
+    elif id_columns:
+        fmt = "long"
+        key_column = id_columns[0]
+        others = [col for col in df.columns if col != key_column]
+        # Items are the last column that is neither a timestamp nor another ID
+        items = [col for col in others if col not in timestamp_columns and col not in id_columns]
+        item_column = (items or others or [None])[-1]
+    else:
+        fmt = None
+
+    return {
+        "rows": len(df),
+        "sampled_rows": len(sample),
+        "format": fmt,
+        "list_columns": list_columns,
+        "key_column": key_column,
+        "item_column": item_column,
+        "timestamp_columns": timestamp_columns,
+        "id_columns": id_columns,
+    }
+
+
+def dataset_layout(df, key=None, sample_rows=DEFAULT_SAMPLE_ROWS, trace=None):
+    """infer_layout memoized per dataset key (e.g. the upload's step-cache key); uncached without one."""
+    if key is None:
+        return infer_layout(df, sample_rows)
+    from modules.step_cache import STEP_CACHE
+    layout, _ = STEP_CACHE.run("schema.layout", key, {"sample_rows": sample_rows},
+                               lambda: infer_layout(df, sample_rows), trace)
+    return layout
@@ -0,0 +1,246 @@
+# ============================================
+# step_cache.py
+# ============================================
+"""
+Memoized preprocessing steps across Streamlit reruns.
+
+Every step output is stored under a *chained* key:
+
+    key(step) = sha256(key(input), step name, params)
+
+The raw upload's key is its content hash, so a step's key changes exactly when
+something upstream of it (or its own parameters) changes. Toggling a checkbox
+therefore recomputes only the steps after it; everything before it is a hit.
+Steps can branch (e.g. tokenization and label encoding both read the cleaned
+text), which makes the chain a DAG.
+
+Cached outputs are shared: steps must not mutate their input, and callers must
+not mutate what they get back.
+"""
+
+import sys
+import json
+import time
+import hashlib
+import itertools
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 1024 ** 3
+DEFAULT_MAX_ENTRIES = 128
+
+
+def _params_text(params):
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def step_key(input_key, step, params=None):
+    """Key of `step` run with `params` on the input identified by `input_key`."""
+    digest = hashlib.sha256(str(input_key).encode("utf-8"))
+    digest.update(b"\0" + step.encode("utf-8") + b"\0" + _params_text(params).encode("utf-8"))
+    return digest.hexdigest()
+
+
+# Items sampled to size a vocabulary-like dict / list without walking all of it
+_SAMPLE_ITEMS = 1000
+_MAX_DEPTH = 4
+
+
+def _flat_nbytes(container):
+    """A dict / list of scalars (e.g. a Tokenizer's word counts): container plus items, per-item size sampled."""
+    sample = list(itertools.islice(container.items() if isinstance(container, dict) else container,
+                                   _SAMPLE_ITEMS))
+    if not sample:
+        return sys.getsizeof(container)
+    if isinstance(container, dict):
+        per_item = sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in sample) / len(sample)
+    else:
+        per_item = sum(sys.getsizeof(x) for x in sample) / len(sample)
+    return sys.getsizeof(container) + int(per_item * len(container))
+
+
+def _is_scalar(value):
+    return isinstance(value, (str, bytes, int, float, bool, type(None)))
+
+
+def value_buffers(value, depth=0):
+    """
+    (buffer id, bytes) of what `value` keeps alive. Arrays and frame columns give one
+    row per underlying buffer (views of one buffer share its id; object columns
+    include their sampled string payload, as in modules/dataset_store.py); everything
+    else gives (None, bytes). Fitted objects (Tokenizer, encoders) are sized by their
+    attributes, so a vocabulary counts with its words.
+    """
+    import numpy as np
+    import pandas as pd
+    from modules.dataset_store import _buffers
+
+    if isinstance(value, (np.ndarray, pd.Series, pd.DataFrame)):
+        yield from _buffers(value)
+    elif _is_scalar(value) or depth >= _MAX_DEPTH:
+        yield None, sys.getsizeof(value)
+    elif isinstance(value, dict):
+        sample = itertools.islice(value.values(), _SAMPLE_ITEMS)
+        if all(_is_scalar(v) for v in sample):
+            yield None, _flat_nbytes(value)
+        else:
+            yield None, sys.getsizeof(value)
+            for v in value.values():
+                yield from value_buffers(v, depth + 1)
+    elif isinstance(value, (tuple, list, set, frozenset)):
+        sample = itertools.islice(value, _SAMPLE_ITEMS)
+        if all(_is_scalar(v) for v in sample):
+            yield None, _flat_nbytes(list(value) if isinstance(value, (set, frozenset)) else value)
+        else:
+            yield None, sys.getsizeof(value)
+            for v in value:
+                yield from value_buffers(v, depth + 1)
+    elif hasattr(value, "__dict__") and not isinstance(value, type):
+        yield None, sys.getsizeof(value)
+        yield from value_buffers(vars(value), depth + 1)
+    else:
+        yield None, sys.getsizeof(value)
+
+
+def estimate_nbytes(value):
+    """Size estimate of `value` on its own (each buffer once, string payloads sampled)."""
+    buffers, loose = _split_buffers(value)
+    return sum(buffers.values()) + loose
+
+
+def _split_buffers(value):
+    """({buffer id: bytes}, bytes not tied to a shared buffer) of `value`."""
+    buffers, loose = {}, 0
+    for buffer_id, nbytes in value_buffers(value):
+        if buffer_id is None:
+            loose += nbytes
+        else:
+            buffers[buffer_id] = nbytes
+    return buffers, loose
+
+
+class StepCache:
+    """
+    Thread-safe LRU of step outputs, bounded by entries and estimated bytes, with per-step stats.
+    Entries often share column buffers (a step's output keeps its input's unchanged
+    columns), so each buffer counts toward the budget once, while any entry holds it.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._data = OrderedDict()   # key -> (value, {buffer id: bytes}, loose bytes, step)
+        self._buffers = {}           # buffer id -> [entries holding it, bytes]
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+        self.step_stats = {}         # step -> {"hits", "misses", "compute_ms"}
+
+    def _hold(self, buffers, loose):
+        for buffer_id, nbytes in buffers.items():
+            held = self._buffers.get(buffer_id)
+            if held is None:
+                self._buffers[buffer_id] = [1, nbytes]
+                self._bytes += nbytes
+            else:
+                held[0] += 1
+        self._bytes += loose
+
+    def _release(self, entry):
+        _, buffers, loose, _ = entry
+        for buffer_id in buffers:
+            held = self._buffers[buffer_id]
+            held[0] -= 1
+            if held[0] == 0:
+                del self._buffers[buffer_id]
+                self._bytes -= held[1]
+        self._bytes -= loose
+
+    def _record(self, step, hit, ms=0.0):
+        stats = self.step_stats.setdefault(step, {"hits": 0, "misses": 0, "compute_ms": 0.0})
+        if hit:
+            self.hits += 1
+            stats["hits"] += 1
+        else:
+            self.misses += 1
+            stats["misses"] += 1
+            stats["compute_ms"] += ms
+
+    def run(self, step, input_key, params, fn, trace=None):
+        """
+        Output of `fn()` for (input_key, step, params), computed at most once while cached.
+        Returns (value, output_key); `output_key` is the input key for the next steps.
+        When `trace` is a list, a {"step", "cache", "ms"} row is appended to it.
+        """
+        key = step_key(input_key, step, params)
+        started = time.perf_counter()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+                self._record(step, hit=True)
+        if entry is not None:
+            if trace is not None:
+                trace.append({"step": step, "cache": "hit", "ms": round((time.perf_counter() - started) * 1000, 2)})
+            return entry[0], key
+
+        value = fn()
+        ms = (time.perf_counter() - started) * 1000
+        buffers, loose = _split_buffers(value)
+        with self._lock:
+            self._record(step, hit=False, ms=ms)
+            if sum(buffers.values()) + loose <= self.max_bytes:
+                old = self._data.pop(key, None)
+                if old is not None:
+                    self._release(old)
+                self._data[key] = (value, buffers, loose, step)
+                self._hold(buffers, loose)
+                while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                    _, evicted = self._data.popitem(last=False)
+                    self._release(evicted)
+                    self.evictions += 1
+        if trace is not None:
+            trace.append({"step": step, "cache": "miss", "ms": round(ms, 2)})
+        return value, key
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._buffers.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "size_mb": round(self._bytes / 1024 ** 2, 2),
+                "max_mb": round(self.max_bytes / 1024 ** 2, 2),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+# Shared by every session in this process (keys start from content hashes, so
+# two sessions preprocessing the same upload the same way share the work).
+STEP_CACHE = StepCache()
+# Rendered chart PNGs (modules/charts.py): cheap to redraw and numerous while browsing,
+# so they get their own LRU instead of evicting step outputs and profiles from STEP_CACHE.
+CHART_CACHE = StepCache(max_bytes=128 * 1024 ** 2, max_entries=512)
+
+
+def show_step_trace(trace, cache=STEP_CACHE):
+    """Streamlit expander with this rerun's steps (hit/miss, ms) and the cache totals."""
+    import pandas as pd
+    import streamlit as st
+
+    if not trace:
+        return
+    computed = [row for row in trace if row["cache"] == "miss"]
+    with st.expander(f"⚙️ Step cache: {len(trace) - len(computed)} hit(s), {len(computed)} recomputed "
+                     f"({sum(row['ms'] for row in computed):.0f} ms)"):
+        st.dataframe(pd.DataFrame(trace))
+        st.json(cache.stats())
@@ -0,0 +1,231 @@
+# ============================================
+# tabular_pipeline.py
+# ============================================
+"""
+Fit/transform version of the tabular preprocessing steps.
+
+    pre = TabularPreprocessor().add("fill_missing", method="Median").add("remove_outliers").add("encode")
+    train_df = pre.fit_transform(df)          # learns fill values, IQR bounds, label classes
+    pre.save("models/apriori_preprocessor.pkl")
+    new_df = TabularPreprocessor.load(path).transform(new_data)   # same fill values, bounds, codes
+
+Each step is fitted on the output of the steps before it, and transform applies
+them as whole-frame operations: one fillna with a value dict, one outlier mask
+over all numeric columns, and categorical-code lookups for encoding (unseen
+values → -1, like the original per-element encoder lookup).
+Apriori / FP-Growth store the fitted object with their model version as a record
+of how the training data was prepared; the recommenders themselves take item
+baskets, so nothing applies it at serving time. No Streamlit import.
+"""
+
+import pickle
+
+import numpy as np
+import pandas as pd
+
+STEPS = ("fill_missing", "remove_outliers", "encode")
+FILL_METHODS = ("Mean", "Median", "Mode")
+
+
+def _numeric_columns(df):
+    return [col for col in df.columns
+            if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])]
+
+
+def _categorical_columns(df):
+    return df.select_dtypes(include=["object", "category"]).columns.tolist()
+
+
+def _sorted_classes(values):
+    """Distinct non-null values in LabelEncoder order (sorted; as strings if types are mixed)."""
+    uniques = pd.unique(values.dropna())
+    try:
+        return np.sort(uniques)
+    except TypeError:
+        return np.sort(uniques.astype(str))
+
+
+def _classes_text(classes):
+    """{column: classes} as plain lists for cache keys (str() of a long array elides values)."""
+    return {str(col): [str(values.dtype), *map(str, values.tolist())] for col, values in classes.items()}
+
+
+class TabularPreprocessor:
+    """
+    Ordered tabular steps with their fitted statistics / encoders. `known_classes`
+    ({column: classes}) are kept by the encode step instead of being refitted, so
+    codes stay stable for columns encoded before.
+    """
+
+    def __init__(self, steps=None, known_classes=None):
+        self.steps = []
+        self.fitted_ = {}
+        self.columns_ = None
+        self.output_key_ = None
+        self.known_classes = dict(known_classes or {})
+        for name, options in steps or []:
+            self.add(name, **options)
+
+    # -----------------------------
+    # Configuration
+    # -----------------------------
+    def add(self, name, **options):
+        """Append a step: fill_missing(method=Mean|Median|Mode), remove_outliers(k=1.5) or encode()."""
+        if name not in STEPS:
+            raise ValueError(f"Unknown step '{name}' (expected one of {', '.join(STEPS)})")
+        if name == "fill_missing" and options.get("method", "Mean") not in FILL_METHODS:
+            raise ValueError(f"Unknown fill method '{options['method']}'")
+        self.steps.append((name, options))
+        self.fitted_ = {}
+        return self
+
+    @property
+    def is_fitted(self):
+        return len(self.fitted_) == len(self.steps)
+
+    # -----------------------------
+    # Fit
+    # -----------------------------
+    def _fit_step(self, name, options, df):
+        if name == "fill_missing":
+            method = options.get("method", "Mean")
+            numeric = set(_numeric_columns(df))
+            values = {}
+            for col in df.columns:
+                column = df[col]
+                if not column.notna().any():
+                    continue
+                if col in numeric and method == "Mean":
+                    values[col] = column.mean()
+                elif col in numeric and method == "Median":
+                    values[col] = column.median()
+                else:
+                    values[col] = column.mode().iloc[0]
+            return values
+
+        if name == "remove_outliers":
+            k = options.get("k", 1.5)
+            cols = _numeric_columns(df)
+            if not cols:
+                return {}
+            quartiles = df[cols].quantile([0.25, 0.75])
+            iqr = quartiles.loc[0.75] - quartiles.loc[0.25]
+            return {"lower": (quartiles.loc[0.25] - k * iqr).to_dict(),
+                    "upper": (quartiles.loc[0.75] + k * iqr).to_dict()}
+
+        # encode
+        return {col: self.known_classes[col] if col in self.known_classes else _sorted_classes(df[col])
+                for col in _categorical_columns(df)}
+
+    def fit(self, df):
+        self.fit_transform(df)
+        return self
+
+    def fit_transform(self, df, cache=None, input_key=None, trace=None):
+        """
+        Fit each step on the previous step's output and apply it. With a StepCache
+        (modules/step_cache.py) and the input's key, each step's (fitted state, output)
+        is memoized by (input key, step, options), so only steps after a change rerun;
+        the last step's chained key is kept as `output_key_` (None when not cached).
+        """
+        self.columns_ = list(df.columns)
+        self.fitted_ = {}
+        key = input_key
+        for i, (name, options) in enumerate(self.steps):
+            def fit_apply(df=df, name=name, options=options):
+                fitted = self._fit_step(name, options, df)
+                return fitted, self._apply(name, fitted, df)
+
+            if cache is None or key is None:
+                fitted, df = fit_apply()
+            else:
+                params = options
+                if name == "encode" and self.known_classes:
+                    params = {**options, "known_classes": _classes_text(self.known_classes)}
+                (fitted, df), key = cache.run(f"tabular.{name}", key, params, fit_apply, trace)
+            self.fitted_[i] = fitted
+        self.output_key_ = key if cache is not None else None
+        return df
+
+    # -----------------------------
+    # Transform
+    # -----------------------------
+    @staticmethod
+    def _apply(name, fitted, df, drop_outliers=True):
+        if name == "fill_missing":
+            values = {col: v for col, v in fitted.items() if col in df.columns}
+            return df.fillna(values)
+
+        if name == "remove_outliers":
+            cols = [col for col in fitted.get("lower", {}) if col in df.columns]
+            if not cols or not drop_outliers:
+                return df
+            lower = pd.Series(fitted["lower"])[cols]
+            upper = pd.Series(fitted["upper"])[cols]
+            # Rows with a NaN in a checked column fail the comparison, as in the per-column filter
+            mask = (df[cols].ge(lower) & df[cols].le(upper)).all(axis=1)
+            return df[mask]
+
+        # encode (shallow copy: only the replaced columns get new memory)
+        df = df.copy(deep=False)
+        for col, classes in fitted.items():
+            if col not in df.columns:
+                continue
+            values = df[col]
+            if classes.dtype.kind in "US" and not pd.api.types.is_string_dtype(values):
+                values = values.astype(str)
+            df[col] = pd.Categorical(values, categories=classes).codes
+        return df
+
+    def transform(self, df, drop_outliers=True):
+        """
+        Replay the fitted steps on new data. `drop_outliers=False` keeps every row
+        (e.g. when each input row needs an answer).
+        """
+        if not self.is_fitted:
+            raise RuntimeError("TabularPreprocessor is not fitted yet.")
+        for i, (name, _) in enumerate(self.steps):
+            df = self._apply(name, self.fitted_[i], df, drop_outliers)
+        return df
+
+    # -----------------------------
+    # Introspection / persistence
+    # -----------------------------
+    @property
+    def label_encoders(self):
+        """Fitted classes as sklearn LabelEncoders ({column: encoder}), for older callers."""
+        from sklearn.preprocessing import LabelEncoder
+
+        encoders = {}
+        for i, (name, _) in enumerate(self.steps):
+            if name == "encode" and i in self.fitted_:
+                for col, classes in self.fitted_[i].items():
+                    encoder = LabelEncoder()
+                    encoder.classes_ = classes
+                    encoders[col] = encoder
+        return encoders
+
+    def describe(self):
+        """One row per step with a short summary of what was fitted."""
+        rows = []
+        for i, (name, options) in enumerate(self.steps):
+            fitted = self.fitted_.get(i, {})
+            if name == "remove_outliers":
+                size = len(fitted.get("lower", {}))
+            else:
+                size = len(fitted)
+            rows.append({"step": name, "options": options, "fitted columns": size})
+        return rows
+
+    def save(self, path):
+        from modules.model_versions import atomic_write
+        atomic_write(path, pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL))
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            pre = pickle.load(f)
+        if not isinstance(pre, cls):
+            raise TypeError(f"{path} does not hold a {cls.__name__}")
+        return pre
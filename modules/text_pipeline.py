@@ -0,0 +1,182 @@
+# ============================================
+# text_pipeline.py
+# ============================================
+"""
+Streaming tf.data input pipeline for the sentiment LSTM.
+
+    source (DataFrame, or CSV / JSONL / TXT path(s), read in chunks)
+      → tokenize on the fly (in-graph TextVectorization, same ids as the Tokenizer)
+      → cache → shuffle → bucket by length with dynamic padding → prefetch
+
+Only one CSV chunk plus the shuffle buffer is held in memory, and each batch is
+padded to its length bucket instead of a global max_length.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_BUCKETS = (16, 32, 64)
+# Same file types as the Sequential/Text upload on the Dataset page
+TEXT_FILE_TYPES = {".csv": "csv", ".json": "jsonl", ".jsonl": "jsonl", ".txt": "txt", ".log": "txt"}
+
+
+# ============================================================
+# 📥 Sources
+# ============================================================
+def text_file_format(path):
+    """"csv", "jsonl" or "txt" from the file extension (ValueError for anything else)."""
+    ext = os.path.splitext(str(path))[1].lower()
+    if ext not in TEXT_FILE_TYPES:
+        raise ValueError(f"Unsupported text file '{path}' (expected one of {', '.join(TEXT_FILE_TYPES)})")
+    return TEXT_FILE_TYPES[ext]
+
+
+def _iter_txt_chunks(path, text_col, label_col, chunk_size, separator="\t"):
+    """
+    One `label<separator>text` pair per line. Lines without the separator keep
+    their text with a missing label, so training drops them like any unlabelled row.
+    """
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        rows = []
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            label, sep, text = line.partition(separator)
+            rows.append((text.strip(), label.strip()) if sep else (line, None))
+            if len(rows) >= chunk_size:
+                yield pd.DataFrame(rows, columns=[text_col, label_col])
+                rows = []
+        if rows:
+            yield pd.DataFrame(rows, columns=[text_col, label_col])
+
+
+def iter_text_chunks(source, text_col, label_col, chunk_size=10_000):
+    """
+    Yield DataFrame chunks of [text_col, label_col] from a DataFrame, a CSV / JSONL /
+    TXT path, or a list of such paths (read one after another). Only one chunk is
+    in memory at a time.
+    """
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunk_size):
+            yield source[[text_col, label_col]].iloc[start:start + chunk_size]
+        return
+    if isinstance(source, (list, tuple)):
+        for path in source:
+            yield from iter_text_chunks(path, text_col, label_col, chunk_size)
+        return
+
+    fmt = text_file_format(source)
+    if fmt == "csv":
+        yield from pd.read_csv(source, usecols=[text_col, label_col], chunksize=chunk_size)
+    elif fmt == "jsonl":
+        with pd.read_json(source, lines=True, chunksize=chunk_size, dtype=False) as reader:
+            for chunk in reader:
+                missing = {text_col, label_col} - set(chunk.columns)
+                if missing:
+                    raise KeyError(f"{source}: missing field(s) {sorted(missing)}")
+                yield chunk[[text_col, label_col]]
+    else:
+        yield from _iter_txt_chunks(source, text_col, label_col, chunk_size)
+
+
+def fit_text_vocabulary(source, text_col, label_col, vocab_size=5000, chunk_size=10_000, tokenizer=None,
+                        sample_size=0, seed=42):
+    """
+    One streaming pass: fit the Tokenizer (word counts accumulate across chunks)
+    and a LabelEncoder over every distinct label. Returns (tokenizer, encoder, n_rows, sample).
+    A `tokenizer` passed in is reused as-is (only the labels are collected).
+    `sample` is a uniform random sample of up to `sample_size` rows (bottom-k of a
+    random key per row), or None when sample_size is 0.
+    """
+    from tensorflow.keras.preprocessing.text import Tokenizer
+    from sklearn.preprocessing import LabelEncoder
+
+    fit_tokenizer = tokenizer is None
+    if fit_tokenizer:
+        tokenizer = Tokenizer(num_words=vocab_size, oov_token="<OOV>")
+    rng = np.random.default_rng(seed)
+    labels, rows, sample = set(), 0, None
+    for chunk in iter_text_chunks(source, text_col, label_col, chunk_size):
+        if fit_tokenizer:
+            tokenizer.fit_on_texts(chunk[text_col].astype(str))
+        labels.update(chunk[label_col].dropna().unique())
+        rows += len(chunk)
+        if sample_size:
+            keyed = chunk.dropna(subset=[label_col]).assign(_key=lambda c: rng.random(len(c)))
+            sample = keyed if sample is None else pd.concat([sample, keyed])
+            sample = sample.nsmallest(sample_size, "_key")
+
+    encoder = LabelEncoder().fit(sorted(labels, key=str))
+    if sample is not None:
+        sample = sample.drop(columns="_key").reset_index(drop=True)
+    return tokenizer, encoder, rows, sample
+
+
+# ============================================================
+# 🔁 Dataset
+# ============================================================
+def make_text_dataset(source, text_col, label_col, tokenizer, encoder,
+                      batch_size=32, max_length=100, bucket_boundaries=DEFAULT_BUCKETS,
+                      shuffle_buffer=10_000, cache=None, subset=None, validation_every=5,
+                      chunk_size=10_000, seed=42):
+    """
+    Batched (padded_ids, label) dataset.
+
+    cache:  None (re-read every epoch), "memory", or a file prefix for tf.data's on-disk cache.
+    subset: None (all rows), "training" or "validation" — every `validation_every`-th
+            row goes to validation, so the split is deterministic and needs no shuffle
+            of the whole file.
+    """
+    import tensorflow as tf
+    from modules.text_vectorizer import build_vectorizer
+
+    classes = {str(c): i for i, c in enumerate(encoder.classes_)}
+
+    def generate():
+        for chunk in iter_text_chunks(source, text_col, label_col, chunk_size):
+            chunk = chunk.dropna(subset=[label_col])
+            texts = chunk[text_col].astype(str).to_numpy()
+            labels = np.asarray([classes[str(v)] for v in chunk[label_col]], dtype=np.int32)
+            yield from zip(texts, labels)
+
+    ds = tf.data.Dataset.from_generator(
+        generate,
+        output_signature=(tf.TensorSpec((), tf.string), tf.TensorSpec((), tf.int32)),
+    )
+    if subset is not None:
+        keep_validation = subset == "validation"
+        ds = ds.enumerate().filter(
+            lambda i, _: tf.equal(i % validation_every == validation_every - 1, keep_validation)
+        ).map(lambda _, row: row)
+
+    vectorizer = build_vectorizer(tokenizer, max_length=None)
+
+    def tokenize(text, label):
+        ids = vectorizer(tf.expand_dims(text, 0))[0][:max_length]
+        # An all-filtered text still needs one (padding) step for the LSTM
+        ids = tf.cond(tf.size(ids) > 0, lambda: ids, lambda: tf.zeros([1], ids.dtype))
+        return ids, label
+
+    ds = ds.map(tokenize, num_parallel_calls=tf.data.AUTOTUNE)
+    if cache == "memory":
+        ds = ds.cache()
+    elif cache:
+        ds = ds.cache(cache)
+    if shuffle_buffer and subset != "validation":
+        ds = ds.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+
+    # Pad each batch up to its bucket's width (16, 32, 64, max_length) rather than to
+    # its exact longest row, so the model only ever sees a handful of input shapes
+    # (each new shape would retrace the train step).
+    boundaries = [b + 1 for b in sorted(bucket_boundaries) if b < max_length] + [max_length + 1]
+    ds = ds.bucket_by_sequence_length(
+        element_length_func=lambda ids, _: tf.shape(ids)[0],
+        bucket_boundaries=boundaries,
+        bucket_batch_sizes=[batch_size] * (len(boundaries) + 1),
+        padded_shapes=([None], []),
+        pad_to_bucket_boundary=True,
+    )
+    return ds.prefetch(tf.data.AUTOTUNE)
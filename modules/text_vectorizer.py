@@ -0,0 +1,95 @@
+# ============================================
+# text_vectorizer.py
+# ============================================
+"""
+Bake the fitted Keras Tokenizer into the sentiment model as a TextVectorization
+layer, so the saved `.keras` artifact takes raw strings and tokenizes in-graph.
+
+Ids match Tokenizer.texts_to_sequences + post padding/truncation exactly:
+index 0 is padding, 1 is the OOV token and word i keeps index i.
+"""
+
+import tensorflow as tf
+from tensorflow import keras
+
+END_TO_END_MODEL_PATH = "models/lstm_end_to_end.keras"
+
+# Default `filters` of keras.preprocessing.text.Tokenizer
+TOKENIZER_FILTERS = '!"#$%&()*+,-./:;<=>?@[\\]^_`{|}~\t\n'
+_FILTER_PATTERN = "[" + "".join("\\" + c if c in "[]\\^-" else c for c in TOKENIZER_FILTERS) + "]"
+
+# Inputs where in-graph tokenization has diverged from the Tokenizer before:
+# non-ASCII case, and whitespace the Tokenizer does not split on
+PARITY_PROBES = ("ÉTÉ Très BON Straße ÄÖÜ", "good\rbad  thing", "tab\tsplit\nline", "  ", "a,b!!c")
+
+
+@keras.utils.register_keras_serializable(package="recommendation_app")
+def tokenizer_standardize(inputs):
+    """Lower-case (Unicode, like str.lower) and replace the Tokenizer's filter characters with spaces."""
+    return tf.strings.regex_replace(tf.strings.lower(inputs, encoding="utf-8"), _FILTER_PATTERN, " ")
+
+
+@keras.utils.register_keras_serializable(package="recommendation_app")
+def tokenizer_split(inputs):
+    """Split on single spaces and drop empty tokens, like Tokenizer(split=" ") (other whitespace stays in the word)."""
+    tokens = tf.strings.split(inputs, " ")
+    return tf.ragged.boolean_mask(tokens, tf.strings.length(tokens) > 0)
+
+
+def build_vectorizer(tokenizer, max_length=100):
+    """
+    TextVectorization layer reproducing `tokenizer` (fit with an oov_token).
+    `max_length=None` returns unpadded sequences (for dynamic padding in tf.data).
+    """
+    if not tokenizer.oov_token:
+        raise ValueError("❌ In-graph vectorization needs a Tokenizer fit with an oov_token.")
+    if tokenizer.filters != TOKENIZER_FILTERS or not tokenizer.lower or tokenizer.split != " ":
+        raise ValueError("❌ In-graph vectorization only supports the default Tokenizer text filters.")
+
+    limit = tokenizer.num_words or len(tokenizer.word_index) + 1
+    vocabulary = [w for w, i in sorted(tokenizer.word_index.items(), key=lambda x: x[1])
+                  if 1 < i < limit]
+
+    return keras.layers.TextVectorization(
+        standardize=tokenizer_standardize,
+        split=tokenizer_split,
+        output_mode="int",
+        output_sequence_length=max_length,
+        vocabulary=vocabulary,
+        name="text_vectorization",
+    )
+
+
+def check_vectorizer(tokenizer, vectorizer, texts=()):
+    """Raise ValueError unless `vectorizer` gives texts_to_sequences' ids for PARITY_PROBES + `texts`."""
+    import numpy as np
+    from tensorflow.keras.preprocessing.sequence import pad_sequences
+
+    texts = list(PARITY_PROBES) + [str(t) for t in texts]
+    expected = tokenizer.texts_to_sequences(texts)
+    got = vectorizer(np.asarray(texts, dtype=object)[:, None]).numpy()
+    width = got.shape[1]
+    expected = pad_sequences(expected, maxlen=width, padding="post", truncating="post")
+    for text, row, want in zip(texts, got, expected):
+        if not np.array_equal(row, want):
+            raise ValueError(f"❌ In-graph tokenization of {text!r} gives {row.tolist()}, "
+                             f"the Tokenizer {want.tolist()}.")
+
+
+def build_end_to_end_model(model, tokenizer, max_length=None, check_texts=()):
+    """
+    Wrap a trained int-sequence model so it accepts a (batch, 1) string tensor.
+    The vectorizer is checked against the Tokenizer on PARITY_PROBES + `check_texts` first.
+    """
+    max_length = max_length or model.input_shape[1]
+    vectorizer = build_vectorizer(tokenizer, max_length)
+    check_vectorizer(tokenizer, vectorizer, check_texts)
+    inputs = keras.Input(shape=(1,), dtype="string", name="text")
+    outputs = model(vectorizer(inputs))
+    return keras.Model(inputs, outputs, name="lstm_end_to_end")
+
+
+def accepts_raw_text(model):
+    """True for models built by build_end_to_end_model (string input)."""
+    inputs = getattr(model, "inputs", None)
+    return bool(inputs) and str(inputs[0].dtype) == "string"
@@ -0,0 +1,232 @@
+# ============================================
+# tflite_export.py
+# ============================================
+"""
+Quantized TFLite export of the sentiment LSTM and a lightweight predictor.
+
+The predictor only needs an interpreter (`tflite_runtime`, `ai_edge_litert` or,
+as a fallback, `tensorflow.lite`) plus a JSON vocabulary — no Keras, no pickles.
+Tokenization re-implements Keras' Tokenizer.texts_to_sequences in plain Python,
+so ids match the training tokenizer exactly.
+"""
+
+import os
+import json
+import time
+import threading
+
+import numpy as np
+
+TFLITE_MODEL_PATH = "models/lstm_model.tflite"
+TFLITE_META_PATH = "models/lstm_tflite_meta.json"
+QUANTIZATION_MODES = ["none", "dynamic", "int8"]
+
+
+# ============================================================
+# 📦 Export
+# ============================================================
+def _unrolled_copy(model, max_length):
+    """
+    Clone `model` with unroll=True on its recurrent layers. Keras 3 LSTMs otherwise
+    lower to a while-loop the TFLite converter can only handle via Flex (TF) ops.
+    """
+    import tensorflow as tf
+
+    def clone_layer(layer):
+        config = layer.get_config()
+        if "unroll" in config:
+            config["unroll"] = True
+        return layer.__class__.from_config(config)
+
+    clone = tf.keras.models.clone_model(
+        model,
+        input_tensors=tf.keras.Input((max_length,), dtype="int32"),
+        clone_function=clone_layer,
+    )
+    clone.set_weights(model.get_weights())
+    return clone
+
+
+def export_tflite(model, tokenizer, encoder=None, quantization="dynamic", representative_texts=None,
+                  max_length=100, model_out=TFLITE_MODEL_PATH, meta_out=TFLITE_META_PATH):
+    """
+    Convert a trained Keras sentiment model to a TFLite flatbuffer.
+
+    quantization:
+        "none"    — float32 weights
+        "dynamic" — int8 weights, float activations (no calibration data needed)
+        "int8"    — int8 weights and activations, calibrated on `representative_texts`
+    Returns (model_out, meta_out, size_in_bytes).
+    """
+    import tensorflow as tf
+    from tensorflow.keras.preprocessing.sequence import pad_sequences
+    from modules.model_versions import atomic_write
+
+    if quantization not in QUANTIZATION_MODES:
+        raise ValueError(f"❌ quantization must be one of {QUANTIZATION_MODES}")
+
+    # Models trained by train_lstm_sentiment know their padded input length
+    input_length = model.input_shape[1] if model.input_shape[1] else max_length
+    converter = tf.lite.TFLiteConverter.from_keras_model(_unrolled_copy(model, input_length))
+
+    if quantization != "none":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "int8":
+        if not representative_texts:
+            raise ValueError("❌ int8 quantization needs representative_texts for calibration.")
+        sequences = tokenizer.texts_to_sequences([str(t) for t in representative_texts[:500]])
+        calibration = pad_sequences(sequences, maxlen=input_length, padding="post", truncating="post")
+
+        def representative_dataset():
+            for row in calibration:
+                yield [row[np.newaxis, :].astype("int32")]
+
+        converter.representative_dataset = representative_dataset
+
+    flatbuffer = converter.convert()
+
+    num_words = tokenizer.num_words
+    meta = {
+        "max_length": int(input_length),
+        "num_words": num_words,
+        "oov_token": tokenizer.oov_token,
+        "filters": tokenizer.filters,
+        "lower": tokenizer.lower,
+        "split": tokenizer.split,
+        "word_index": {
+            w: i for w, i in tokenizer.word_index.items()
+            if not num_words or i < num_words or w == tokenizer.oov_token
+        },
+        "labels": [str(c) for c in encoder.classes_] if encoder is not None else None,
+        "quantization": quantization,
+    }
+
+    atomic_write(model_out, flatbuffer)
+    atomic_write(meta_out, json.dumps(meta, ensure_ascii=False), mode="w")
+    return model_out, meta_out, len(flatbuffer)
+
+
+# ============================================================
+# ⚡ Lightweight predictor
+# ============================================================
+def _interpreter_class():
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class TFLiteSentimentPredictor:
+    """Interpreter-based drop-in for predict_sentiment / predict_sentiment_batch."""
+
+    def __init__(self, model_path=TFLITE_MODEL_PATH, meta_path=TFLITE_META_PATH, num_threads=None):
+        with open(meta_path, "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.word_index = self.meta["word_index"]
+        self.max_length = self.meta["max_length"]
+        self.labels = self.meta["labels"]
+        self._oov_index = self.word_index.get(self.meta["oov_token"]) if self.meta["oov_token"] else None
+        self._table = str.maketrans({c: self.meta["split"] for c in self.meta["filters"]})
+
+        self.interpreter = _interpreter_class()(model_path=model_path, num_threads=num_threads)
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch = None
+        self._lock = threading.Lock()
+
+    # -----------------------------
+    # Tokenizer (mirrors keras Tokenizer.texts_to_sequences + post padding)
+    # -----------------------------
+    def _encode(self, text):
+        if self.meta["lower"]:
+            text = text.lower()
+        words = [w for w in text.translate(self._table).split(self.meta["split"]) if w]
+        num_words = self.meta["num_words"]
+        ids = []
+        for w in words:
+            i = self.word_index.get(w)
+            if i is not None and not (num_words and i >= num_words):
+                ids.append(i)
+            elif self._oov_index is not None:
+                ids.append(self._oov_index)
+        ids = ids[:self.max_length]
+        return ids + [0] * (self.max_length - len(ids))
+
+    def _run(self, batch):
+        with self._lock:
+            if self._batch != len(batch):
+                self.interpreter.resize_tensor_input(self._input["index"], [len(batch), self.max_length])
+                self.interpreter.allocate_tensors()
+                self._batch = len(batch)
+            self.interpreter.set_tensor(self._input["index"], batch.astype(self._input["dtype"]))
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self._output["index"]).copy()
+
+    def _decode(self, preds):
+        if preds.shape[-1] == 1:
+            scores = preds[:, 0].astype(float)
+        else:
+            scores = preds.max(axis=-1).astype(float)
+        if self.labels and preds.shape[-1] > 1:
+            labels = [self.labels[i] for i in preds.argmax(axis=-1)]
+        else:
+            labels = ["Positive 😀" if s >= 0.5 else "Negative 😞" for s in scores]
+        return labels, [round(float(s), 3) for s in scores]
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def predict(self, text, timings=None):
+        started = time.perf_counter()
+        batch = np.asarray([self._encode(text if isinstance(text, str) else str(text))], dtype=np.int32)
+        tokenized = time.perf_counter()
+        preds = self._run(batch)
+        predicted = time.perf_counter()
+        labels, scores = self._decode(preds)
+        decoded = time.perf_counter()
+        if timings is not None:
+            timings.update({
+                "load_ms": 0.0,
+                "tokenize_ms": round((tokenized - started) * 1000, 3),
+                "predict_ms": round((predicted - tokenized) * 1000, 3),
+                "decode_ms": round((decoded - predicted) * 1000, 3),
+                "total_ms": round((decoded - started) * 1000, 3),
+            })
+        return labels[0], scores[0]
+
+    def predict_batch(self, texts, batch_size=256):
+        """Yield (label, score) for every text, in input order."""
+        buffer = []
+        for text in texts:
+            buffer.append(self._encode(text if isinstance(text, str) else str(text)))
+            if len(buffer) == batch_size:
+                yield from zip(*self._decode(self._run(np.asarray(buffer, dtype=np.int32))))
+                buffer = []
+        if buffer:
+            yield from zip(*self._decode(self._run(np.asarray(buffer, dtype=np.int32))))
+
+
+_PREDICTORS = {}
+
+
+def predict_sentiment_tflite(text, model_path=TFLITE_MODEL_PATH, meta_path=TFLITE_META_PATH, timings=None):
+    """
+    Same contract as recommend_utils.predict_sentiment — returns (label, score) —
+    served by the quantized TFLite model. The predictor is cached per (path, mtime).
+    """
+    try:
+        stamp = (os.stat(model_path).st_mtime_ns, os.stat(meta_path).st_mtime_ns)
+    except FileNotFoundError as e:
+        return f"❌ Model load error: {e}", 0.0
+
+    key = os.path.abspath(model_path)
+    entry = _PREDICTORS.get(key)
+    if entry is None or entry[0] != stamp:
+        entry = (stamp, TFLiteSentimentPredictor(model_path, meta_path))
+        _PREDICTORS[key] = entry
+    return entry[1].predict(text, timings=timings)
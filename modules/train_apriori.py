@@ -5,14 +5,18 @@
 import pandas as pd
 import pickle
 import os
-from mlxtend.frequent_patterns import apriori, association_rules
+from modules.model_versions import StagedVersion, dataframe_hash
 
 
-def train_apriori(df_encoded, min_support=0.02, min_lift=1.0, min_confidence=0.5, save_path="models/apriori_model.pkl"):
+def train_apriori(df_encoded, min_support=0.02, min_lift=1.0, min_confidence=0.5, save_path="models/apriori_model.pkl",
+                  preprocessor=None):
     """
     Trains an Apriori model on one-hot encoded data, generates rules,
-    and saves both frequent itemsets and rules to disk.
+    and saves both frequent itemsets and rules to disk (plus the fitted
+    TabularPreprocessor, if given, as <model>_preprocessor.pkl).
     """
+    from mlxtend.frequent_patterns import apriori, association_rules
+
     # Step 1: Find frequent itemsets
     frequent_itemsets = apriori(df_encoded, min_support=min_support, use_colnames=True)
     if frequent_itemsets.empty:
@@ -26,12 +30,16 @@ def train_apriori(df_encoded, min_support=0.02, min_lift=1.0, min_confidence=0.5
     rules["antecedents"] = rules["antecedents"].apply(lambda x: list(x))
     rules["consequents"] = rules["consequents"].apply(lambda x: list(x))
 
-    # Step 4: Ensure folder exists
-    os.makedirs(os.path.dirname(save_path), exist_ok=True)
-
-    # Step 5: Save model
-    with open(save_path, "wb") as f:
-        pickle.dump({"frequent_itemsets": frequent_itemsets, "rules": rules}, f)
+    # Step 5: Publish a new registry version (atomic) and mirror it to save_path
+    params = {"min_support": min_support, "min_confidence": min_confidence, "min_lift": min_lift}
+    registry_dir = os.path.join(os.path.dirname(save_path), "registry")
+    with StagedVersion("Apriori", params, dataframe_hash(df_encoded), registry_dir) as stage:
+        with open(stage.file("model", save_path), "wb") as f:
+            pickle.dump({"frequent_itemsets": frequent_itemsets, "rules": rules}, f)
+        if preprocessor is not None:
+            # Fitted tabular steps: how the training data was prepared (TabularPreprocessor.load)
+            preprocessor.save(stage.file("preprocessor", os.path.splitext(save_path)[0] + "_preprocessor.pkl"))
+        stage.metrics = {"num_itemsets": len(frequent_itemsets), "num_rules": len(rules)}
 
     return rules, save_path
 
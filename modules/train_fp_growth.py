@@ -1,14 +1,17 @@
 import pandas as pd
 import pickle
 import os
-from mlxtend.frequent_patterns import fpgrowth, association_rules
+from modules.model_versions import StagedVersion, dataframe_hash
 
 
-def train_fp_growth(df_encoded, min_support=0.02, min_confidence=0.5, min_lift=1.0, save_path="models/fpgrowth_model.pkl"):
+def train_fp_growth(df_encoded, min_support=0.02, min_confidence=0.5, min_lift=1.0, save_path="models/fpgrowth_model.pkl",
+                    preprocessor=None):
     """
     Trains an FP-Growth model on one-hot encoded data, generates rules,
-    and saves both frequent itemsets and rules to disk.
+    and saves both frequent itemsets and rules to disk (plus the fitted
+    TabularPreprocessor, if given, as <model>_preprocessor.pkl).
     """
+    from mlxtend.frequent_patterns import fpgrowth, association_rules
 
     # Step 1: Ensure binary (0/1) values
     df_encoded = df_encoded.copy()
@@ -27,12 +30,16 @@ def train_fp_growth(df_encoded, min_support=0.02, min_confidence=0.5, min_lift=1
     rules["antecedents"] = rules["antecedents"].apply(list)
     rules["consequents"] = rules["consequents"].apply(list)
 
-    # Step 5: Ensure model folder exists
-    os.makedirs(os.path.dirname(save_path), exist_ok=True)
-
-    # Step 6: Save model
-    with open(save_path, "wb") as f:
-        pickle.dump({"frequent_itemsets": frequent_itemsets, "rules": rules}, f)
+    # Step 6: Publish a new registry version (atomic) and mirror it to save_path
+    params = {"min_support": min_support, "min_confidence": min_confidence, "min_lift": min_lift}
+    registry_dir = os.path.join(os.path.dirname(save_path), "registry")
+    with StagedVersion("FP-Growth", params, dataframe_hash(df_encoded), registry_dir) as stage:
+        with open(stage.file("model", save_path), "wb") as f:
+            pickle.dump({"frequent_itemsets": frequent_itemsets, "rules": rules}, f)
+        if preprocessor is not None:
+            # Fitted tabular steps: how the training data was prepared (TabularPreprocessor.load)
+            preprocessor.save(stage.file("preprocessor", os.path.splitext(save_path)[0] + "_preprocessor.pkl"))
+        stage.metrics = {"num_itemsets": len(frequent_itemsets), "num_rules": len(rules)}
 
     return rules, save_path
 
@@ -5,18 +5,151 @@
 import os
 import pickle
 import numpy as np
+import pandas as pd
 from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Embedding, LSTM, Dense, Dropout
+from tensorflow.keras.layers import Embedding, GRU, LSTM, Dense, Dropout
 from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.callbacks import EarlyStopping
+from modules.model_versions import StagedVersion, dataframe_hash
+from modules.text_vectorizer import build_end_to_end_model
+from modules.text_pipeline import DEFAULT_BUCKETS, fit_text_vocabulary, iter_text_chunks, make_text_dataset
+from modules.ngram_fast_path import NgramSentimentModel
+
+# Rows of training data stored with each version and replayed when fine-tuning
+REPLAY_SIZE = 5000
+
+
+def scaled_learning_rate(batch_size, base_lr=1e-3, base_batch_size=32):
+    """Square-root LR scaling for Adam when the batch grows beyond the 32 the defaults were tuned on."""
+    return base_lr * (batch_size / base_batch_size) ** 0.5
+
+
+def configure_cpu_threads(intra_op=None, inter_op=None):
+    """
+    Size TensorFlow's intra-/inter-op thread pools (0 or None = TF default).
+    Only possible before the TF runtime starts; returns False when it is already running.
+    """
+    import tensorflow as tf
+
+    try:
+        if intra_op:
+            tf.config.threading.set_intra_op_parallelism_threads(int(intra_op))
+        if inter_op:
+            tf.config.threading.set_inter_op_parallelism_threads(int(inter_op))
+    except RuntimeError:
+        return False
+    return True
+
+
+def build_lstm_model(vocab_size, embedding_dim=64, lstm_units=64, max_length=100, mask_zero=False,
+                     fast=False, cell="LSTM", learning_rate=1e-3):
+    """
+    Embedding → LSTM → sigmoid. `mask_zero=True` lets batches use dynamic padding.
+
+    fast=True drops recurrent_dropout (which forces Keras onto the generic per-step
+    loop instead of the fused kernel; input dropout is kept) and allows cell="GRU".
+    """
+    if fast:
+        rnn_class = GRU if cell == "GRU" else LSTM
+        rnn = rnn_class(lstm_units, dropout=0.2)
+    else:
+        rnn = LSTM(lstm_units, dropout=0.2, recurrent_dropout=0.2)
+
+    model = Sequential([
+        Embedding(vocab_size, embedding_dim, input_length=max_length, mask_zero=mask_zero),
+        rnn,
+        Dense(1, activation="sigmoid")
+    ])
+    model.compile(loss="binary_crossentropy", optimizer=Adam(learning_rate), metrics=["accuracy"])
+    return model
+
+
+def _replay_sample(df, text_col, label_col, size=REPLAY_SIZE, seed=42):
+    """Uniform sample of training rows (columns text / label) kept for later fine-tuning."""
+    sample = df[[text_col, label_col]].dropna(subset=[label_col])
+    sample = sample.sample(min(size, len(sample)), random_state=seed)
+    return sample.rename(columns={text_col: "text", label_col: "label"}).reset_index(drop=True)
+
+
+def _warn_single_class(source):
+    print(f"⚠️ Skipping the n-gram fast path: {source} a single class.")
+
+
+def _fit_ngram(texts, y, model=None, X=None, targets="labels"):
+    """
+    Hashed n-gram fast-path model trained alongside the LSTM on the true labels,
+    or distilled from it (targets="lstm": fit on the LSTM's own predictions for `X`).
+    Returns None (no fast path) when the targets hold fewer than two classes.
+    """
+    if targets == "lstm":
+        preds = np.asarray(model.predict(X, batch_size=512, verbose=0))
+        y = (preds[:, 0] >= 0.5).astype(int) if preds.shape[-1] == 1 else preds.argmax(axis=-1)
+    if len(np.unique(y)) < 2:
+        _warn_single_class("the LSTM predicts" if targets == "lstm" else "the labels hold")
+        return None
+    return NgramSentimentModel().fit(texts, y)
+
+
+def _publish_lstm(model, tokenizer, encoder, history, params, data_hash, save_dir, max_length,
+                  replay=None, ngram=None):
+    """
+    Publish model + tokenizer + encoder (+ replay sample, n-gram fast path) as a new
+    registry version. Returns the model path.
+    """
+    model_path = os.path.join(save_dir, "lstm_model.h5")
+    end_to_end_path = os.path.join(save_dir, "lstm_end_to_end.keras")
+    end_to_end = None
+    with StagedVersion("LSTM (Sentiment Analysis)", params, data_hash,
+                       os.path.join(save_dir, "registry")) as stage:
+        model.save(stage.file("model", model_path))
+
+        # Self-contained variant: raw strings in, tokenization runs in-graph. Optional —
+        # if the in-graph vectorizer disagrees with the tokenizer, publish without it.
+        try:
+            end_to_end = build_end_to_end_model(model, tokenizer, max_length)
+        except ValueError as e:
+            print(f"⚠️ Skipping the end-to-end model: {e}")
+        else:
+            end_to_end.save(stage.file("end_to_end", end_to_end_path))
+
+        with open(stage.file("tokenizer", os.path.join(save_dir, "lstm_tokenizer.pkl")), "wb") as f:
+            pickle.dump(tokenizer, f)
+
+        with open(stage.file("encoder", os.path.join(save_dir, "lstm_encoder.pkl")), "wb") as f:
+            pickle.dump(encoder, f)
+
+        if replay is not None:
+            with open(stage.file("replay", os.path.join(save_dir, "lstm_replay.pkl")), "wb") as f:
+                pickle.dump(replay, f)
+
+        if ngram is not None:
+            with open(stage.file("ngram", os.path.join(save_dir, "lstm_ngram.pkl")), "wb") as f:
+                pickle.dump(ngram, f)
+
+        stage.metrics = {k: float(v[-1]) for k, v in history.history.items()}
+
+    if end_to_end is None and os.path.exists(end_to_end_path):
+        # The legacy fallback would otherwise serve an older version's end-to-end model
+        os.remove(end_to_end_path)
+    return model_path
+
 
 def train_lstm_sentiment(df, text_col, label_col,
                          embedding_dim=64, lstm_units=64, epochs=5,
                          vocab_size=5000, max_length=100,
-                         save_dir="models"):
+                         save_dir="models", tokenizer=None,
+                         fast=False, cell="LSTM", batch_size=32, intra_op_threads=None, inter_op_threads=None,
+                         ngram_targets="labels"):
     """
     Train an LSTM model for sentiment / text sequence classification.
+    Pass the `tokenizer` fitted on the Dataset page (preprocess_sequential.tokenize_and_pad)
+    to reuse its vocabulary instead of fitting a new one.
+    Fast CPU mode: `fast=True` (fused-kernel friendly LSTM, or cell="GRU"), a larger
+    `batch_size` (learning rate scaled to match) and optional thread-pool sizes.
+    A hashed n-gram fast-path model is trained alongside (ngram_targets="labels"),
+    distilled from the LSTM ("lstm"), or skipped (None).
     """
+    configure_cpu_threads(intra_op_threads, inter_op_threads)
     from tensorflow.keras.preprocessing.text import Tokenizer
     from tensorflow.keras.preprocessing.sequence import pad_sequences
     from sklearn.preprocessing import LabelEncoder
@@ -30,38 +163,332 @@ def train_lstm_sentiment(df, text_col, label_col,
     # -----------------------------
     # Tokenize and pad text
     # -----------------------------
-    tokenizer = Tokenizer(num_words=vocab_size, oov_token="<OOV>")
-    tokenizer.fit_on_texts(df[text_col])
+    if tokenizer is None:
+        tokenizer = Tokenizer(num_words=vocab_size, oov_token="<OOV>")
+        tokenizer.fit_on_texts(df[text_col])
+    vocab_size = tokenizer.num_words or len(tokenizer.word_index) + 1
     sequences = tokenizer.texts_to_sequences(df[text_col])
     X = pad_sequences(sequences, maxlen=max_length, padding='post', truncating='post')
 
     # -----------------------------
     # Build model
     # -----------------------------
-    model = Sequential([
-        Embedding(vocab_size, embedding_dim, input_length=max_length),
-        LSTM(lstm_units, dropout=0.2, recurrent_dropout=0.2),
-        Dense(1, activation="sigmoid")
-    ])
-    model.compile(loss="binary_crossentropy", optimizer=Adam(1e-3), metrics=["accuracy"])
+    model = build_lstm_model(vocab_size, embedding_dim, lstm_units, max_length, fast=fast, cell=cell,
+                             learning_rate=scaled_learning_rate(batch_size))
 
     # -----------------------------
     # Train model
     # -----------------------------
     es = EarlyStopping(monitor="val_loss", patience=2, restore_best_weights=True)
-    model.fit(X, y, validation_split=0.2, epochs=epochs, batch_size=32, callbacks=[es], verbose=1)
+    history = model.fit(X, y, validation_split=0.2, epochs=epochs, batch_size=batch_size, callbacks=[es], verbose=1)
 
     # -----------------------------
-    # Save model + tokenizer + encoder
+    # N-gram fast path
     # -----------------------------
-    os.makedirs(save_dir, exist_ok=True)
-    model_path = os.path.join(save_dir, "lstm_model.h5")
-    model.save(model_path)
+    ngram = None
+    if ngram_targets:
+        ngram = _fit_ngram(df[text_col].astype(str).tolist(), y, model, X, targets=ngram_targets)
+
+    # -----------------------------
+    # Publish model + tokenizer + encoder as a new registry version
+    # -----------------------------
+    params = {"text_col": text_col, "label_col": label_col, "embedding_dim": embedding_dim,
+              "lstm_units": lstm_units, "epochs": epochs, "vocab_size": vocab_size,
+              "max_length": max_length, "fast": fast, "cell": cell if fast else "LSTM",
+              "batch_size": batch_size}
+    data_hash = dataframe_hash(df[[text_col, label_col]])
+    model_path = _publish_lstm(model, tokenizer, encoder, history, params, data_hash, save_dir, max_length,
+                               replay=_replay_sample(df, text_col, label_col), ngram=ngram)
+
+    return model, tokenizer, model_path
+
+
+def train_lstm_sentiment_bucketed(source, text_col, label_col,
+                                  embedding_dim=64, lstm_units=64, epochs=5,
+                                  vocab_size=5000, max_length=100, batch_size=32,
+                                  bucket_boundaries=DEFAULT_BUCKETS, cache=None,
+                                  save_dir="models", tokenizer=None,
+                                  fast=False, cell="LSTM", intra_op_threads=None, inter_op_threads=None):
+    """
+    Same model as train_lstm_sentiment, fed by the streaming tf.data pipeline
+    (modules/text_pipeline.py): `source` is a DataFrame or CSV / JSONL / TXT path(s) read in chunks,
+    texts are tokenized on the fly and batched by length with dynamic padding, so the
+    corpus never has to fit in memory. Every 5th row is held out for validation.
+    Fast-mode options behave as in train_lstm_sentiment.
+    """
+    configure_cpu_threads(intra_op_threads, inter_op_threads)
+
+    # -----------------------------
+    # Vocabulary + labels (one streaming pass)
+    # -----------------------------
+    tokenizer, encoder, rows, replay = fit_text_vocabulary(source, text_col, label_col, vocab_size,
+                                                           tokenizer=tokenizer, sample_size=REPLAY_SIZE)
+    replay = replay.rename(columns={text_col: "text", label_col: "label"})
+    vocab_size = tokenizer.num_words or len(tokenizer.word_index) + 1
+
+    # -----------------------------
+    # tf.data pipelines
+    # -----------------------------
+    options = dict(batch_size=batch_size, max_length=max_length, bucket_boundaries=bucket_boundaries)
+    train_ds = make_text_dataset(source, text_col, label_col, tokenizer, encoder, subset="training",
+                                 cache=f"{cache}.train" if cache not in (None, "memory") else cache,
+                                 **options)
+    val_ds = make_text_dataset(source, text_col, label_col, tokenizer, encoder, subset="validation",
+                               cache=f"{cache}.val" if cache not in (None, "memory") else cache,
+                               **options)
+
+    # -----------------------------
+    # Build + train (masking makes the per-batch padding invisible to the LSTM)
+    # -----------------------------
+    model = build_lstm_model(vocab_size, embedding_dim, lstm_units, max_length=None, mask_zero=True,
+                             fast=fast, cell=cell, learning_rate=scaled_learning_rate(batch_size))
+    es = EarlyStopping(monitor="val_loss", patience=2, restore_best_weights=True)
+    history = model.fit(train_ds, validation_data=val_ds, epochs=epochs, callbacks=[es], verbose=1)
+
+    # -----------------------------
+    # N-gram fast path (one streaming partial_fit pass)
+    # -----------------------------
+    ngram = None
+    classes = {str(c): i for i, c in enumerate(encoder.classes_)}
+    if len(classes) < 2:
+        # SGDClassifier needs two classes; keep the trained LSTM and publish without a fast path
+        _warn_single_class("the labels hold")
+    else:
+        ngram = NgramSentimentModel()
+        for chunk in iter_text_chunks(source, text_col, label_col):
+            chunk = chunk.dropna(subset=[label_col])
+            if len(chunk):
+                ngram.partial_fit(chunk[text_col].astype(str).tolist(),
+                                  [classes[str(v)] for v in chunk[label_col]], list(classes.values()))
+
+    # -----------------------------
+    # Publish
+    # -----------------------------
+    params = {"text_col": text_col, "label_col": label_col, "embedding_dim": embedding_dim,
+              "lstm_units": lstm_units, "epochs": epochs, "vocab_size": vocab_size,
+              "max_length": max_length, "batch_size": batch_size, "pipeline": "bucketed",
+              "fast": fast, "cell": cell if fast else "LSTM",
+              "bucket_boundaries": list(bucket_boundaries), "rows": rows}
+    if isinstance(source, pd.DataFrame):
+        data_hash = dataframe_hash(source[[text_col, label_col]])
+    else:
+        import hashlib
+        from modules.model_registry import artifact_checksum
+        paths = list(source) if isinstance(source, (list, tuple)) else [source]
+        data_hash = hashlib.sha256("".join(artifact_checksum(p) for p in paths).encode()).hexdigest() \
+            if len(paths) > 1 else artifact_checksum(paths[0])
+    model_path = _publish_lstm(model, tokenizer, encoder, history, params, data_hash, save_dir, max_length,
+                               replay=replay, ngram=ngram)
+
+    return model, tokenizer, model_path
+
+
+def train_lstm_sentiment_from_files(paths, text_col="text", label_col="label", **kwargs):
+    """
+    Train from one or more CSV / JSONL / TXT files without loading them into memory.
+
+    Pass 1 streams the files to fit the vocabulary, labels and replay sample; pass 2
+    feeds training through the bucketed tf.data pipeline (and a partial_fit pass for
+    the n-gram fast path). Peak memory is bounded by the chunk size, shuffle buffer
+    and vocabulary, not by the corpus size, as long as `cache` is not "memory".
+    TXT lines are `label<TAB>text`; their columns are named text_col / label_col.
+    Other keyword arguments go to train_lstm_sentiment_bucketed.
+    """
+    from modules.text_pipeline import text_file_format
+
+    paths = [paths] if isinstance(paths, (str, os.PathLike)) else list(paths)
+    if not paths:
+        raise ValueError("No training files given.")
+    for path in paths:
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Training file not found: {path}")
+        text_file_format(path)
+
+    return train_lstm_sentiment_bucketed([str(p) for p in paths], text_col, label_col, **kwargs)
+
+
+# ============================================================
+# 🔁 Warm-start fine-tuning
+# ============================================================
+def load_lstm_artifacts(save_dir="models"):
+    """
+    Fresh (mutable) copies of the current model, tokenizer, encoder, replay sample and
+    n-gram fast path, from the current registry version or the legacy files in `save_dir`.
+    Returns (model, tokenizer, encoder, replay_or_None, ngram_or_None, parent_version_or_None).
+    """
+    from modules.model_versions import current_artifact, current_version
+    from modules.recommend_utils import _load_keras_model
+
+    algorithm, registry_dir = "LSTM (Sentiment Analysis)", os.path.join(save_dir, "registry")
+
+    def pick(key, legacy):
+        return current_artifact(algorithm, key, registry_dir) or os.path.join(save_dir, legacy)
+
+    def load_pickle(path, optional=False):
+        if optional and not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    model_path = pick("model", "lstm_model.h5")
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"❌ No trained LSTM found at {model_path}. Train a model first.")
+
+    version = current_version(algorithm, registry_dir)
+    return (
+        _load_keras_model(model_path),
+        load_pickle(pick("tokenizer", "lstm_tokenizer.pkl")),
+        load_pickle(pick("encoder", "lstm_encoder.pkl")),
+        load_pickle(pick("replay", "lstm_replay.pkl"), optional=True),
+        load_pickle(pick("ngram", "lstm_ngram.pkl"), optional=True),
+        version["version"] if version else None,
+    )
+
+
+def grow_tokenizer(tokenizer, texts, max_new_words=1000, min_count=2):
+    """
+    Copy of `tokenizer` with frequent out-of-vocabulary words from `texts` appended
+    right after the current vocabulary limit. Existing ids never change, so the
+    trained embedding rows stay valid. Returns (grown_tokenizer, added_words).
+    """
+    import copy
+    from collections import Counter
+    from tensorflow.keras.preprocessing.text import text_to_word_sequence
 
-    with open(os.path.join(save_dir, "lstm_tokenizer.pkl"), "wb") as f:
-        pickle.dump(tokenizer, f)
+    limit = tokenizer.num_words or len(tokenizer.word_index) + 1
+    counts = Counter()
+    for text in texts:
+        counts.update(text_to_word_sequence(str(text), filters=tokenizer.filters,
+                                            lower=tokenizer.lower, split=tokenizer.split))
 
-    with open(os.path.join(save_dir, "lstm_encoder.pkl"), "wb") as f:
-        pickle.dump(encoder, f)
+    word_index = tokenizer.word_index
+    added = [w for w, c in counts.most_common()
+             if c >= min_count and word_index.get(w, limit) >= limit][:max_new_words]
+    if not added:
+        return tokenizer, []
+
+    grown = copy.deepcopy(tokenizer)
+    new_index = {w: i for w, i in word_index.items() if i < limit}
+    for offset, word in enumerate(added):
+        new_index[word] = limit + offset
+    # Words past the old limit that weren't promoted keep their relative order after the new ones
+    next_id = limit + len(added)
+    for _, word in sorted((i, w) for w, i in word_index.items() if i >= limit and w not in new_index):
+        new_index[word] = next_id
+        next_id += 1
+
+    grown.word_index = new_index
+    grown.index_word = {i: w for w, i in new_index.items()}
+    for word in added:
+        grown.word_counts[word] = grown.word_counts.get(word, 0) + counts[word]
+    if tokenizer.num_words:
+        grown.num_words = limit + len(added)
+    return grown, added
+
+
+def _expand_embedding(model, vocab_size, seed=42):
+    """Clone `model` with a larger Embedding; new rows are drawn around the trained rows' mean."""
+    import tensorflow as tf
+
+    embedding = next(layer for layer in model.layers if isinstance(layer, Embedding))
+    old_rows = embedding.get_weights()[0]
+    if vocab_size <= old_rows.shape[0]:
+        return model
+
+    def clone_layer(layer):
+        config = layer.get_config()
+        if layer is embedding:
+            config["input_dim"] = vocab_size
+        return layer.__class__.from_config(config)
+
+    clone = tf.keras.models.clone_model(model, clone_function=clone_layer)
+    rng = np.random.default_rng(seed)
+    new_rows = rng.normal(old_rows.mean(axis=0), old_rows.std(axis=0) + 1e-6,
+                          (vocab_size - old_rows.shape[0], old_rows.shape[1])).astype(old_rows.dtype)
+    for old_layer, new_layer in zip(model.layers, clone.layers):
+        weights = old_layer.get_weights()
+        if old_layer is embedding:
+            weights = [np.vstack([old_rows, new_rows])]
+        new_layer.set_weights(weights)
+    return clone
+
+
+def finetune_lstm_sentiment(df, text_col, label_col, epochs=2, replay_ratio=1.0,
+                            grow_vocab=False, max_new_words=1000, learning_rate=3e-4,
+                            batch_size=32, max_length=100, save_dir="models"):
+    """
+    Warm-start the current sentiment model on new labelled rows instead of retraining
+    from scratch.
+
+    - Model, tokenizer and encoder come from the current version in `save_dir`.
+    - Vocabulary stays stable: unseen words map to <OOV>, or with `grow_vocab=True`
+      up to `max_new_words` frequent new words get fresh embedding rows.
+    - Training data = the new rows + `replay_ratio` × as many rows replayed from the
+      sample stored with the previous version (limits forgetting). The n-gram fast
+      path, when present, is updated on the same rows.
+    - The result is published as a new registry version whose params record the
+      parent version, so every refresh is a versioned checkpoint.
+    """
+    from tensorflow.keras.preprocessing.sequence import pad_sequences
+
+    model, tokenizer, encoder, replay, ngram, parent = load_lstm_artifacts(save_dir)
+
+    # -----------------------------
+    # New rows (+ replay sample)
+    # -----------------------------
+    new_rows = df[[text_col, label_col]].dropna(subset=[label_col])
+    new_rows = new_rows.rename(columns={text_col: "text", label_col: "label"}).reset_index(drop=True)
+    unseen = set(new_rows["label"].astype(str)) - {str(c) for c in encoder.classes_}
+    if unseen:
+        raise ValueError(f"❌ Labels {sorted(unseen)} were not in the original training data; "
+                         "retrain from scratch to add classes.")
+
+    replay_rows = 0
+    train_df = new_rows
+    if replay is not None and replay_ratio > 0:
+        replay_rows = min(len(replay), int(len(new_rows) * replay_ratio))
+        train_df = pd.concat([new_rows, replay.sample(replay_rows, random_state=42)], ignore_index=True)
+    train_df = train_df.sample(frac=1.0, random_state=42).reset_index(drop=True)
+
+    # -----------------------------
+    # Vocabulary (stable or grown)
+    # -----------------------------
+    added = []
+    if grow_vocab:
+        tokenizer, added = grow_tokenizer(tokenizer, new_rows["text"], max_new_words)
+        model = _expand_embedding(model, tokenizer.num_words or len(tokenizer.word_index) + 1)
+
+    classes = {str(c): i for i, c in enumerate(encoder.classes_)}
+    y = np.asarray([classes[str(v)] for v in train_df["label"]])
+    input_length = model.input_shape[1] or max_length
+    X = pad_sequences(tokenizer.texts_to_sequences(train_df["text"].astype(str)),
+                      maxlen=input_length, padding="post", truncating="post")
+
+    # -----------------------------
+    # Fine-tune
+    # -----------------------------
+    model.compile(loss="binary_crossentropy", optimizer=Adam(learning_rate), metrics=["accuracy"])
+    es = EarlyStopping(monitor="val_loss", patience=1, restore_best_weights=True)
+    history = model.fit(X, y, validation_split=0.2, epochs=epochs, batch_size=batch_size,
+                        callbacks=[es], verbose=1)
+
+    # The n-gram fast path keeps learning from the same rows
+    if ngram is not None:
+        for _ in range(epochs):
+            ngram.partial_fit(train_df["text"].astype(str).tolist(), y, list(range(len(encoder.classes_))))
+
+    # -----------------------------
+    # Publish as a child version
+    # -----------------------------
+    params = {"finetuned_from": parent, "text_col": text_col, "label_col": label_col,
+              "epochs": epochs, "new_rows": len(new_rows), "replay_rows": replay_rows,
+              "learning_rate": learning_rate, "batch_size": batch_size,
+              "grow_vocab": grow_vocab, "added_words": len(added),
+              "vocab_size": tokenizer.num_words or len(tokenizer.word_index) + 1,
+              "max_length": input_length}
+    next_replay = pd.concat([replay, new_rows], ignore_index=True) if replay is not None else new_rows
+    model_path = _publish_lstm(model, tokenizer, encoder, history, params, dataframe_hash(new_rows),
+                               save_dir, input_length,
+                               replay=_replay_sample(next_replay, "text", "label"), ngram=ngram)
 
     return model, tokenizer, model_path
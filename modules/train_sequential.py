@@ -7,21 +7,30 @@ import json
 import pickle
 import pandas as pd
 from collections import defaultdict, Counter
+from modules.model_versions import StagedVersion, dataframe_hash
 
 
 # --------------------------------------------------
 # 🔹 Helper: Build Ordered Sequences
 # --------------------------------------------------
-def build_sequences(df: pd.DataFrame, session_col: str, time_col: str, item_col: str):
+def build_sequences(df: pd.DataFrame, session_col: str, time_col: str, item_col: str, layout=None):
     """
     Convert raw transaction log into ordered sequences per session/user.
     Example output: [['Milk', 'Bread', 'Butter'], ['Tea', 'Sugar']]
+    `layout` (modules/schema_inference.py) supplies the timestamp format detected from a
+    sample, so the column is parsed with one fixed format instead of per-value inference.
     """
     if not all(col in df.columns for col in [session_col, time_col, item_col]):
         raise ValueError("❌ Please ensure all required columns exist in the dataframe.")
 
     df_sorted = df[[session_col, time_col, item_col]].dropna()
-    df_sorted[time_col] = pd.to_datetime(df_sorted[time_col], errors="coerce")
+    if not pd.api.types.is_datetime64_any_dtype(df_sorted[time_col]):
+        fmt = (layout or {}).get("timestamp_columns", {}).get(time_col)
+        parsed = pd.to_datetime(df_sorted[time_col], format=fmt, errors="coerce") if fmt else None
+        if parsed is None or parsed.isna().any():
+            # No detected format, or values the sampled format can't read
+            parsed = pd.to_datetime(df_sorted[time_col], errors="coerce")
+        df_sorted[time_col] = parsed
 
     grouped = (
         df_sorted.sort_values([session_col, time_col])
@@ -60,29 +69,42 @@ def build_transitions(sequences, order=1, min_support=1):
     return filtered
 
 
+# --------------------------------------------------
+# 🔹 Helper: Decode transitions to item names
+# --------------------------------------------------
+def to_readable_model(encoded_transitions, id_to_item):
+    """
+    Map encoded transitions {('0',): {'1': 3}} to the human-readable form
+    {"('Milk',)": {'Bread': 3}} used by recommend_from_patterns.
+    """
+    readable_model = {}
+    for prefix, nexts in encoded_transitions.items():
+        prefix_names = tuple(id_to_item[str(p)] for p in prefix)
+        next_names = {id_to_item[str(nxt)]: cnt for nxt, cnt in nexts.items()}
+        readable_model[str(prefix_names)] = next_names
+    return readable_model
+
+
 # --------------------------------------------------
 # 🔹 TRAIN FUNCTION
 # --------------------------------------------------
-def train_sequential(df, session_col, time_col, item_col, order=1, min_support=1, save_dir="models"):
+def train_sequential(df, session_col, time_col, item_col, order=1, min_support=1, save_dir="models",
+                     layout=None):
     """
     Train a sequential pattern model using n-gram transitions with encoding.
     Saves: pickle model, item mapping, readable JSON, and metadata.
+    `layout` is the dataset's sampled layout, passed on to build_sequences.
     """
     os.makedirs(save_dir, exist_ok=True)
 
     # Step 1: Build ordered sequences
-    sequences = build_sequences(df, session_col, time_col, item_col)
+    sequences = build_sequences(df, session_col, time_col, item_col, layout)
 
     # Step 2: Build encoding maps (item → id, id → item)
     unique_items = pd.Series([i for seq in sequences for i in seq]).unique()
     item_to_id = {str(item): str(idx) for idx, item in enumerate(unique_items)}
     id_to_item = {str(idx): str(item) for item, idx in item_to_id.items()}
 
-    # Save mapping
-    mapping_path = os.path.join(save_dir, "item_mapping.pkl")
-    with open(mapping_path, "wb") as f:
-        pickle.dump({"item_to_id": item_to_id, "id_to_item": id_to_item}, f)
-
     # Step 3: Encode sequences into ID form
     encoded_sequences = [[item_to_id[str(i)] for i in seq if str(i) in item_to_id] for seq in sequences]
 
@@ -90,31 +112,40 @@ def train_sequential(df, session_col, time_col, item_col, order=1, min_support=1
     encoded_transitions = build_transitions(encoded_sequences, order, min_support)
 
     # Step 5: Create human-readable transitions
-    readable_model = {}
-    for prefix, nexts in encoded_transitions.items():
-        prefix_names = tuple(id_to_item[str(p)] for p in prefix)
-        next_names = {id_to_item[str(nxt)]: cnt for nxt, cnt in nexts.items()}
-        readable_model[str(prefix_names)] = next_names
-
-    # Step 6: Save models
-    model_path = os.path.join(save_dir, "sequential_model.pkl")
-    with open(model_path, "wb") as f:
-        pickle.dump(encoded_transitions, f)
-
-    readable_json_path = os.path.join(save_dir, "sequential_model_readable.json")
-    with open(readable_json_path, "w", encoding="utf-8") as f:
-        json.dump(readable_model, f, indent=2, ensure_ascii=False)
+    readable_model = to_readable_model(encoded_transitions, id_to_item)
 
-    # Step 7: Save metadata
+    # Step 6: Publish a new registry version (atomic) and mirror to save_dir
     meta = {
         "order": order,
         "min_support": min_support,
         "num_sequences": len(sequences),
         "unique_items": len(unique_items)
     }
+    mapping_path = os.path.join(save_dir, "item_mapping.pkl")
+    model_path = os.path.join(save_dir, "sequential_model.pkl")
+    readable_json_path = os.path.join(save_dir, "sequential_model_readable.json")
     meta_path = os.path.join(save_dir, "sequential_model_meta.json")
-    with open(meta_path, "w", encoding="utf-8") as f:
-        json.dump(meta, f, indent=2, ensure_ascii=False)
+
+    params = {"session_col": session_col, "time_col": time_col, "item_col": item_col,
+              "order": order, "min_support": min_support}
+    data_hash = dataframe_hash(df[[session_col, time_col, item_col]])
+    with StagedVersion("Sequential Pattern Matching", params, data_hash,
+                       os.path.join(save_dir, "registry")) as stage:
+        with open(stage.file("mapping", mapping_path), "wb") as f:
+            pickle.dump({"item_to_id": item_to_id, "id_to_item": id_to_item}, f)
+
+        with open(stage.file("model", model_path), "wb") as f:
+            pickle.dump(encoded_transitions, f)
+
+        with open(stage.file("readable", readable_json_path), "w", encoding="utf-8") as f:
+            json.dump(readable_model, f, indent=2, ensure_ascii=False)
+
+        # Metadata (the Recommendation page reads `order` from here)
+        with open(stage.file("meta", meta_path), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2, ensure_ascii=False)
+
+        stage.metrics = {"num_sequences": len(sequences), "unique_items": len(unique_items),
+                         "num_prefixes": len(readable_model)}
 
     print(f"✅ Sequential model trained successfully!")
     print(f"📦 Saved files:\n - Model: {model_path}\n - Mapping: {mapping_path}\n - Readable: {readable_json_path}")
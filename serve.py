@@ -0,0 +1,26 @@
+# serve.py
+# Headless recommendation API (no Streamlit).
+#   python serve.py --port 8000 --workers 4
+import argparse
+
+from modules.http_service import run_server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve basket, next-item and sentiment recommendations over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of serving processes sharing the port (SO_REUSEPORT).")
+    parser.add_argument("--hot-swap-interval", type=float, default=2.0,
+                        help="Seconds between registry manifest checks.")
+    parser.add_argument("--max-batch", type=int, default=64,
+                        help="Largest sentiment micro-batch per LSTM forward pass.")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0,
+                        help="How long a sentiment request may wait for others to join its batch.")
+    parser.add_argument("--fast-path-threshold", type=float, default=None,
+                        help="Answer /sentiment with the hashed n-gram model when its margin is at least "
+                             "this (0-1); lower-margin inputs go to the LSTM. Default: LSTM only.")
+    args = parser.parse_args()
+
+    run_server(args.host, args.port, args.workers, args.hot_swap_interval, args.max_batch, args.max_wait_ms,
+               args.fast_path_threshold)
@@ -0,0 +1,42 @@
+# train_sentiment.py
+# Train the sentiment LSTM from files larger than memory, without Streamlit.
+#   python train_sentiment.py reviews_2023.csv reviews_2024.csv --text-col Review_Text --label-col Sentiment
+#   python train_sentiment.py reviews.jsonl --epochs 3 --fast --batch-size 256 --cache /tmp/lstm_cache
+#   python train_sentiment.py labelled.txt          # one `label<TAB>text` per line
+import argparse
+
+from modules.text_pipeline import DEFAULT_BUCKETS
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream CSV/JSONL/TXT files through the bucketed LSTM trainer.")
+    parser.add_argument("paths", nargs="+", help="Training files, read one after another.")
+    parser.add_argument("--text-col", default="text")
+    parser.add_argument("--label-col", default="label")
+    parser.add_argument("--embedding-dim", type=int, default=64)
+    parser.add_argument("--lstm-units", type=int, default=64)
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--vocab-size", type=int, default=5000)
+    parser.add_argument("--max-length", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--buckets", default=",".join(map(str, DEFAULT_BUCKETS)),
+                        help="Comma separated length bucket boundaries.")
+    parser.add_argument("--cache", default=None,
+                        help="File prefix for tf.data's on-disk cache of tokenized rows (default: re-read files).")
+    parser.add_argument("--fast", action="store_true", help="Fast CPU mode (no recurrent dropout).")
+    parser.add_argument("--cell", choices=["LSTM", "GRU"], default="LSTM")
+    parser.add_argument("--intra", type=int, default=None, help="intra_op_parallelism_threads")
+    parser.add_argument("--inter", type=int, default=None, help="inter_op_parallelism_threads")
+    parser.add_argument("--models-dir", default="models")
+    args = parser.parse_args()
+
+    from modules.train_lstm_sentiment import train_lstm_sentiment_from_files
+
+    _, _, model_path = train_lstm_sentiment_from_files(
+        args.paths, args.text_col, args.label_col,
+        embedding_dim=args.embedding_dim, lstm_units=args.lstm_units, epochs=args.epochs,
+        vocab_size=args.vocab_size, max_length=args.max_length, batch_size=args.batch_size,
+        bucket_boundaries=tuple(int(b) for b in args.buckets.split(",") if b.strip()),
+        cache=args.cache, save_dir=args.models_dir, fast=args.fast, cell=args.cell,
+        intra_op_threads=args.intra, inter_op_threads=args.inter,
+    )
+    print(f"✅ Saved {model_path}")